@@ -0,0 +1,98 @@
+"""
+Vectorized bet-sizing analysis built on utils.calculate_pot_odds.
+
+sizing_surface evaluates a whole grid of bet sizes (and optionally a grid of
+hero equities or fold frequencies) in one set of NumPy operations, for the
+sizing charts in "You're Betting the WRONG size" and "Run Over your poker table
+with over bets".
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from utils import calculate_pot_odds
+
+ArrayLike = Union[float, np.ndarray]
+FoldModel = Union[ArrayLike, Callable[[np.ndarray], np.ndarray]]
+
+DEFAULT_SIZES = np.round(np.arange(0.10, 2.0001, 0.05), 2)  # 10% to 200% pot
+
+
+@dataclass
+class SizingSurface:
+    """Per-size results; every array broadcasts to the same shape"""
+    sizes: np.ndarray             # bet as a fraction of the pot
+    bets: np.ndarray              # bet amount after capping at the effective stack
+    all_in: np.ndarray            # True where the size was capped
+    pot_odds: np.ndarray          # equity villain needs to call
+    mdf: np.ndarray               # minimum defense frequency
+    bluff_breakeven: np.ndarray   # fold frequency a pure bluff needs
+    fold_freq: np.ndarray         # villain fold frequency used for EV
+    ev_bet: np.ndarray            # hero EV of betting
+    ev_check: np.ndarray          # hero EV of checking (equity share of the pot)
+
+    @property
+    def best_index(self) -> np.ndarray:
+        """Index of the highest-EV size along the last axis"""
+        return np.argmax(self.ev_bet, axis=-1)
+
+    @property
+    def best_size(self) -> np.ndarray:
+        return np.take_along_axis(self.sizes * np.ones_like(self.ev_bet),
+                                  self.best_index[..., None], axis=-1)[..., 0]
+
+
+def sizing_surface(pot: ArrayLike, hero_stack: ArrayLike, villain_stack: ArrayLike,
+                   hero_equity: ArrayLike, fold_freq: Optional[FoldModel] = None,
+                   call_freq: Optional[FoldModel] = None,
+                   sizes: np.ndarray = DEFAULT_SIZES) -> SizingSurface:
+    """
+    Pot odds, MDF, bluff break-even and EV across a grid of bet sizes.
+
+    Bet sizes run along the last axis; any other argument may be an array to
+    add leading grid dimensions (e.g. ``hero_equity=np.linspace(0, 1, 101)[:, None]``
+    gives a 101 x len(sizes) surface).
+
+    Args:
+        pot: Pot before the bet
+        hero_stack: Hero's remaining stack
+        villain_stack: Villain's remaining stack
+        hero_equity: Hero's equity when called
+        fold_freq: Villain fold frequency per size, as a scalar, an array, or a
+            callable taking the size grid
+        call_freq: Alternative to fold_freq (fold = 1 - call)
+        sizes: Bet sizes as fractions of the pot
+
+    Returns:
+        SizingSurface of broadcast arrays. Without a fold model villain defends
+        exactly at MDF, so a pure bluff breaks even at every size.
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    pot = np.asarray(pot, dtype=float)
+    effective = np.minimum(hero_stack, villain_stack)
+    raw_bets = sizes * pot
+    bets = np.minimum(raw_bets, effective)
+
+    pot_odds = calculate_pot_odds(pot + bets, bets)
+    bluff_breakeven = calculate_pot_odds(pot, bets)
+    mdf = 1.0 - bluff_breakeven
+
+    if fold_freq is None and call_freq is not None:
+        calls = call_freq(sizes) if callable(call_freq) else call_freq
+        fold_freq = 1.0 - np.asarray(calls, dtype=float)
+    elif callable(fold_freq):
+        fold_freq = fold_freq(sizes)
+    folds = bluff_breakeven if fold_freq is None else np.asarray(fold_freq, dtype=float)
+    folds = np.clip(folds, 0.0, 1.0)
+
+    equity = np.asarray(hero_equity, dtype=float)
+    ev_called = equity * (pot + 2 * bets) - bets
+    ev_bet = folds * pot + (1.0 - folds) * ev_called
+    ev_check = equity * pot
+
+    return SizingSurface(
+        *np.broadcast_arrays(sizes, bets, raw_bets > effective, pot_odds, mdf,
+                             bluff_breakeven, folds, ev_bet, ev_check)
+    )
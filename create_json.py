@@ -6,9 +6,20 @@ Supports multiple LLM providers: OpenAI, Anthropic, or local models.
 
 import os
 import json
-import re
+import time
+import asyncio
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.models.config import ModelConfig
+from src.prompts import Prompt
+from src.schemas import GUIDELINES_SCHEMA, output_mode_params
+from src.utils.batch import BatchBackend, BatchJobs, LocalBatchBackend, get_batch_backend
+from src.utils.chunking import chunk_token_budget, iter_sentences, token_chunks, token_counter
+from src.utils.json_utils import JsonRepairError, repair_json
+from src.utils.parse_stats import ParseStats
+from src.utils.repository import PokerRepository
+from src.utils.response_cache import ResponseCache, bypass_requested, get_response_cache
 
 # Load environment variables from .env file if it exists
 try:
@@ -21,29 +32,49 @@ except ImportError:
 # Configuration
 FIXED_DIR = Path("guides/fixed_transcripts")
 OUTPUT_FILE = Path("guides/poker_guidelines.json")
-CHUNK_SIZE = 2000  # Adjust based on your LLM's context window
-OVERLAP = 200
+REPOSITORY_FILE = Path("poker_output/poker.sqlite")  # Indexed copy shared with the question/rules pipeline
+CHUNK_TOKENS = None  # Transcript tokens per chunk; None fits chunks to the model (see chunk_budget)
+OVERLAP_TOKENS = 150  # Up to this many tokens of trailing sentences start the next chunk
 
 # LLM Configuration - Choose one
 LLM_PROVIDER = "anthropic"  # Options: "openai", "anthropic", "local"
 #OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+LLM_MODELS = {"openai": "gpt-4o-mini", "anthropic": "claude-3-haiku-20240307", "local": "local"}
+TEMPERATURE = 0.3
+MAX_TOKENS = 2000
 
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> List[str]:
-    """Split text into overlapping chunks."""
-    words = text.split()
-    chunks = []
-    
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = ' '.join(words[i:i + chunk_size])
-        chunks.append(chunk)
-    
-    return chunks
+# Ask for schema-constrained output (OpenAI JSON schema, Anthropic forced tool call);
+# falls back to the prompt text alone if the provider rejects it
+STRUCTURED_OUTPUT = True
+PARSE_STATS = ParseStats()
+PARSE_STATS_FILE = Path("guides/parse_stats.json")
 
-def create_guideline_prompt(transcript_chunk: str) -> str:
-    """Create a prompt for extracting poker guidelines from transcript."""
-    return f"""
-You are an expert poker coach analyzing a transcript. Extract actionable poker guidelines and convert them to structured JSON.
+# Submit every chunk as one provider batch job: about half the price, no rate limits,
+# answers within hours. The job id is kept in BATCH_JOBS_FILE so a restarted run resumes it
+BATCH_MODE = False
+BATCH_JOBS_FILE = Path("guides/batch_jobs.json")
+BATCH_POLL_SECONDS = 60
+BATCH_RETRIES = 2  # Follow-up jobs for chunks whose answers were missing or unusable
+
+# Re-runs answer unchanged prompts from the shared response cache (LLM_CACHE_BYPASS=1 to refresh)
+USE_CACHE = True
+PROMPT_VERSION = "2"  # Bump when create_guideline_prompt changes
+
+def chunk_budget() -> int:
+    """Transcript tokens per chunk for the configured model, leaving room for the instructions and answer."""
+    model = LLM_MODELS.get(LLM_PROVIDER, LLM_PROVIDER)
+    config = ModelConfig(model=model, max_tokens=MAX_TOKENS, chunk_tokens=CHUNK_TOKENS)
+    return chunk_token_budget(config, reserved=token_counter(model)(GUIDELINE_INSTRUCTIONS))
+
+def chunk_text(lines: Iterable[str], overlap: int = OVERLAP_TOKENS) -> Iterator[str]:
+    """Lazily split transcript lines (or text) into chunks that end on sentence or section boundaries."""
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    count_tokens = token_counter(LLM_MODELS.get(LLM_PROVIDER, LLM_PROVIDER))
+    return token_chunks(iter_sentences(lines), chunk_budget(), count_tokens, overlap)
+
+GUIDELINE_INSTRUCTIONS = """You are an expert poker coach analyzing a transcript. Extract actionable poker guidelines and convert them to structured JSON.
 
 Extract guidelines that cover:
 - Betting strategies (when to bet, check, raise, fold)
@@ -63,61 +94,109 @@ For each guideline, provide:
 
 Return ONLY valid JSON in this exact format:
 [
-  {{
+  {
     "title": "Brief title of the guideline",
     "category": "betting|position|board_texture|hand_strength|bluffing|value|multiway|bankroll|exploitation",
     "situation": "Specific situation where this applies",
     "action": "What to do in this situation",
     "reasoning": "Why this strategy works",
     "example": "Brief example if applicable"
-  }}
+  }
 ]
-
-Transcript chunk:
-{transcript_chunk}
 """
 
-def call_openai(prompt: str) -> str:
-    """Call OpenAI API."""
+# Input tokens read from / not served by the provider's prompt cache this run
+INPUT_TOKENS = {"cached": 0, "uncached": 0}
+
+def create_guideline_prompt(transcript_chunk: str) -> Prompt:
+    """Create a prompt for extracting poker guidelines from transcript."""
+    return Prompt(GUIDELINE_INSTRUCTIONS, f"Transcript chunk:\n{transcript_chunk}\n")
+
+def guideline_messages(prompt: Prompt) -> List[Dict[str, Any]]:
+    """OpenAI-style messages with the instructions as a system message, cache-marked for Anthropic."""
+    system: Any = prompt.instructions
+    if LLM_PROVIDER == "anthropic":
+        system = [{"type": "text", "text": prompt.instructions, "cache_control": {"type": "ephemeral"}}]
+    return [{"role": "system", "content": system}, {"role": "user", "content": prompt.content}]
+
+def record_input_tokens(cached: int, uncached: int):
+    """Add one call's input tokens to INPUT_TOKENS and report them."""
+    INPUT_TOKENS["cached"] += cached
+    INPUT_TOKENS["uncached"] += uncached
+    print(f"    Input tokens: {cached} cached, {uncached} uncached")
+
+def call_openai(prompt: Prompt, schema: Dict[str, Any] = None) -> str:
+    """Call OpenAI API, constraining the answer to schema if given."""
     try:
         from openai import OpenAI
         client = OpenAI(api_key=OPENAI_API_KEY)
         
+        extra = {}
+        if schema:
+            extra["response_format"] = {"type": "json_schema",
+                                        "json_schema": {"name": "guidelines", "schema": schema}}
+        # OpenAI caches the longest previously seen prefix automatically
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=2000
+            model=LLM_MODELS["openai"],
+            messages=guideline_messages(prompt),
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            **extra
         )
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", 0) or 0
+        record_input_tokens(cached, usage.prompt_tokens - cached)
         return response.choices[0].message.content
     except ImportError:
         print("OpenAI library not installed. Install with: pip install openai")
         return None
     except Exception as e:
         print(f"OpenAI API error: {e}")
+        if schema:
+            print("Retrying without structured output...")
+            return call_openai(prompt)
         return None
 
-def call_anthropic(prompt: str) -> str:
-    """Call Anthropic API."""
+def call_anthropic(prompt: Prompt, schema: Dict[str, Any] = None) -> str:
+    """Call Anthropic API; with a schema the answer comes back as a forced tool call."""
     try:
         import anthropic
         client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
         
+        extra = {}
+        if schema:
+            extra["tools"] = [{"name": "record_guidelines",
+                               "description": "Record the extracted poker guidelines",
+                               "input_schema": schema}]
+            extra["tool_choice"] = {"type": "tool", "name": "record_guidelines"}
+        # The cache breakpoint on the system prompt covers the tools and instructions before it
         response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=2000,
-            temperature=0.3,
-            messages=[{"role": "user", "content": prompt}]
+            model=LLM_MODELS["anthropic"],
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            system=guideline_messages(prompt)[0]["content"],
+            messages=[{"role": "user", "content": prompt.content}],
+            **extra
         )
+        usage = response.usage
+        record_input_tokens(usage.cache_read_input_tokens or 0,
+                            usage.input_tokens + (usage.cache_creation_input_tokens or 0))
+        for block in response.content:
+            if block.type == "tool_use":
+                return json.dumps(block.input)
         return response.content[0].text
     except ImportError:
         print("Anthropic library not installed. Install with: pip install anthropic")
         return None
     except Exception as e:
         print(f"Anthropic API error: {e}")
+        if schema:
+            print("Retrying without structured output...")
+            return call_anthropic(prompt)
         return None
 
-def call_local_llm(prompt: str) -> str:
+def call_local_llm(prompt: Prompt) -> str:
     """Call a local LLM (placeholder for Ollama, etc.)."""
     # This is a placeholder - you would implement your local LLM call here
     print("Local LLM not implemented. Please use OpenAI or Anthropic.")
@@ -126,34 +205,75 @@ def call_local_llm(prompt: str) -> str:
 def extract_guidelines_with_llm(transcript_chunk: str) -> List[Dict[str, Any]]:
     """Extract guidelines using the configured LLM."""
     prompt = create_guideline_prompt(transcript_chunk)
+    schema = GUIDELINES_SCHEMA if STRUCTURED_OUTPUT and LLM_PROVIDER in ("openai", "anthropic") else None
+    mode = {"openai": "json_schema", "anthropic": "tools"}.get(LLM_PROVIDER) if schema else "prompt"
+    start = time.perf_counter()
     
-    if LLM_PROVIDER == "openai":
-        response = call_openai(prompt)
-    elif LLM_PROVIDER == "anthropic":
-        response = call_anthropic(prompt)
-    elif LLM_PROVIDER == "local":
-        response = call_local_llm(prompt)
-    else:
-        print(f"Unknown LLM provider: {LLM_PROVIDER}")
-        return []
+    cache = get_response_cache() if USE_CACHE else None
+    response = None
+    if cache:
+        cache_key = ResponseCache.make_key({
+            "model": LLM_MODELS.get(LLM_PROVIDER, LLM_PROVIDER),
+            "messages": guideline_messages(prompt),
+            "temperature": TEMPERATURE,
+            "max_tokens": MAX_TOKENS,
+            "response_schema": schema,
+        }, PROMPT_VERSION)
+        if not bypass_requested():
+            response = cache.get(cache_key)
+            if response is not None and not response.strip():
+                response = None  # left by an older version; ask again
     
-    if not response:
+    fresh = response is None
+    if fresh:
+        if LLM_PROVIDER == "openai":
+            response = call_openai(prompt, schema)
+        elif LLM_PROVIDER == "anthropic":
+            response = call_anthropic(prompt, schema)
+        elif LLM_PROVIDER == "local":
+            response = call_local_llm(prompt)
+        else:
+            print(f"Unknown LLM provider: {LLM_PROVIDER}")
+            return []
+    
+    if not response or not response.strip():
         return []
     
+    guidelines, outcome = parse_guidelines(response, mode, start, len(str(prompt)))
+    # Only answers that parsed are worth replaying on the next run
+    if cache and fresh and outcome != "failed":
+        cache.put(cache_key, LLM_MODELS.get(LLM_PROVIDER, LLM_PROVIDER), response)
+    elif cache and outcome == "failed":
+        cache.delete(cache_key)
+    return guidelines
+
+def parse_guidelines(response: str, mode: str, start: float,
+                     prompt_chars: int = 0) -> Tuple[List[Dict[str, Any]], str]:
+    """Guidelines list and parse outcome ("clean", "repaired" or "failed") of a response, recorded in PARSE_STATS."""
+    # Structured answers are {"guidelines": [...]}; prompt-only answers are a bare array
+    tokens = (prompt_chars + len(response)) // 4
     try:
-        # Try to extract JSON from the response
-        json_match = re.search(r'\[.*\]', response, re.DOTALL)
-        if json_match:
-            guidelines = json.loads(json_match.group())
-            return guidelines
-        else:
-            # If no JSON array found, try to parse the entire response
-            guidelines = json.loads(response)
-            return guidelines if isinstance(guidelines, list) else []
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Response was: {response[:200]}...")
-        return []
+        parsed = json.loads(response)
+        outcome = "clean"
+    except json.JSONDecodeError:
+        try:
+            parsed, recoveries = repair_json(response, "[")
+            outcome = "repaired"
+            if recoveries:
+                print(f"    Recovered JSON: {', '.join(recoveries)}")
+        except JsonRepairError as e:
+            print(f"JSON parsing error: {e}")
+            print(f"Response was: {response[:200]}...")
+            PARSE_STATS.record("guidelines", mode, "failed", time.perf_counter() - start, tokens)
+            return [], "failed"
+    
+    if isinstance(parsed, dict):
+        parsed = parsed.get("guidelines")
+    if not isinstance(parsed, list):
+        print(f"Unexpected response shape: {response[:200]}...")
+        outcome = "failed"
+    PARSE_STATS.record("guidelines", mode, outcome, time.perf_counter() - start, tokens)
+    return (parsed if outcome != "failed" else []), outcome
 
 def process_transcripts():
     """Process all fixed transcripts and extract guidelines."""
@@ -170,35 +290,106 @@ def process_transcripts():
         print(f"\nProcessing {i}/{len(transcript_files)}: {file_path.name}")
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
             # Skip if file is too short
-            if len(content.strip()) < 100:
+            if file_path.stat().st_size < 100:
                 print(f"  Skipping {file_path.name} (too short)")
                 continue
             
-            chunks = chunk_text(content)
-            print(f"  Split into {len(chunks)} chunks")
-            
-            for chunk_idx, chunk in enumerate(chunks):
-                print(f"  Processing chunk {chunk_idx + 1}/{len(chunks)}")
-                guidelines = extract_guidelines_with_llm(chunk)
-                
-                # Add metadata to each guideline
-                for guideline in guidelines:
-                    guideline["source_file"] = file_path.name
-                    guideline["chunk_id"] = chunk_idx
-                    guideline["source_type"] = "transcript"
-                
-                all_guidelines.extend(guidelines)
-                print(f"    Extracted {len(guidelines)} guidelines")
+            # Chunks are read from the file as they are needed
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for chunk_idx, chunk in enumerate(chunk_text(f)):
+                    print(f"  Processing chunk {chunk_idx + 1}")
+                    guidelines = extract_guidelines_with_llm(chunk)
+                    
+                    # Add metadata to each guideline
+                    for guideline in guidelines:
+                        guideline["source_file"] = file_path.name
+                        guideline["chunk_id"] = chunk_idx
+                        guideline["source_type"] = "transcript"
+                    
+                    all_guidelines.extend(guidelines)
+                    print(f"    Extracted {len(guidelines)} guidelines")
                 
         except Exception as e:
             print(f"  Error processing {file_path.name}: {e}")
     
     return all_guidelines
 
+async def process_transcripts_batch(backend: BatchBackend = None) -> List[Dict[str, Any]]:
+    """Extract guidelines from every chunk of every transcript with one batch job."""
+    if backend is None:
+        backend = LocalBatchBackend() if LLM_PROVIDER == "local" else get_batch_backend(LLM_MODELS[LLM_PROVIDER])
+    mode = backend.output_mode if STRUCTURED_OUTPUT else "prompt"
+    jobs = BatchJobs(BATCH_JOBS_FILE)
+    
+    def build_requests():
+        requests, meta = {}, {}
+        for file_path in sorted(FIXED_DIR.glob("*.txt")):
+            if file_path.stat().st_size < 100:
+                print(f"  Skipping {file_path.name} (too short)")
+                continue
+            with open(file_path, 'r', encoding='utf-8') as f:
+                chunks = list(chunk_text(f))
+            for chunk_idx, chunk in enumerate(chunks):
+                custom_id = f"guidelines-{len(requests):05d}"
+                requests[custom_id] = {
+                    "model": LLM_MODELS[LLM_PROVIDER],
+                    "messages": guideline_messages(create_guideline_prompt(chunk)),
+                    "temperature": TEMPERATURE,
+                    "max_tokens": MAX_TOKENS,
+                    **output_mode_params(mode, "guidelines", GUIDELINES_SCHEMA),
+                }
+                meta[custom_id] = {"source_file": file_path.name, "chunk_id": chunk_idx}
+        return requests, meta
+    
+    meta, answers = await jobs.run("guidelines", backend, build_requests, BATCH_POLL_SECONDS)
+    all_guidelines, unusable = map_batch_answers(meta, answers, mode)
+    
+    # Chunks without a usable answer go out again in follow-up jobs, each stored
+    # under its own key so a restarted run resumes it too
+    for key in batch_job_keys()[1:]:
+        if not unusable:
+            break
+        print(f"🔁 Resubmitting {len(unusable)} chunks without a usable answer")
+        
+        def retry_requests(unusable=unusable):
+            requests, _ = build_requests()
+            return ({c: requests[c] for c in unusable if c in requests},
+                    {c: meta[c] for c in unusable if c in requests})
+        
+        retry_meta, retry_answers = await jobs.run(key, backend, retry_requests, BATCH_POLL_SECONDS)
+        guidelines, unusable = map_batch_answers(retry_meta, retry_answers, mode)
+        all_guidelines.extend(guidelines)
+    
+    for custom_id in unusable:
+        print(f"⚠️ No usable answer for {meta[custom_id]['source_file']} chunk {meta[custom_id]['chunk_id']}")
+    print(f"Extracted {len(all_guidelines)} guidelines from {len(meta)} chunks")
+    return all_guidelines
+
+def batch_job_keys() -> List[str]:
+    """BatchJobs keys of the guidelines job and its follow-up jobs."""
+    return ["guidelines"] + [f"guidelines-retry-{n}" for n in range(1, BATCH_RETRIES + 1)]
+
+def map_batch_answers(meta: Dict[str, Any], answers: Dict[str, Optional[str]],
+                      mode: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Guidelines from a batch job's answers, and the custom ids whose answer was missing or failed to parse."""
+    all_guidelines, unusable = [], []
+    for custom_id, entry in meta.items():
+        response = answers.get(custom_id)
+        if not response or not response.strip():
+            unusable.append(custom_id)
+            continue
+        guidelines, outcome = parse_guidelines(response, f"batch-{mode}", time.perf_counter())
+        if outcome == "failed":
+            unusable.append(custom_id)
+            continue
+        for guideline in guidelines:
+            guideline["source_file"] = entry["source_file"]
+            guideline["chunk_id"] = entry["chunk_id"]
+            guideline["source_type"] = "transcript"
+        all_guidelines.extend(guidelines)
+    return all_guidelines, unusable
+
 def save_guidelines(guidelines: List[Dict[str, Any]]):
     """Save guidelines to JSON file."""
     # Create output directory if it doesn't exist
@@ -210,8 +401,8 @@ def save_guidelines(guidelines: List[Dict[str, Any]]):
             "total_guidelines": len(guidelines),
             "source_directory": str(FIXED_DIR),
             "llm_provider": LLM_PROVIDER,
-            "chunk_size": CHUNK_SIZE,
-            "overlap": OVERLAP
+            "chunk_tokens": chunk_budget(),
+            "overlap_tokens": OVERLAP_TOKENS
         },
         "guidelines": guidelines
     }
@@ -220,6 +411,11 @@ def save_guidelines(guidelines: List[Dict[str, Any]]):
         json.dump(output_data, f, indent=2, ensure_ascii=False)
     
     print(f"\n✅ Saved {len(guidelines)} guidelines to {OUTPUT_FILE}")
+    
+    # Every run re-extracts all transcripts, so replace the indexed guidelines wholesale
+    with PokerRepository(REPOSITORY_FILE) as repository:
+        repository.replace_guidelines(guidelines)
+    print(f"✅ Indexed guidelines in {REPOSITORY_FILE}")
 
 def main():
     """Main function."""
@@ -242,7 +438,10 @@ def main():
         return
     
     # Process transcripts
-    guidelines = process_transcripts()
+    if BATCH_MODE:
+        guidelines = asyncio.run(process_transcripts_batch())
+    else:
+        guidelines = process_transcripts()
     
     if guidelines:
         save_guidelines(guidelines)
@@ -256,8 +455,22 @@ def main():
         print("\nGuidelines by category:")
         for cat, count in sorted(categories.items()):
             print(f"  {cat}: {count}")
+        
+        print("\nParse outcomes:")
+        for key, summary in PARSE_STATS.summary().items():
+            print(f"  {key}: {summary}")
+        PARSE_STATS.save(PARSE_STATS_FILE)
+        
+        if any(INPUT_TOKENS.values()):
+            print(f"\nInput tokens: {INPUT_TOKENS['cached']} cached, {INPUT_TOKENS['uncached']} uncached")
     else:
         print("❌ No guidelines extracted")
+    
+    if BATCH_MODE:
+        # The answers are saved; the next run submits fresh jobs
+        jobs = BatchJobs(BATCH_JOBS_FILE)
+        for key in batch_job_keys():
+            jobs.finish(key)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
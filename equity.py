@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Multiway equity calculator built on utils cards and the batch hand evaluator.
+
+Two modes are available:
+- monte_carlo_equity deals and evaluates runouts in NumPy batches: every batch
+  draws the missing board cards and random opponent hands for thousands of
+  runouts at once with a vectorized partial Fisher-Yates shuffle.
+- exact_equity enumerates every remaining turn/river runout against a specific
+  hand or a range, streaming over opponent combos in blocks.
+"""
+
+import time
+from dataclasses import dataclass
+from itertools import combinations, islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+import hand_evaluator
+from ranges import parse_range
+from utils import Card, parse_cards
+
+CardsLike = Union[str, Iterable[Union[Card, int]]]
+
+MAX_OPPONENTS = 8
+BATCH_SIZE = 65_536
+
+
+@dataclass
+class EquityResult:
+    """Outcome shares for the hero over all simulated or enumerated runouts"""
+    win: float
+    tie: float
+    loss: float
+    equity: float  # win share plus the hero's split of tied pots
+    runouts: int
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, runouts: Optional[int] = None) -> "EquityResult":
+        """Build a result from [wins, ties, losses, tie_equity] totals (possibly weighted)"""
+        wins, ties, losses, tie_equity = (float(c) for c in counts)
+        total = wins + ties + losses
+        if runouts is None:
+            runouts = int(round(total))
+        if total == 0:
+            return cls(0.0, 0.0, 0.0, 0.0, runouts)
+        return cls(wins / total, ties / total, losses / total,
+                   (wins + tie_equity) / total, runouts)
+
+
+def card_ids(cards: Optional[CardsLike]) -> List[int]:
+    """Card ids from a string like "AhKd", a list of Cards, or a list of ids"""
+    if cards is None:
+        return []
+    if isinstance(cards, str):
+        return [card.id for card in parse_cards(cards)]
+    return [card if isinstance(card, int) else card.id for card in cards]
+
+
+def _opponent_ids(opponents: Union[int, Sequence[Optional[CardsLike]]]) -> List[Optional[List[int]]]:
+    """Normalize the opponents argument to a list of known hands or None for random"""
+    if isinstance(opponents, int):
+        opponents = [None] * opponents
+    hands = [None if hand is None else card_ids(hand) for hand in opponents]
+    if not 1 <= len(hands) <= MAX_OPPONENTS:
+        raise ValueError(f"Need between 1 and {MAX_OPPONENTS} opponents, got {len(hands)}")
+    for hand in hands:
+        if hand is not None and len(hand) != 2:
+            raise ValueError(f"Opponent hands need exactly 2 cards, got {len(hand)}")
+    return hands
+
+
+def _check_cards(hero: List[int], board: List[int], known: List[int]):
+    if len(hero) != 2:
+        raise ValueError(f"Hero hand needs exactly 2 cards, got {len(hero)}")
+    if len(board) not in (0, 3, 4, 5):
+        raise ValueError(f"Board must have 0, 3, 4 or 5 cards, got {len(board)}")
+    if len(set(known)) != len(known):
+        raise ValueError("The same card appears more than once")
+
+
+def showdown_counts(hero_values: np.ndarray, opponent_values: np.ndarray) -> np.ndarray:
+    """
+    Tally showdowns for the hero.
+
+    Args:
+        hero_values: Hero hand values, shape (n,)
+        opponent_values: Opponent hand values, shape (opponents, n)
+
+    Returns:
+        Array of [wins, ties, losses, tie_equity]
+    """
+    best = opponent_values.max(axis=0)
+    won = hero_values > best
+    tied = hero_values == best
+    split = (opponent_values[:, tied] == hero_values[tied]).sum(axis=0) + 1
+    return np.array([
+        np.count_nonzero(won),
+        np.count_nonzero(tied),
+        hero_values.size - np.count_nonzero(won) - np.count_nonzero(tied),
+        np.sum(1.0 / split),
+    ])
+
+
+def _simulate(hero: List[int], board: List[int], opponents: List[Optional[List[int]]],
+              runouts: int, rng: np.random.Generator, batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """Monte Carlo core: returns [wins, ties, losses, tie_equity] over ``runouts``"""
+    known = hero + board + [c for hand in opponents if hand for c in hand]
+    deck = np.setdiff1d(np.arange(52, dtype=np.int8), np.array(known, dtype=np.int8))
+    missing = 5 - len(board)
+    random_seats = [i for i, hand in enumerate(opponents) if hand is None]
+    draw = missing + 2 * len(random_seats)
+
+    board_key, board_bits = hand_evaluator.hand_keys(np.array(board, dtype=np.int8))
+    hero_key, hero_bits = hand_evaluator.hand_keys(np.array(hero, dtype=np.int8))
+    seat_keys = np.zeros((len(opponents), 2), dtype=np.int64)
+    for seat, hand in enumerate(opponents):
+        if hand is not None:
+            seat_keys[seat] = hand_evaluator.hand_keys(np.array(hand, dtype=np.int8))
+
+    counts = np.zeros(4)
+    done = 0
+    while done < runouts:
+        size = min(batch_size, runouts - done)
+        rows = np.arange(size)
+        dealt = np.tile(deck, (size, 1))
+        for j in range(draw):
+            swap = j + rng.integers(0, deck.size - j, size=size)
+            top = dealt[:, j].copy()
+            dealt[:, j] = dealt[rows, swap]
+            dealt[rows, swap] = top
+
+        runout_keys = hand_evaluator.CARD_KEYS[dealt[:, :missing]].sum(axis=1) + board_key
+        runout_bits = hand_evaluator.CARD_BITS[dealt[:, :missing]].sum(axis=1) + board_bits
+        hero_values = hand_evaluator.evaluate_keys(runout_keys + hero_key, runout_bits + hero_bits)
+
+        opponent_values = np.empty((len(opponents), size), dtype=hero_values.dtype)
+        next_card = missing
+        for seat in range(len(opponents)):
+            if seat in random_seats:
+                hole = dealt[:, next_card:next_card + 2]
+                next_card += 2
+                keys = hand_evaluator.CARD_KEYS[hole].sum(axis=1)
+                bits = hand_evaluator.CARD_BITS[hole].sum(axis=1)
+            else:
+                keys, bits = seat_keys[seat]
+            opponent_values[seat] = hand_evaluator.evaluate_keys(runout_keys + keys, runout_bits + bits)
+
+        counts += showdown_counts(hero_values, opponent_values)
+        done += size
+    return counts
+
+
+def monte_carlo_equity(hero: CardsLike, board: Optional[CardsLike] = None,
+                       opponents: Union[int, Sequence[Optional[CardsLike]]] = 1,
+                       runouts: int = 1_000_000, seed: Optional[int] = None,
+                       batch_size: int = BATCH_SIZE) -> EquityResult:
+    """
+    Estimate the hero's equity against 1-8 opponents by sampling runouts.
+
+    Args:
+        hero: Hero's two hole cards ("AhKd", [Card, Card] or card ids)
+        board: Known board cards (0, 3, 4 or 5)
+        opponents: Number of random opponents, or a list with a known hand or
+            None (random hand) for each opponent
+        runouts: Number of runouts to simulate
+        seed: Seed for reproducible results
+        batch_size: Runouts dealt and evaluated per NumPy batch
+
+    Returns:
+        EquityResult with win, tie and loss shares
+    """
+    hero_ids = card_ids(hero)
+    board_ids = card_ids(board)
+    opponent_ids = _opponent_ids(opponents)
+    _check_cards(hero_ids, board_ids,
+                 hero_ids + board_ids + [c for hand in opponent_ids if hand for c in hand])
+
+    rng = np.random.default_rng(seed)
+    counts = _simulate(hero_ids, board_ids, opponent_ids, runouts, rng, batch_size)
+    return EquityResult.from_counts(counts)
+
+
+# -----------------------------
+# Exact enumeration
+# -----------------------------
+EXACT_BLOCK = 262_144  # (combo, runout) pairs evaluated per block
+
+
+def villain_combos(villain: Union[CardsLike, Sequence[CardsLike]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normalize a villain hand or range to (combos, weights).
+
+    Strings go through ranges.parse_range, so both "KdKc" and "QQ+,AKs" work.
+    A sequence of two Cards/ids is a single hand; any other sequence is a list
+    of hands.
+    """
+    if isinstance(villain, str):
+        return parse_range(villain)
+    villain = list(villain)
+    if len(villain) == 2 and all(isinstance(c, (int, Card)) for c in villain):
+        villain = [villain]
+    hands = [sorted(card_ids(hand), reverse=True) for hand in villain]
+    return np.array(hands, dtype=np.int8).reshape(-1, 2), np.ones(len(hands))
+
+
+def runout_blocks(deck: Sequence[int], size: int, block: int) -> Iterator[np.ndarray]:
+    """Yield every ``size``-card combination of ``deck`` in blocks of up to ``block`` rows"""
+    if size == 0:
+        yield np.zeros((1, 0), dtype=np.int8)
+        return
+    remaining = combinations(deck, size)
+    while True:
+        chunk = list(islice(remaining, block))
+        if not chunk:
+            return
+        yield np.array(chunk, dtype=np.int8)
+
+
+def _live_mask(combos: np.ndarray, known: Iterable[int]) -> np.ndarray:
+    """Boolean mask of the combos that share no card with the known cards"""
+    known = set(known)
+    return np.array([not (int(a) in known or int(b) in known) for a, b in combos], dtype=bool)
+
+
+def _check_villain(combos: np.ndarray, known: List[int]):
+    """Raise if no villain combo can be dealt around the known cards"""
+    if _live_mask(combos, known).any():
+        return
+    if len(combos) == 1:
+        raise ValueError("The villain hand shares a card with the hero, board or dead cards")
+    raise ValueError("Every villain combo shares a card with the hero, board or dead cards")
+
+
+def _enumerate(hero: List[int], board: List[int], combos: np.ndarray, weights: np.ndarray,
+               dead: List[int], block: int = EXACT_BLOCK) -> Tuple[np.ndarray, int]:
+    """Exact core: weighted [wins, ties, losses, tie_equity] and matchups enumerated"""
+    known = set(hero + board + dead)
+    keep = _live_mask(combos, known)
+    combos, weights = combos[keep], weights[keep]
+    deck = [c for c in range(52) if c not in known]
+    missing = 5 - len(board)
+
+    board_key, board_bits = hand_evaluator.hand_keys(np.array(board, dtype=np.int8))
+    hero_key, hero_bits = hand_evaluator.hand_keys(np.array(hero, dtype=np.int8))
+    combo_keys, combo_bits = hand_evaluator.hand_keys(combos)
+    combo_masks = (np.int64(1) << combos.astype(np.int64)).sum(axis=1)
+
+    counts = np.zeros(4)
+    matchups = 0
+    for runouts in runout_blocks(deck, missing, max(1, block // max(1, len(combos)))):
+        # Runout keys and hero values are shared by every villain combo
+        runout_keys = hand_evaluator.CARD_KEYS[runouts].sum(axis=1) + board_key
+        runout_bits = hand_evaluator.CARD_BITS[runouts].sum(axis=1) + board_bits
+        runout_masks = (np.int64(1) << runouts.astype(np.int64)).sum(axis=1)
+        hero_values = hand_evaluator.evaluate_keys(runout_keys + hero_key, runout_bits + hero_bits)
+
+        step = max(1, block // len(runouts))
+        for start in range(0, len(combos), step):
+            stop = start + step
+            valid = (runout_masks[None, :] & combo_masks[start:stop, None]) == 0
+            # Runouts sharing a card with the combo are no real hand and can
+            # overflow the evaluator tables, so score the hero's hand there instead
+            keys = np.where(valid, runout_keys[None, :] + combo_keys[start:stop, None],
+                            runout_keys[None, :] + hero_key)
+            bits = np.where(valid, runout_bits[None, :] + combo_bits[start:stop, None],
+                            runout_bits[None, :] + hero_bits)
+            villain_values = hand_evaluator.evaluate_keys(keys.ravel(), bits.ravel()).reshape(keys.shape)
+
+            won = (hero_values[None, :] > villain_values) & valid
+            tied = (hero_values[None, :] == villain_values) & valid
+            lost = valid & ~won & ~tied
+            w = weights[start:stop]
+            counts += [w @ won.sum(axis=1), w @ tied.sum(axis=1), w @ lost.sum(axis=1),
+                       0.5 * (w @ tied.sum(axis=1))]
+            matchups += int(valid.sum())
+    return counts, matchups
+
+
+def exact_equity(hero: CardsLike, board: CardsLike,
+                 villain: Union[CardsLike, Sequence[CardsLike]],
+                 dead: Optional[CardsLike] = None) -> EquityResult:
+    """
+    Exact heads-up equity on a flop or turn by enumerating every runout.
+
+    Args:
+        hero: Hero's two hole cards
+        board: Three, four or five board cards
+        villain: A specific hand ("KdKc"), a range ("QQ+,AKs,AQo:0.5") or a
+            list of hands; range combos that collide with known cards are
+            skipped, and a ValueError is raised when none are left
+        dead: Extra cards known to be out of the deck
+
+    Returns:
+        EquityResult over every (villain combo, runout) matchup, weighted by
+        the range weights
+    """
+    combos, weights = villain_combos(villain)
+    return exact_range_equity(hero, board, combos, weights, dead)
+
+
+def exact_range_equity(hero: CardsLike, board: CardsLike, combos: np.ndarray,
+                       weights: Optional[np.ndarray] = None,
+                       dead: Optional[CardsLike] = None) -> EquityResult:
+    """exact_equity for a villain range already given as (n, 2) combos and weights"""
+    hero_ids = card_ids(hero)
+    board_ids = card_ids(board)
+    dead_ids = card_ids(dead)
+    _check_cards(hero_ids, board_ids, hero_ids + board_ids + dead_ids)
+    if len(board_ids) < 3:
+        raise ValueError("Exact mode needs at least a flop; use monte_carlo_equity preflop")
+
+    combos = np.asarray(combos, dtype=np.int8).reshape(-1, 2)
+    weights = np.ones(len(combos)) if weights is None else np.asarray(weights, dtype=float)
+    _check_villain(combos, hero_ids + board_ids + dead_ids)
+    counts, matchups = _enumerate(hero_ids, board_ids, combos, weights, dead_ids)
+    return EquityResult.from_counts(counts, matchups)
+
+
+if __name__ == "__main__":
+    for players in (1, 3, 8):
+        start = time.perf_counter()
+        result = monte_carlo_equity("AhKh", opponents=players, runouts=1_000_000, seed=1)
+        elapsed = time.perf_counter() - start
+        print(f"AhKh vs {players} random: equity {result.equity:.4f} "
+              f"({result.runouts / elapsed:,.0f} runouts/s)")
@@ -0,0 +1,160 @@
+"""
+Two-level equity cache keyed on the suit-canonical form of a spot.
+
+Lookups go to an in-memory LRU first and then to a SQLite file; misses are
+computed on the canonical spot (suit relabeling never changes an equity) and
+written to both levels. Isomorphic study queries and repeated trainer drills
+are therefore computed once.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from equity import (
+    CardsLike,
+    EquityResult,
+    card_ids,
+    exact_range_equity,
+    monte_carlo_equity,
+    villain_combos,
+)
+from isomorphism import canonicalize
+
+CACHE_FILE = Path(__file__).with_name("equity_cache.sqlite")
+
+
+class EquityCache:
+    """
+    In-memory LRU in front of an on-disk SQLite store.
+
+    Disk writes are committed in batches of commit_every, and on flush() or
+    close(), so a sweep over many spots does not pay one fsync per result.
+
+    Args:
+        path: SQLite file, or None for a memory-only cache
+        capacity: Maximum entries kept in the LRU
+        commit_every: Writes collected in one SQLite transaction
+    """
+
+    def __init__(self, path: Optional[Path] = CACHE_FILE, capacity: int = 4096,
+                 commit_every: int = 256):
+        self.capacity = capacity
+        self.commit_every = commit_every
+        self._pending = 0
+        self._memory: "OrderedDict[str, EquityResult]" = OrderedDict()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path))
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS equity ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def flush(self):
+        """Commit the writes not yet committed"""
+        if self._db is not None and self._pending:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "EquityCache":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def make_key(kind: str, spot_key: str, **params) -> str:
+        """Hash of the query kind, its parameters and the canonical spot"""
+        text = json.dumps([kind, params, spot_key], sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[EquityResult]:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.hits["memory"] += 1
+            return result
+
+        if self._db is not None:
+            row = self._db.execute("SELECT result FROM equity WHERE key = ?", (key,)).fetchone()
+            if row:
+                result = EquityResult(**json.loads(row[0]))
+                self._remember(key, result)
+                self.hits["disk"] += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: EquityResult):
+        self._remember(key, result)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO equity (key, result, created) VALUES (?, ?, ?)",
+                (key, json.dumps(asdict(result)), time.time()),
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.flush()
+
+    def _remember(self, key: str, result: EquityResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def exact_equity(self, hero: CardsLike, board: CardsLike,
+                     villain: Union[CardsLike, Sequence[CardsLike]],
+                     dead: Optional[CardsLike] = None) -> EquityResult:
+        """Cached equity.exact_equity"""
+        combos, weights = villain_combos(villain)
+        spot = canonicalize(card_ids(hero), card_ids(board), card_ids(dead),
+                            combos=combos, weights=weights)
+        key = self.make_key("exact", spot.key())
+        result = self.get(key)
+        if result is None:
+            result = exact_range_equity(list(spot.hero), list(spot.board), spot.combos,
+                                        spot.weights, list(spot.dead))
+            self.put(key, result)
+        return result
+
+    def monte_carlo_equity(self, hero: CardsLike, board: Optional[CardsLike] = None,
+                           opponents: Union[int, Sequence[Optional[CardsLike]]] = 1,
+                           runouts: int = 1_000_000, seed: Optional[int] = None) -> EquityResult:
+        """
+        Cached equity.monte_carlo_equity (the runout count and seed are part of the key)
+
+        Unseeded runs are computed but never cached: one noisy sample would
+        otherwise be served for the spot from then on.
+        """
+        if seed is None:
+            return monte_carlo_equity(hero, board, opponents, runouts=runouts)
+        if isinstance(opponents, int):
+            opponents = [None] * opponents
+        opponent_ids = [None if hand is None else card_ids(hand) for hand in opponents]
+        spot = canonicalize(card_ids(hero), card_ids(board), opponents=opponent_ids)
+        key = self.make_key("monte_carlo", spot.key(), runouts=runouts, seed=seed)
+        result = self.get(key)
+        if result is None:
+            result = monte_carlo_equity(list(spot.hero), list(spot.board),
+                                        [None if hand is None else list(hand)
+                                         for hand in spot.opponents],
+                                        runouts=runouts, seed=seed)
+            self.put(key, result)
+        return result
@@ -0,0 +1,129 @@
+"""
+Suit-isomorphism canonicalization for hands, boards and ranges.
+
+Relabeling the four suits never changes an equity, so every spot has a
+canonical representative: the lexicographically smallest image over all 24
+suit permutations. There are only 1,755 canonical flops out of 22,100.
+"""
+
+from dataclasses import dataclass
+from itertools import combinations, permutations
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# PERMUTATIONS[p, card] is the card after applying suit permutation p
+SUIT_PERMUTATIONS = list(permutations(range(4)))
+PERMUTATIONS = np.array(
+    [[card // 4 * 4 + perm[card % 4] for card in range(52)] for perm in SUIT_PERMUTATIONS],
+    dtype=np.int8,
+)
+
+
+def _sorted_cards(cards: Iterable[int]) -> Tuple[int, ...]:
+    return tuple(sorted((int(c) for c in cards), reverse=True))
+
+
+@dataclass(frozen=True)
+class CanonicalSpot:
+    """A spot relabeled into its canonical suit order"""
+    hero: Tuple[int, ...]
+    board: Tuple[int, ...]
+    dead: Tuple[int, ...]
+    opponents: Tuple[Optional[Tuple[int, ...]], ...]
+    combos: Tuple[Tuple[int, int], ...]
+    weights: Tuple[float, ...]
+    permutation: int  # index into SUIT_PERMUTATIONS that maps the input here
+
+    def key(self) -> str:
+        """Stable text key, identical for every isomorphic input"""
+        opponents = ";".join("?" if hand is None else ",".join(map(str, hand))
+                             for hand in self.opponents)
+        # repr round-trips exactly, so ranges that differ in any weight never share a key
+        villain = ";".join(f"{a},{b}:{float(w)!r}" for (a, b), w in zip(self.combos, self.weights))
+        return "|".join([
+            ",".join(map(str, self.hero)),
+            ",".join(map(str, self.board)),
+            ",".join(map(str, self.dead)),
+            opponents,
+            villain,
+        ])
+
+
+def canonical_board(board: Sequence[int]) -> Tuple[int, ...]:
+    """Canonical form of a board on its own"""
+    images = PERMUTATIONS[:, list(board)]
+    return min(_sorted_cards(row) for row in images)
+
+
+def canonicalize(hero: Sequence[int] = (), board: Sequence[int] = (), dead: Sequence[int] = (),
+                 opponents: Sequence[Optional[Sequence[int]]] = (),
+                 combos: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None) -> CanonicalSpot:
+    """
+    Map a spot to its isomorphic representative.
+
+    Board and dead cards are treated as sets, opponent hands as a multiset
+    (None for a random hand) and a range as a set of weighted combos.
+
+    Args:
+        hero: Hero hole cards
+        board: Board cards
+        dead: Other known dead cards
+        opponents: Known opponent hands or None for random ones
+        combos: Villain range combos, shape (n, 2)
+        weights: Villain range weights, shape (n,)
+
+    Returns:
+        CanonicalSpot with every component relabeled
+    """
+    combos = np.zeros((0, 2), dtype=np.int8) if combos is None else np.asarray(combos)
+    weights = np.ones(len(combos)) if weights is None else np.asarray(weights, dtype=float)
+
+    # Compare the cheap components first; ranges only break remaining ties
+    best_prefix = None
+    candidates: List[int] = []
+    for p, mapping in enumerate(PERMUTATIONS):
+        prefix = (
+            _sorted_cards(mapping[list(board)]),
+            _sorted_cards(mapping[list(hero)]),
+            _sorted_cards(mapping[list(dead)]),
+            tuple(sorted((() if hand is None else _sorted_cards(mapping[list(hand)]))
+                         for hand in opponents)),
+        )
+        if best_prefix is None or prefix < best_prefix:
+            best_prefix, candidates = prefix, [p]
+        elif prefix == best_prefix:
+            candidates.append(p)
+
+    best_range = None
+    best_perm = candidates[0]
+    if len(combos):
+        for p in candidates:
+            mapped = np.sort(PERMUTATIONS[p][combos], axis=1)[:, ::-1].astype(np.int64)
+            codes = mapped[:, 0] * 52 + mapped[:, 1]
+            order = np.argsort(codes)
+            candidate = (tuple(codes[order].tolist()), tuple(weights[order].tolist()))
+            if best_range is None or candidate < best_range:
+                best_range, best_perm = candidate, p
+
+    board_c, hero_c, dead_c, opponents_c = best_prefix
+    if best_range is None:
+        combos_c, weights_c = (), ()
+    else:
+        combos_c = tuple(divmod(code, 52) for code in best_range[0])
+        weights_c = best_range[1]
+    return CanonicalSpot(
+        hero=hero_c,
+        board=board_c,
+        dead=dead_c,
+        opponents=tuple(None if hand == () else hand for hand in opponents_c),
+        combos=combos_c,
+        weights=weights_c,
+        permutation=best_perm,
+    )
+
+
+def count_canonical_flops() -> int:
+    """Number of strategically distinct flops (1,755)"""
+    return len({canonical_board(flop) for flop in combinations(range(52), 3)})
@@ -1,7 +1,7 @@
 import asyncio
 import json
 from pathlib import Path
-from src.poker_processor import PokerTutorialProcessor
+from src.poker_processor import DEFAULT_CONCURRENCY, PokerTutorialProcessor
 from src.config import PROVIDER_CONFIGS, check_environment
 
 async def main():
@@ -23,10 +23,14 @@ async def main():
         return
     
     # Process a single transcript (uncomment to use)
-    await processor.process_transcript(Path("./guides/fixed_transcripts/3. You're Sizing Bets Wrong.txt"))
+    #await processor.process_transcript(Path("./guides/fixed_transcripts/3. You're Sizing Bets Wrong.txt"))
     
-    # Process all transcripts in a directory
-    #await processor.process_all_transcripts(Path("./guides/fixed_transcripts"))
+    # Process all transcripts in a directory, several at once
+    await processor.process_all_transcripts(Path("./guides/fixed_transcripts"), concurrency=DEFAULT_CONCURRENCY)
+    
+    # Or submit everything as provider batch jobs: about half the cost, answers within hours,
+    # and a restarted run resumes the jobs it already submitted (uncomment to use)
+    #await processor.process_all_transcripts_batch(Path("./guides/fixed_transcripts"))
     
     # Get and display processing statistics
     stats = processor.get_stats()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Incremental opponent statistics (VPIP, PFR, 3-bet, c-bet, fold to c-bet).
+
+StatsEngine.update folds one hand_history.ParsedHand into per-player
+counters without rescanning history. Each player keeps all-time counts, a
+ring buffer of per-hand flag masks for the last-N-hands window and daily
+buckets for the last-N-days window; all three are running sums, so a query
+is a constant-time read. save/load store every counter as flat NumPy arrays.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from operator import itemgetter
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from hand_history import BET, CALL, FOLD, POST, RAISE, ParsedHand
+
+STATS = (
+    "hands",
+    "vpip",
+    "pfr",
+    "three_bet_opp",
+    "three_bet",
+    "cbet_opp",
+    "cbet",
+    "fold_to_cbet_opp",
+    "fold_to_cbet",
+)
+(HANDS, VPIP, PFR, THREE_BET_OPP, THREE_BET, CBET_OPP, CBET,
+ FOLD_TO_CBET_OPP, FOLD_TO_CBET) = (1 << i for i in range(len(STATS)))
+
+# _BITS[mask] lists the counter indices set in mask
+_BITS = [tuple(i for i in range(len(STATS)) if mask >> i & 1) for mask in range(1 << len(STATS))]
+
+WINDOWS = ("all", "hands", "days")
+
+
+@dataclass
+class PlayerStats:
+    """Counter snapshot for one player over one window"""
+    name: str
+    window: str
+    counts: Dict[str, int]
+
+    def _ratio(self, made: str, chances: str) -> float:
+        return self.counts[made] / self.counts[chances] if self.counts[chances] else 0.0
+
+    @property
+    def hands(self) -> int:
+        return self.counts["hands"]
+
+    @property
+    def vpip(self) -> float:
+        return self._ratio("vpip", "hands")
+
+    @property
+    def pfr(self) -> float:
+        return self._ratio("pfr", "hands")
+
+    @property
+    def three_bet(self) -> float:
+        return self._ratio("three_bet", "three_bet_opp")
+
+    @property
+    def cbet(self) -> float:
+        return self._ratio("cbet", "cbet_opp")
+
+    @property
+    def fold_to_cbet(self) -> float:
+        return self._ratio("fold_to_cbet", "fold_to_cbet_opp")
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "hands": self.hands,
+            "vpip": self.vpip,
+            "pfr": self.pfr,
+            "three_bet": self.three_bet,
+            "cbet": self.cbet,
+            "fold_to_cbet": self.fold_to_cbet,
+        }
+
+
+def hand_flags(hand: ParsedHand) -> List[int]:
+    """Stat flag mask for every player in a hand"""
+    flags = [HANDS] * len(hand.players)
+
+    # Preflop: voluntary money, raises and 3-bet chances (facing exactly one raise)
+    raises = 0
+    aggressor = None
+    for action in hand.actions:
+        if action.street != 0:
+            break
+        code = action.action
+        if code == POST:
+            continue
+        player = action.player
+        if raises == 1 and not flags[player] & PFR:
+            flags[player] |= THREE_BET_OPP
+            if code == RAISE:
+                flags[player] |= THREE_BET
+        if code == CALL or code == BET or code == RAISE:
+            flags[player] |= VPIP
+        if code == RAISE or code == BET:
+            flags[player] |= PFR
+            raises += 1
+            aggressor = player
+
+    if aggressor is None:
+        return flags
+
+    # Flop: the preflop aggressor's first decision, then responses to a c-bet
+    aggressor_acted = False
+    for action in hand.actions:
+        if action.street < 1:
+            continue
+        if action.street > 1:
+            break
+        player, code = action.player, action.action
+        if not aggressor_acted:
+            if code == BET and player != aggressor:
+                break  # donk bet: no c-bet in this hand
+            if player == aggressor:
+                aggressor_acted = True
+                flags[player] |= CBET_OPP
+                if code == BET:
+                    flags[player] |= CBET
+                else:
+                    break
+            continue
+        if not flags[player] & FOLD_TO_CBET_OPP:
+            flags[player] |= FOLD_TO_CBET_OPP
+            if code == FOLD:
+                flags[player] |= FOLD_TO_CBET
+        if code == RAISE:
+            break  # later players face a raise, not the c-bet
+    return flags
+
+
+def _day_number(played_at: int) -> int:
+    """Day ordinal of a YYYYMMDDhhmmss timestamp"""
+    stamp = played_at // 10 ** 6
+    return date(stamp // 10 ** 4, stamp // 100 % 100, stamp % 100).toordinal() if stamp else 0
+
+
+def _day_bucket(days: Deque[List[int]], day: int) -> List[int]:
+    """
+    Bucket for day in a deque kept in day order, created if missing
+
+    Hands normally arrive in time order and hit the last bucket; older hands
+    (merged files, out-of-order imports) get theirs inserted by date, so
+    _expire can still evict from the left.
+    """
+    if days and days[-1][0] == day:
+        return days[-1]
+    if not days or days[-1][0] < day:
+        position = len(days)
+    else:
+        position = bisect_left(days, day, key=itemgetter(0))
+    if position < len(days) and days[position][0] == day:
+        return days[position]
+    bucket = [day] + [0] * len(STATS)
+    days.insert(position, bucket)
+    return bucket
+
+
+class _Tracker:
+    __slots__ = ("total", "recent", "ring", "position", "day_total", "days")
+
+    def __init__(self, window_hands: int):
+        size = len(STATS)
+        self.total = [0] * size
+        self.recent = [0] * size
+        self.ring = array("H", [0] * window_hands)
+        self.position = 0
+        self.day_total = [0] * size
+        self.days: Deque[List[int]] = deque()  # [day, count per stat...]
+
+
+class StatsEngine:
+    """
+    Per-player counters maintained incrementally.
+
+    Args:
+        window_hands: Size of the last-N-hands window
+        window_days: Size of the last-N-days window, relative to the newest hand
+            seen; hands may arrive in any date order
+    """
+
+    def __init__(self, window_hands: int = 100, window_days: int = 30):
+        self.window_hands = window_hands
+        self.window_days = window_days
+        self.latest_day = 0
+        self.hands_seen = 0
+        self._players: Dict[str, _Tracker] = {}
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._players
+
+    def update(self, hand: ParsedHand):
+        """Add one hand"""
+        day = _day_number(hand.played_at)
+        if day > self.latest_day:
+            self.latest_day = day
+        self.hands_seen += 1
+
+        for player, mask in zip(hand.players, hand_flags(hand)):
+            tracker = self._players.get(player.name)
+            if tracker is None:
+                tracker = self._players[player.name] = _Tracker(self.window_hands)
+            bits = _BITS[mask]
+            total, recent = tracker.total, tracker.recent
+            for i in bits:
+                total[i] += 1
+                recent[i] += 1
+
+            # Last N hands: drop the mask this slot held N hands ago
+            if self.window_hands:
+                ring = tracker.ring
+                for i in _BITS[ring[tracker.position]]:
+                    recent[i] -= 1
+                ring[tracker.position] = mask
+                tracker.position = (tracker.position + 1) % self.window_hands
+
+            # Last N days: one bucket per day, skipped for hands already outside it
+            if day > self.latest_day - self.window_days:
+                bucket, day_total = _day_bucket(tracker.days, day), tracker.day_total
+                for i in bits:
+                    bucket[i + 1] += 1
+                    day_total[i] += 1
+            self._expire(tracker)
+
+    def update_many(self, hands: Iterable[ParsedHand]):
+        for hand in hands:
+            self.update(hand)
+
+    def _expire(self, tracker: _Tracker):
+        cutoff = self.latest_day - self.window_days
+        days, day_total = tracker.days, tracker.day_total
+        while days and days[0][0] <= cutoff:
+            bucket = days.popleft()
+            for i in range(len(STATS)):
+                day_total[i] -= bucket[i + 1]
+
+    def stats(self, name: str, window: str = "all") -> Optional[PlayerStats]:
+        """
+        Current stats for a player.
+
+        Args:
+            name: Player name
+            window: "all", "hands" (last window_hands hands) or "days" (last window_days days)
+
+        Returns:
+            PlayerStats, or None for an unknown player
+        """
+        tracker = self._players.get(name)
+        if tracker is None:
+            return None
+        if window == "all":
+            counts = tracker.total
+        elif window == "hands":
+            counts = tracker.recent if self.window_hands else tracker.total
+        elif window == "days":
+            self._expire(tracker)
+            counts = tracker.day_total
+        else:
+            raise ValueError(f"Unknown window {window!r}, expected one of {WINDOWS}")
+        return PlayerStats(name, window, dict(zip(STATS, counts)))
+
+    # -----------------------------
+    # Serialization
+    # -----------------------------
+    def save(self, path: Path):
+        """Write every counter as flat arrays to an .npz file"""
+        names = list(self._players)
+        trackers = [self._players[n] for n in names]
+        for tracker in trackers:
+            self._expire(tracker)
+        size = len(STATS)
+        day_lengths = np.array([len(t.days) for t in trackers], dtype=np.int64)
+        buckets = [bucket for t in trackers for bucket in t.days]
+        np.savez(
+            path,
+            config=np.array([self.window_hands, self.window_days, self.latest_day, self.hands_seen],
+                            dtype=np.int64),
+            names=np.array(names, dtype=str),
+            total=np.array([t.total for t in trackers], dtype=np.int64).reshape(-1, size),
+            ring=np.frombuffer(b"".join(t.ring.tobytes() for t in trackers),
+                               dtype=np.uint16).reshape(len(trackers), self.window_hands),
+            position=np.array([t.position for t in trackers], dtype=np.int32),
+            day_offsets=np.concatenate([[0], np.cumsum(day_lengths)]),
+            day_buckets=np.array(buckets, dtype=np.int32).reshape(-1, size + 1),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "StatsEngine":
+        """Rebuild an engine written by save"""
+        with np.load(path) as data:
+            window_hands, window_days, latest_day, hands_seen = data["config"].tolist()
+            engine = cls(window_hands, window_days)
+            engine.latest_day, engine.hands_seen = latest_day, hands_seen
+
+            names = data["names"].tolist()
+            totals = data["total"].tolist()
+            rings = data["ring"]
+            positions = data["position"].tolist()
+            offsets = data["day_offsets"].tolist()
+            buckets = data["day_buckets"]
+
+            # Windowed sums are derived, not stored
+            recent = np.stack([((rings >> i) & 1).sum(axis=1) for i in range(len(STATS))],
+                              axis=1).tolist()
+            running = np.zeros((len(buckets) + 1, len(STATS)), dtype=np.int64)
+            np.cumsum(buckets[:, 1:], axis=0, out=running[1:])
+            day_sums = (running[offsets[1:]] - running[offsets[:-1]]).tolist()
+            buckets = buckets.tolist()
+            ring_bytes = rings.tobytes()
+            row_bytes = rings.shape[1] * rings.itemsize
+
+            for p, name in enumerate(names):
+                tracker = _Tracker(0)
+                tracker.total = totals[p]
+                tracker.recent = recent[p]
+                tracker.ring = array("H", ring_bytes[p * row_bytes:(p + 1) * row_bytes])
+                tracker.position = positions[p]
+                tracker.days = deque(buckets[offsets[p]:offsets[p + 1]])
+                tracker.day_total = day_sums[p]
+                engine._players[name] = tracker
+        return engine
+
+
+if __name__ == "__main__":
+    from hand_history import iter_hands
+
+    if len(sys.argv) < 3:
+        print("Usage: python opponent_stats.py PLAYER HISTORY_FILE [HISTORY_FILE ...]")
+        sys.exit(1)
+    engine = StatsEngine()
+    for history in sys.argv[2:]:
+        engine.update_many(iter_hands(Path(history)))
+    for window in WINDOWS:
+        stats = engine.stats(sys.argv[1], window)
+        if stats is None:
+            print(f"❌ No hands for {sys.argv[1]}")
+            break
+        print(f"📊 {window}: " + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                         for k, v in stats.summary().items()))
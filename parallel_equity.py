@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Process-pool backend for the equity calculators.
+
+Jobs are cut into shards whose boundaries depend only on the job itself, never
+on the number of workers. Every Monte Carlo shard gets its own child seed from
+``np.random.SeedSequence(seed).spawn``, so the same seed gives bit-identical
+results on 1 or 32 workers. Workers write their tallies straight into one row
+of a shared-memory array and the parent reduces the rows in shard order; only
+the small shard descriptions are pickled.
+"""
+
+import os
+import time
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from equity import (
+    CardsLike,
+    EquityResult,
+    _check_cards,
+    _check_villain,
+    _enumerate,
+    _opponent_ids,
+    _simulate,
+    card_ids,
+    villain_combos,
+)
+
+SHARD_RUNOUTS = 262_144
+SHARD_COMBOS = 16
+_ROW = 5  # wins, ties, losses, tie_equity, matchups
+
+
+def _run_shard(task: Tuple) -> int:
+    """Worker entry point: run one shard and store its tallies in shared memory"""
+    shm_name, rows, row, kind, args = task
+    if kind == "monte_carlo":
+        hero, board, opponents, runouts, seed_state = args
+        rng = np.random.default_rng(np.random.SeedSequence(**seed_state))
+        counts, matchups = _simulate(hero, board, opponents, runouts, rng), runouts
+    else:
+        hero, board, combos, weights, dead = args
+        counts, matchups = _enumerate(hero, board, combos, weights, dead)
+
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((rows, _ROW), dtype=np.float64, buffer=shm.buf)
+        out[row, :4] = counts
+        out[row, 4] = matchups
+        del out
+    finally:
+        shm.close()
+    return row
+
+
+def _seed_state(seed_seq: np.random.SeedSequence) -> dict:
+    """Picklable description of a child SeedSequence"""
+    return {"entropy": seed_seq.entropy, "spawn_key": seed_seq.spawn_key,
+            "pool_size": seed_seq.pool_size}
+
+
+class ParallelEquityEngine:
+    """
+    Runs Monte Carlo and exact equity jobs across a process pool.
+
+    Use as a context manager so the pool is started once and reused:
+
+        with ParallelEquityEngine() as engine:
+            result = engine.monte_carlo("AhKh", opponents=3, runouts=10_000_000, seed=7)
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count()
+        self._pool = None
+
+    def __enter__(self) -> "ParallelEquityEngine":
+        if self.workers > 1:
+            self._pool = Pool(self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _run(self, kind: str, shard_args: List[Tuple]) -> np.ndarray:
+        """Run every shard and return the per-shard rows, in shard order"""
+        rows = len(shard_args)
+        shm = SharedMemory(create=True, size=max(1, rows * _ROW * 8))
+        try:
+            out = np.ndarray((rows, _ROW), dtype=np.float64, buffer=shm.buf)
+            out[:] = 0
+            tasks = [(shm.name, rows, row, kind, args) for row, args in enumerate(shard_args)]
+            if self._pool is None:
+                for task in tasks:
+                    _run_shard(task)
+            else:
+                for _ in self._pool.imap_unordered(_run_shard, tasks):
+                    pass
+            result = out.copy()
+            del out
+        finally:
+            shm.close()
+            shm.unlink()
+        return result
+
+    def monte_carlo(self, hero: CardsLike, board: Optional[CardsLike] = None,
+                    opponents: Union[int, Sequence[Optional[CardsLike]]] = 1,
+                    runouts: int = 10_000_000, seed: Optional[int] = None,
+                    shard_runouts: int = SHARD_RUNOUTS) -> EquityResult:
+        """
+        Parallel equity.monte_carlo_equity.
+
+        Results depend on ``seed`` and ``shard_runouts`` only, not on the number
+        of workers (they differ from the single-process function's stream).
+        """
+        hero_ids = card_ids(hero)
+        board_ids = card_ids(board)
+        opponent_ids = _opponent_ids(opponents)
+        _check_cards(hero_ids, board_ids,
+                     hero_ids + board_ids + [c for hand in opponent_ids if hand for c in hand])
+
+        shards = -(-runouts // shard_runouts)
+        seeds = np.random.SeedSequence(seed).spawn(shards)
+        shard_args = []
+        for index, child in enumerate(seeds):
+            size = min(shard_runouts, runouts - index * shard_runouts)
+            shard_args.append((hero_ids, board_ids, opponent_ids, size, _seed_state(child)))
+
+        rows = self._run("monte_carlo", shard_args)
+        return EquityResult.from_counts(rows[:, :4].sum(axis=0), int(rows[:, 4].sum()))
+
+    def exact(self, hero: CardsLike, board: CardsLike,
+              villain: Union[CardsLike, Sequence[CardsLike]],
+              dead: Optional[CardsLike] = None,
+              shard_combos: int = SHARD_COMBOS) -> EquityResult:
+        """Parallel equity.exact_equity, sharded over villain combos"""
+        hero_ids = card_ids(hero)
+        board_ids = card_ids(board)
+        dead_ids = card_ids(dead)
+        _check_cards(hero_ids, board_ids, hero_ids + board_ids + dead_ids)
+        if len(board_ids) < 3:
+            raise ValueError("Exact mode needs at least a flop; use monte_carlo preflop")
+
+        combos, weights = villain_combos(villain)
+        _check_villain(combos, hero_ids + board_ids + dead_ids)
+        shard_args = [
+            (hero_ids, board_ids, combos[start:start + shard_combos],
+             weights[start:start + shard_combos], dead_ids)
+            for start in range(0, len(combos), shard_combos)
+        ]
+        rows = self._run("exact", shard_args)
+        return EquityResult.from_counts(rows[:, :4].sum(axis=0), int(rows[:, 4].sum()))
+
+
+def parallel_monte_carlo_equity(hero: CardsLike, board: Optional[CardsLike] = None,
+                                opponents: Union[int, Sequence[Optional[CardsLike]]] = 1,
+                                runouts: int = 10_000_000, seed: Optional[int] = None,
+                                workers: Optional[int] = None) -> EquityResult:
+    """One-off parallel Monte Carlo run with a temporary pool"""
+    with ParallelEquityEngine(workers) as engine:
+        return engine.monte_carlo(hero, board, opponents, runouts, seed)
+
+
+def parallel_exact_equity(hero: CardsLike, board: CardsLike,
+                          villain: Union[CardsLike, Sequence[CardsLike]],
+                          dead: Optional[CardsLike] = None,
+                          workers: Optional[int] = None) -> EquityResult:
+    """One-off parallel exact run with a temporary pool"""
+    with ParallelEquityEngine(workers) as engine:
+        return engine.exact(hero, board, villain, dead)
+
+
+if __name__ == "__main__":
+    for workers in sorted({1, os.cpu_count()}):
+        with ParallelEquityEngine(workers) as engine:
+            start = time.perf_counter()
+            result = engine.monte_carlo("AhKh", opponents=3, runouts=4_000_000, seed=7)
+            elapsed = time.perf_counter() - start
+        print(f"{workers:>2} workers: equity {result.equity:.6f} "
+              f"({result.runouts / elapsed:,.0f} runouts/s)")
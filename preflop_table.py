@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Exact heads-up preflop equities for all 169x169 starting-hand classes.
+
+``python preflop_table.py`` enumerates every five card board for every class
+matchup on all cores and writes ``preflop_equity.bin``. Lookups memory-map that
+file, so loading takes milliseconds and each query is a single array index.
+
+Within a class every combo is equivalent up to a swap of suits, so a worker
+fixes one hero combo per class, evaluates it once on all 2,598,960 boards, and
+only evaluates the villain combos that are distinct given that hero combo.
+"""
+
+import mmap
+import os
+import struct
+import time
+from itertools import combinations, permutations
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import hand_evaluator
+from ranges import (CLASS_INDEX, CLASS_NAMES, CLASS_SIZES, NUM_CLASSES, class_combos,
+                    class_weights)
+
+TABLE_FILE = Path(__file__).with_name("preflop_equity.bin")
+TABLE_MAGIC = b"PKPREFLP"
+TABLE_VERSION = 1
+
+_HEADER = struct.Struct("<8sII")
+
+ClassLike = Union[int, str]
+
+
+# -----------------------------
+# Generation
+# -----------------------------
+_BOARDS: Dict[str, np.ndarray] = {}
+
+
+def _init_boards():
+    """Precompute keys for every five card board (once per worker process)"""
+    boards = np.fromiter((c for board in combinations(range(52), 5) for c in board),
+                         dtype=np.int8).reshape(-1, 5)
+    _BOARDS["keys"], _BOARDS["bits"] = hand_evaluator.hand_keys(boards)
+    _BOARDS["masks"] = (np.int64(1) << boards.astype(np.int64)).sum(axis=1)
+
+
+def _villain_representatives(hero: Tuple[int, int], villain_class: int) -> List[Tuple[Tuple[int, int], int]]:
+    """Villain combos that are distinct given the fixed hero combo, with multiplicities"""
+    stabilizer = []
+    for perm in permutations(range(4)):
+        moved = sorted(c // 4 * 4 + perm[c % 4] for c in hero)
+        if moved == sorted(hero):
+            stabilizer.append(perm)
+
+    groups: Dict[Tuple[int, int], List] = {}
+    for combo in class_combos(villain_class):
+        if set(combo) & set(hero):
+            continue
+        key = min(tuple(sorted((c // 4 * 4 + perm[c % 4] for c in combo), reverse=True))
+                  for perm in stabilizer)
+        groups.setdefault(key, [combo, 0])[1] += 1
+    return [(tuple(combo), count) for combo, count in groups.values()]
+
+
+def _class_row(hero_class: int) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    """Win/tie shares and combo counts of one hero class against classes >= it"""
+    hero = class_combos(hero_class)[0]
+    free = np.flatnonzero((_BOARDS["masks"] & ((1 << hero[0]) | (1 << hero[1]))) == 0)
+    keys, bits, masks = _BOARDS["keys"][free], _BOARDS["bits"][free], _BOARDS["masks"][free]
+    hero_key, hero_bits = hand_evaluator.hand_keys(np.array(hero, dtype=np.int8))
+    hero_values = hand_evaluator.evaluate_keys(keys + hero_key, bits + hero_bits)
+
+    wins = np.zeros(NUM_CLASSES)
+    ties = np.zeros(NUM_CLASSES)
+    combos = np.zeros(NUM_CLASSES, dtype=np.int64)
+    for villain_class in range(hero_class, NUM_CLASSES):
+        won = tied = boards = 0
+        for villain, count in _villain_representatives(hero, villain_class):
+            v_key, v_bits = hand_evaluator.hand_keys(np.array(villain, dtype=np.int8))
+            valid = np.flatnonzero((masks & ((1 << villain[0]) | (1 << villain[1]))) == 0)
+            villain_values = hand_evaluator.evaluate_keys(keys[valid] + v_key, bits[valid] + v_bits)
+            won += count * np.count_nonzero(hero_values[valid] > villain_values)
+            tied += count * np.count_nonzero(hero_values[valid] == villain_values)
+            boards += count * valid.size
+            combos[villain_class] += count
+        if boards:
+            wins[villain_class] = won / boards
+            ties[villain_class] = tied / boards
+    return hero_class, wins, ties, combos
+
+
+def generate_table(path: Path = TABLE_FILE, workers: Optional[int] = None,
+                   classes: Optional[List[int]] = None) -> Path:
+    """
+    Compute the full table on a process pool and write it to ``path``.
+
+    Args:
+        path: Output file
+        workers: Worker processes (defaults to all cores)
+        classes: Restrict the hero classes (for quick partial runs)
+
+    Returns:
+        Path of the written table
+    """
+    classes = list(range(NUM_CLASSES)) if classes is None else classes
+    win = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    tie = np.zeros((NUM_CLASSES, NUM_CLASSES))
+    combos = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.int64)
+
+    start = time.perf_counter()
+    with Pool(workers or os.cpu_count(), initializer=_init_boards) as pool:
+        for done, (i, wins, ties, counts) in enumerate(pool.imap_unordered(_class_row, classes), 1):
+            win[i, i:], tie[i, i:], combos[i, i:] = wins[i:], ties[i:], counts[i:]
+            print(f"  {CLASS_NAMES[i]:>4} done ({done}/{len(classes)}, "
+                  f"{time.perf_counter() - start:.0f}s)")
+
+    # Villain counts per hero combo become combo-pair counts, then the lower
+    # triangle follows from the hero/villain symmetry
+    combos *= CLASS_SIZES[:, None]
+    lower = np.tril_indices(NUM_CLASSES, -1)
+    win[lower] = (1 - win.T - tie.T)[lower]
+    tie[lower] = tie.T[lower]
+    combos[lower] = combos.T[lower]
+    write_table(path, win, tie, combos)
+    return path
+
+
+def write_table(path: Path, win: np.ndarray, tie: np.ndarray, combos: np.ndarray):
+    """Write the versioned binary table atomically"""
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, NUM_CLASSES))
+        f.write(b"\0" * (64 - _HEADER.size))
+        f.write(np.ascontiguousarray(win, dtype=np.float64).tobytes())
+        f.write(np.ascontiguousarray(tie, dtype=np.float64).tobytes())
+        f.write(np.ascontiguousarray(combos, dtype=np.float64).tobytes())
+    os.replace(tmp_path, path)
+
+
+# -----------------------------
+# Lookup
+# -----------------------------
+class PreflopTable:
+    """
+    Memory-mapped 169x169 equity table.
+
+    ``win[i, j]`` and ``tie[i, j]`` are the shares for class i against class j and
+    ``combos[i, j]`` counts the non-conflicting combo pairs behind them.
+    """
+
+    def __init__(self, path: Path = TABLE_FILE):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size = _HEADER.unpack_from(self._mmap)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or size != NUM_CLASSES:
+            raise ValueError(f"{path} is not a version {TABLE_VERSION} preflop table")
+
+        cells = NUM_CLASSES * NUM_CLASSES
+        shape = (NUM_CLASSES, NUM_CLASSES)
+        self.win = np.frombuffer(self._mmap, np.float64, cells, 64).reshape(shape)
+        self.tie = np.frombuffer(self._mmap, np.float64, cells, 64 + 8 * cells).reshape(shape)
+        self.combos = np.frombuffer(self._mmap, np.float64, cells, 64 + 16 * cells).reshape(shape)
+        self.equity_matrix = self.win + self.tie / 2
+
+    @staticmethod
+    def _index(hand: ClassLike) -> int:
+        if isinstance(hand, int):
+            return hand
+        try:
+            return CLASS_INDEX[hand]
+        except KeyError:
+            raise ValueError(f"Unknown hand class: {hand!r}") from None
+
+    def equity(self, hero: ClassLike, villain: ClassLike) -> float:
+        """Hero's equity for two class names ("AKs", "QQ") or class indices"""
+        return float(self.equity_matrix[self._index(hero), self._index(villain)])
+
+    def range_equity(self, hero: Union[str, np.ndarray], villain: Union[str, np.ndarray]) -> float:
+        """
+        Range-vs-range equity as a combo-weighted reduction over the table.
+
+        Args:
+            hero: Range string ("QQ+,AKs") or a 169-class weight vector
+            villain: Range string or a 169-class weight vector
+        """
+        hero_w = class_weights(hero) if isinstance(hero, str) else np.asarray(hero, dtype=float)
+        villain_w = class_weights(villain) if isinstance(villain, str) else np.asarray(villain, dtype=float)
+        pair_weights = hero_w[:, None] * villain_w[None, :] * self.combos
+        total = pair_weights.sum()
+        if total == 0:
+            raise ValueError("Ranges have no non-conflicting combos")
+        return float((pair_weights * self.equity_matrix).sum() / total)
+
+
+_TABLE: Optional[PreflopTable] = None
+
+
+def load_table(path: Path = TABLE_FILE) -> PreflopTable:
+    """Return the shared PreflopTable, mapping the file on first use"""
+    global _TABLE
+    if _TABLE is None:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"{path} not found. Generate it with: python preflop_table.py")
+        _TABLE = PreflopTable(path)
+    return _TABLE
+
+
+if __name__ == "__main__":
+    print(f"Generating {TABLE_FILE} on {os.cpu_count()} cores...")
+    start = time.perf_counter()
+    generate_table(TABLE_FILE)
+    print(f"✅ Wrote {TABLE_FILE} in {time.perf_counter() - start:.0f}s")
@@ -0,0 +1,145 @@
+"""
+Starting-hand classes and hand ranges.
+
+The 169 preflop classes are laid out on the usual 13x13 grid with aces first:
+pairs on the diagonal, suited hands above it and offsuit hands below it, so
+class index ``row * 13 + col`` maps "AKs" to 1 and "AKo" to 13.
+
+Ranges use the common shorthand: "QQ+", "ATs+", "KQo", "A2s-A5s", "22-66",
+explicit combos like "AhKd" and optional weights such as "AKo:0.5".
+"""
+
+from itertools import combinations
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from hand_evaluator import RANKS, card_from_string
+
+GRID = RANKS[::-1]  # "AKQJT98765432"
+NUM_CLASSES = 169
+
+
+def class_index(card1: int, card2: int) -> int:
+    """Grid index (0-168) of the class a two-card hand belongs to"""
+    high, low = (card1, card2) if card1 // 4 >= card2 // 4 else (card2, card1)
+    row, col = 12 - high // 4, 12 - low // 4
+    if high % 4 == low % 4:
+        return row * 13 + col
+    return col * 13 + row
+
+
+def class_name(index: int) -> str:
+    """Name like "AKs", "AKo" or "TT" for a class index"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return GRID[row] * 2
+    if row < col:
+        return GRID[row] + GRID[col] + "s"
+    return GRID[col] + GRID[row] + "o"
+
+
+def class_combos(index: int) -> List[Tuple[int, int]]:
+    """All specific two-card combos (higher card id first) in a class"""
+    row, col = divmod(index, 13)
+    high, low = 12 - min(row, col), 12 - max(row, col)
+    combos = []
+    for s1 in range(4):
+        for s2 in range(4):
+            if row == col and s2 <= s1:
+                continue
+            if row < col and s1 != s2:  # suited
+                continue
+            if row > col and s1 == s2:  # offsuit
+                continue
+            a, b = high * 4 + s1, low * 4 + s2
+            combos.append((max(a, b), min(a, b)))
+    return combos
+
+
+CLASS_NAMES = [class_name(i) for i in range(NUM_CLASSES)]
+CLASS_SIZES = np.array([len(class_combos(i)) for i in range(NUM_CLASSES)])
+CLASS_INDEX = {name: i for i, name in enumerate(CLASS_NAMES)}
+
+# Every combo in the deck with its class, in a fixed order
+ALL_COMBOS = np.array([(b, a) for a, b in combinations(range(52), 2)], dtype=np.int8)
+COMBO_CLASS = np.array([class_index(int(a), int(b)) for a, b in ALL_COMBOS], dtype=np.int16)
+
+
+def _class_token(token: str) -> List[int]:
+    """Class indices for "AA", "AKs", "AKo" or "AK" (both)"""
+    if len(token) == 2 and token[0] != token[1]:
+        return [CLASS_INDEX[token + "s"], CLASS_INDEX[token + "o"]]
+    if token not in CLASS_INDEX:
+        # Accept "KAs" style ordering
+        token = token[1] + token[0] + token[2:]
+    return [CLASS_INDEX[token]]
+
+
+def _expand(token: str) -> List[str]:
+    """Expand "QQ+", "ATs+", "22-55" and "A2s-A5s" into plain class tokens"""
+    if token.endswith("+"):
+        base = token[:-1]
+        first, second, suffix = base[0], base[1], base[2:]
+        if first == second:
+            return [r * 2 for r in GRID[:GRID.index(first) + 1]]
+        kickers = GRID[GRID.index(first) + 1:GRID.index(second) + 1]
+        return [first + k + suffix for k in kickers]
+    if "-" in token:
+        start, end = token.split("-")
+        if start[0] == start[1]:
+            lo, hi = sorted((GRID.index(start[0]), GRID.index(end[0])))
+            return [r * 2 for r in GRID[lo:hi + 1]]
+        lo, hi = sorted((GRID.index(start[1]), GRID.index(end[1])))
+        return [start[0] + k + start[2:] for k in GRID[lo:hi + 1]]
+    return [token]
+
+
+def _add_token(raw: str, weights: Dict[Tuple[int, int], float]):
+    """Set the weight of every combo in one "token[:weight]" range entry"""
+    token, _, weight = raw.partition(":")
+    weight = float(weight) if weight else 1.0
+    if len(token) == 4 and token[1].lower() in "hdcs" and token[3].lower() in "hdcs":
+        a, b = card_from_string(token[:2]), card_from_string(token[2:])
+        weights[(max(a, b), min(a, b))] = weight
+        return
+    for name in _expand(token):
+        for index in _class_token(name):
+            for combo in class_combos(index):
+                weights[combo] = weight
+
+
+def parse_range(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse a range string into specific combos.
+
+    Args:
+        text: Comma separated range, e.g. "QQ+, AKs, AQo:0.5, 7h6h"
+
+    Returns:
+        Tuple of (combos, weights): an (n, 2) int8 array with the higher card
+        id first and an (n,) float array of weights
+
+    Raises:
+        ValueError: If a token is not a valid hand, class or range
+    """
+    weights: Dict[Tuple[int, int], float] = {}
+    for raw in text.replace(" ", "").split(","):
+        if not raw:
+            continue
+        try:
+            _add_token(raw, weights)
+        except (KeyError, IndexError, ValueError):
+            raise ValueError(f"Invalid range token: {raw!r}") from None
+
+    weights = {combo: w for combo, w in weights.items() if w > 0}
+    combos = np.array(list(weights), dtype=np.int8).reshape(-1, 2)
+    return combos, np.array(list(weights.values()), dtype=np.float64)
+
+
+def class_weights(text: str) -> np.ndarray:
+    """169-class weight vector for a range (fraction of each class included)"""
+    combos, weights = parse_range(text)
+    totals = np.zeros(NUM_CLASSES)
+    np.add.at(totals, [class_index(int(a), int(b)) for a, b in combos], weights)
+    return totals / CLASS_SIZES
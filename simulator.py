@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+No-limit hold'em table engine that plays thousands of tables at once.
+
+Seats are described by utils.Player (name and starting chips) and every seat
+has a strategy callable. All table state lives in struct-of-arrays form with a
+leading table axis, so each step asks a seat's strategy for the decisions of
+every table where that seat is to act, in a single call.
+
+A strategy receives a Decision and returns ``(actions, amounts)``: one of
+FOLD, CALL (check/call) or RAISE per table, and for raises the total street
+bet to raise to. Illegal choices are corrected the way a dealer would: folding
+when nothing is owed becomes a check, raises are clamped to the legal range, and
+a raise without chips behind the call, or by a seat whose action was not
+reopened by a full raise, becomes a call.
+
+Stacks are reset to each Player's chips at the start of every hand, so results
+measure winnings per hand rather than a single freezeout.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import hand_evaluator
+from utils import Player
+
+FOLD, CALL, RAISE = 0, 1, 2
+PREFLOP, FLOP, TURN, RIVER, SHOWDOWN = range(5)
+_BOARD_CARDS = [0, 3, 4, 5]
+
+
+@dataclass
+class Decision:
+    """Everything a strategy sees for the tables where its seat is to act"""
+    seat: int
+    tables: np.ndarray       # table indices
+    hole: np.ndarray         # (n, 2) hole cards
+    board: np.ndarray        # (n, 5) board cards, -1 where not dealt yet
+    street: np.ndarray       # PREFLOP..RIVER
+    pot: np.ndarray          # chips committed by everyone so far
+    to_call: np.ndarray
+    min_raise: np.ndarray    # smallest legal raise-to amount
+    max_raise: np.ndarray    # raise-to amount that puts the seat all in
+    stack: np.ndarray
+    players_in: np.ndarray   # players who have not folded
+    aggressor: np.ndarray    # last seat to bet or raise this hand (-1 if none)
+    big_blind: int
+
+    def hand_values(self) -> np.ndarray:
+        """Current made-hand value (0 preflop) for every table in the decision"""
+        values = np.zeros(len(self.tables), dtype=np.int64)
+        for street in (FLOP, TURN, RIVER):
+            rows = np.flatnonzero(self.street == street)
+            if rows.size:
+                cards = np.concatenate([self.hole[rows], self.board[rows, :_BOARD_CARDS[street]]], axis=1)
+                values[rows] = hand_evaluator.evaluate_batch(cards)
+        return values
+
+
+Strategy = Callable[[Decision], Tuple[np.ndarray, np.ndarray]]
+
+
+@dataclass
+class SimulationResult:
+    """Net chips won per seat over all simulated hands"""
+    names: List[str]
+    hands: int
+    net_chips: np.ndarray
+    big_blind: int
+    showdowns: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def bb_per_100(self) -> Dict[str, float]:
+        return {name: float(chips) / self.big_blind / self.hands * 100
+                for name, chips in zip(self.names, self.net_chips)}
+
+    @property
+    def hands_per_hour(self) -> float:
+        return self.hands / self.elapsed * 3600 if self.elapsed else 0.0
+
+
+# -----------------------------
+# Baseline strategies
+# -----------------------------
+def check_call_strategy(decision: Decision) -> Tuple[np.ndarray, np.ndarray]:
+    """Never folds, never raises"""
+    n = len(decision.tables)
+    return np.full(n, CALL), np.zeros(n, dtype=np.int64)
+
+
+def random_strategy(seed: Optional[int] = None, fold: float = 0.2, raise_: float = 0.2) -> Strategy:
+    """Folds, calls or pot-raises at random with the given frequencies"""
+    rng = np.random.default_rng(seed)
+
+    def strategy(decision: Decision) -> Tuple[np.ndarray, np.ndarray]:
+        roll = rng.random(len(decision.tables))
+        actions = np.where(roll < fold, FOLD, np.where(roll < fold + raise_, RAISE, CALL))
+        # Pot-sized raise: call first, then raise by the pot after the call
+        street_bet = decision.max_raise - decision.stack
+        return actions, street_bet + 2 * decision.to_call + decision.pot
+    return strategy
+
+
+def cbet_strategy(fraction: float, multiway_fraction: Optional[float] = None) -> Strategy:
+    """
+    Preflop raiser continuation-bets the flop at a fraction of the pot.
+
+    ``multiway_fraction`` sets a different size when three or more players see
+    the flop (e.g. small c-bets into multiway pots). Other decisions check/call.
+    """
+    def strategy(decision: Decision) -> Tuple[np.ndarray, np.ndarray]:
+        n = len(decision.tables)
+        actions = np.full(n, CALL)
+        sizes = np.where(decision.players_in >= 3,
+                         multiway_fraction if multiway_fraction is not None else fraction, fraction)
+        amounts = (sizes * decision.pot).astype(np.int64)
+        preflop_open = (decision.street == PREFLOP) & (decision.aggressor < 0)
+        cbet = ((decision.street == FLOP) & (decision.to_call == 0)
+                & (decision.aggressor == decision.seat))
+        actions[preflop_open | cbet] = RAISE
+        amounts[preflop_open] = 3 * decision.big_blind
+        return actions, amounts
+    return strategy
+
+
+# -----------------------------
+# Table engine
+# -----------------------------
+@dataclass
+class TableBatch:
+    """Struct-of-arrays state for ``n`` tables with ``seats`` seats each"""
+    n: int
+    seats: int
+    stacks: np.ndarray = field(init=False)
+    bets: np.ndarray = field(init=False)        # chips in front this street
+    committed: np.ndarray = field(init=False)   # chips put in this hand
+    folded: np.ndarray = field(init=False)
+    acted: np.ndarray = field(init=False)       # acted since the last full raise
+    cards: np.ndarray = field(init=False)       # shuffled decks: holes, then board
+    button: np.ndarray = field(init=False)
+    street: np.ndarray = field(init=False)
+    to_act: np.ndarray = field(init=False)
+    current_bet: np.ndarray = field(init=False)
+    last_raise: np.ndarray = field(init=False)
+    aggressor: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        shape = (self.n, self.seats)
+        self.stacks = np.zeros(shape, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        self.committed = np.zeros(shape, dtype=np.int64)
+        self.folded = np.zeros(shape, dtype=bool)
+        self.acted = np.zeros(shape, dtype=bool)
+        self.cards = np.zeros((self.n, 52), dtype=np.int8)
+        self.button = np.zeros(self.n, dtype=np.int64)
+        self.street = np.zeros(self.n, dtype=np.int64)
+        self.to_act = np.zeros(self.n, dtype=np.int64)
+        self.current_bet = np.zeros(self.n, dtype=np.int64)
+        self.last_raise = np.zeros(self.n, dtype=np.int64)
+        self.aggressor = np.full(self.n, -1, dtype=np.int64)
+
+    @property
+    def can_act(self) -> np.ndarray:
+        return ~self.folded & (self.stacks > 0)
+
+    def pending(self, rows: np.ndarray) -> np.ndarray:
+        """Seats that can act and have not acted since the last raise or owe chips"""
+        owed = self.bets[rows] < self.current_bet[rows][:, None]
+        return self.can_act[rows] & (~self.acted[rows] | owed)
+
+    def hole(self, rows: np.ndarray, seat: int) -> np.ndarray:
+        return self.cards[rows, 2 * seat:2 * seat + 2]
+
+    def board(self, rows: np.ndarray) -> np.ndarray:
+        start = 2 * self.seats
+        board = self.cards[rows, start:start + 5].copy()
+        visible = np.array(_BOARD_CARDS + [5])[np.minimum(self.street[rows], SHOWDOWN)]
+        board[np.arange(5)[None, :] >= visible[:, None]] = -1
+        return board
+
+
+class HandSimulator:
+    """
+    Plays hands of no-limit hold'em on many tables in lockstep.
+
+    Args:
+        players: Seats in order; each Player's chips is the starting stack
+        strategies: One strategy callable per seat
+        small_blind: Small blind in chips
+        big_blind: Big blind in chips
+        tables: Tables stepped together per batch
+        seed: Seed for reproducible deals
+    """
+
+    def __init__(self, players: Sequence[Player], strategies: Sequence[Strategy],
+                 small_blind: int = 1, big_blind: int = 2, tables: int = 4096,
+                 seed: Optional[int] = None):
+        if not 2 <= len(players) <= 10:
+            raise ValueError(f"Need 2 to 10 players, got {len(players)}")
+        if len(strategies) != len(players):
+            raise ValueError("Need exactly one strategy per player")
+        self.players = list(players)
+        self.strategies = list(strategies)
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.tables = tables
+        self.rng = np.random.default_rng(seed)
+
+    def run(self, hands: int) -> SimulationResult:
+        """Simulate exactly ``hands`` hands in batches of up to ``tables`` tables"""
+        seats = len(self.players)
+        net = np.zeros(seats, dtype=np.int64)
+        played = showdowns = 0
+        start = time.perf_counter()
+        batch = 0
+        while played < hands:
+            size = min(self.tables, hands - played)
+            state = self._deal(size, batch)
+            self._play(state)
+            batch_net, batch_showdowns = self._settle(state)
+            net += batch_net
+            showdowns += batch_showdowns
+            played += size
+            batch += 1
+        return SimulationResult(
+            names=[p.name for p in self.players],
+            hands=played,
+            net_chips=net,
+            big_blind=self.big_blind,
+            showdowns=showdowns,
+            elapsed=time.perf_counter() - start,
+        )
+
+    # -- setup -------------------------------------------------------------
+    def _deal(self, n: int, batch: int) -> TableBatch:
+        seats = len(self.players)
+        state = TableBatch(n, seats)
+        state.stacks[:] = [p.chips for p in self.players]
+
+        # Partial Fisher-Yates over every deck at once
+        state.cards[:] = np.arange(52, dtype=np.int8)
+        rows = np.arange(n)
+        for j in range(2 * seats + 5):
+            swap = j + self.rng.integers(0, 52 - j, size=n)
+            top = state.cards[:, j].copy()
+            state.cards[:, j] = state.cards[rows, swap]
+            state.cards[rows, swap] = top
+
+        # Rotate the button across tables and batches so every seat plays every position
+        state.button[:] = (rows + batch) % seats
+        if seats == 2:
+            sb, bb = state.button, (state.button + 1) % seats
+        else:
+            sb, bb = (state.button + 1) % seats, (state.button + 2) % seats
+        self._post(state, rows, sb, self.small_blind)
+        self._post(state, rows, bb, self.big_blind)
+        state.current_bet[:] = state.bets.max(axis=1)
+        state.last_raise[:] = self.big_blind
+        state.street[:] = PREFLOP
+        state.to_act[:] = self._next_seat(state, rows, bb)
+        return state
+
+    @staticmethod
+    def _post(state: TableBatch, rows: np.ndarray, seats: np.ndarray, amount: int):
+        paid = np.minimum(state.stacks[rows, seats], amount)
+        state.stacks[rows, seats] -= paid
+        state.bets[rows, seats] += paid
+        state.committed[rows, seats] += paid
+
+    @staticmethod
+    def _next_seat(state: TableBatch, rows: np.ndarray, after: np.ndarray) -> np.ndarray:
+        """First seat after ``after`` that still has to act (``after`` itself if none)"""
+        result = np.asarray(after).copy()
+        found = np.zeros(len(rows), dtype=bool)
+        pending = state.pending(rows)
+        index = np.arange(len(rows))
+        for offset in range(1, state.seats + 1):
+            seat = (after + offset) % state.seats
+            hit = ~found & pending[index, seat]
+            result[hit] = seat[hit]
+            found |= hit
+        return result
+
+    # -- betting -----------------------------------------------------------
+    def _play(self, state: TableBatch):
+        live = np.ones(state.n, dtype=bool)
+        while True:
+            self._advance_finished_rounds(state, live)
+            rows_live = np.flatnonzero(live)
+            if rows_live.size == 0:
+                return
+            for seat, strategy in enumerate(self.strategies):
+                rows = rows_live[state.to_act[rows_live] == seat]
+                if rows.size:
+                    decision = self._decision(state, rows, seat)
+                    actions, amounts = strategy(decision)
+                    self._apply(state, rows, seat, np.asarray(actions), np.asarray(amounts, dtype=np.int64))
+            state.to_act[rows_live] = self._next_seat(state, rows_live, state.to_act[rows_live])
+
+    def _decision(self, state: TableBatch, rows: np.ndarray, seat: int) -> Decision:
+        to_call = state.current_bet[rows] - state.bets[rows, seat]
+        stack = state.stacks[rows, seat]
+        return Decision(
+            seat=seat,
+            tables=rows,
+            hole=state.hole(rows, seat),
+            board=state.board(rows),
+            street=state.street[rows],
+            pot=state.committed[rows].sum(axis=1),
+            to_call=np.minimum(to_call, stack),
+            min_raise=state.current_bet[rows] + state.last_raise[rows],
+            max_raise=state.bets[rows, seat] + stack,
+            stack=stack,
+            players_in=(~state.folded[rows]).sum(axis=1),
+            aggressor=state.aggressor[rows],
+            big_blind=self.big_blind,
+        )
+
+    @staticmethod
+    def _apply(state: TableBatch, rows: np.ndarray, seat: int, actions: np.ndarray, amounts: np.ndarray):
+        bets = state.bets[rows, seat]
+        stack = state.stacks[rows, seat]
+        current = state.current_bet[rows]
+        to_call = current - bets
+
+        actions = np.where((actions == FOLD) & (to_call <= 0), CALL, actions)
+        actions = np.where((actions == RAISE) & (stack <= to_call), CALL, actions)
+        # Only a full raise reopens the betting: a seat that has acted since the
+        # last one (e.g. facing a short all-in) may just call or fold
+        actions = np.where((actions == RAISE) & state.acted[rows, seat], CALL, actions)
+
+        state.folded[rows[actions == FOLD], seat] = True
+        target = np.where(actions == CALL, np.minimum(current, bets + stack), bets)
+        raising = actions == RAISE
+        if raising.any():
+            max_to = bets + stack
+            min_to = np.minimum(current + state.last_raise[rows], max_to)
+            target[raising] = np.clip(amounts[raising], min_to[raising], max_to[raising])
+            raise_size = target - current
+            full = raising & (raise_size >= state.last_raise[rows])
+            state.last_raise[rows[full]] = raise_size[full]
+            state.acted[rows[full]] = False
+            state.current_bet[rows[raising]] = np.maximum(current[raising], target[raising])
+            state.aggressor[rows[raising]] = seat
+
+        paid = target - bets
+        state.stacks[rows, seat] -= paid
+        state.bets[rows, seat] = target
+        state.committed[rows, seat] += paid
+        state.acted[rows, seat] = True
+
+    def _advance_finished_rounds(self, state: TableBatch, live: np.ndarray):
+        """Close betting rounds, deal streets and retire finished hands"""
+        while True:
+            rows = np.flatnonzero(live)
+            if rows.size == 0:
+                return
+            can_act = state.can_act[rows]
+            players_in = (~state.folded[rows]).sum(axis=1)
+            owed = state.bets[rows] < state.current_bet[rows][:, None]
+            # Done when nobody has to act, or when a single player could act but
+            # owes nothing because everyone else is all in
+            lone = (can_act.sum(axis=1) <= 1) & ~(can_act & owed).any(axis=1)
+            round_done = ~state.pending(rows).any(axis=1) | lone
+
+            hand_over = (players_in <= 1) | (round_done & (state.street[rows] == RIVER))
+            live[rows[hand_over]] = False
+            state.street[rows[hand_over & (players_in > 1)]] = SHOWDOWN
+
+            advance = rows[round_done & ~hand_over]
+            if advance.size == 0:
+                return
+            state.street[advance] += 1
+            state.bets[advance] = 0
+            state.current_bet[advance] = 0
+            state.last_raise[advance] = self.big_blind
+            state.acted[advance] = False
+            state.to_act[advance] = self._next_seat(state, advance, state.button[advance])
+
+    # -- showdown ----------------------------------------------------------
+    def _settle(self, state: TableBatch) -> Tuple[np.ndarray, int]:
+        """Split main and side pots; returns net chips per seat and showdown count"""
+        n, seats = state.n, state.seats
+        alive = ~state.folded
+        contested = alive.sum(axis=1) > 1
+
+        values = np.zeros((n, seats), dtype=np.int64)
+        rows = np.flatnonzero(contested)
+        if rows.size:
+            board = state.cards[rows, 2 * seats:2 * seats + 5]
+            for seat in range(seats):
+                cards = np.concatenate([state.hole(rows, seat), board], axis=1)
+                values[rows, seat] = hand_evaluator.evaluate_batch(cards)
+        values[~alive] = -1
+
+        contrib = state.committed
+        winnings = np.zeros((n, seats), dtype=np.int64)
+        levels = np.sort(contrib, axis=1)
+        previous = np.zeros(n, dtype=np.int64)
+        table_rows = np.arange(n)
+        for k in range(seats):
+            level = levels[:, k]
+            in_layer = contrib >= level[:, None]
+            amount = (level - previous) * in_layer.sum(axis=1)
+            eligible = in_layer & alive
+            best = np.where(eligible, values, -2).max(axis=1)
+            winners = eligible & (values == best[:, None])
+            # Nobody left to contest this layer: return it to whoever put it in
+            winners = np.where(eligible.any(axis=1)[:, None], winners, in_layer)
+            count = np.maximum(winners.sum(axis=1), 1)
+            share = amount // count
+            winnings += winners * share[:, None]
+            winnings[table_rows, np.argmax(winners, axis=1)] += amount - share * count
+            previous = level
+
+        net = winnings - contrib
+        return net.sum(axis=0), int(contested.sum())
+
+
+if __name__ == "__main__":
+    players = [Player(f"Seat {i + 1}", 200) for i in range(6)]
+    strategies = [cbet_strategy(0.33), cbet_strategy(0.75)] + [check_call_strategy] * 4
+    simulator = HandSimulator(players, strategies, tables=8192, seed=1)
+    result = simulator.run(100_000)
+    print(f"Simulated {result.hands:,} hands ({result.hands_per_hour:,.0f} hands/hour)")
+    for name, bb100 in result.bb_per_100.items():
+        print(f"  {name}: {bb100:+.1f} bb/100")
@@ -6,26 +6,33 @@ PROVIDER_CONFIGS = {
     "openai": ModelConfig(
         model="gpt-4o-mini",  # or "gpt-4", "gpt-3.5-turbo"
         api_key=os.getenv("OPENAI_API_KEY"),
-        max_tokens=6000  # Safe limit for GPT-4o Mini (8192 max)
+        max_tokens=6000,  # Safe limit for GPT-4o Mini (8192 max)
+        requests_per_minute=500,  # Tier 1 limits
+        tokens_per_minute=200_000
     ),
     
     "claude-3": ModelConfig(
         #model="claude-3-sonnet-20240229",  # or "claude-3-opus-20240229"
         model="claude-3-haiku-20240307",
         api_key=os.getenv("ANTHROPIC_API_KEY"),
-        max_tokens=3000  # Safe limit for Claude Haiku (4096 max
+        max_tokens=3000,  # Safe limit for Claude Haiku (4096 max
+        requests_per_minute=50,  # Tier 1 limits
+        tokens_per_minute=50_000
     ),
 
     "claude-4": ModelConfig(
         model="claude-sonnet-4-20250514",  # or "claude-4-100k
         api_key=os.getenv("ANTHROPIC_API_KEY"),
-        max_tokens=8000  # Safe limit for Claude 4 (128k max)
+        max_tokens=8000,  # Safe limit for Claude 4 (128k max)
+        requests_per_minute=50,  # Tier 1 limits
+        tokens_per_minute=30_000
     ),
     
     "gemini": ModelConfig(
         model="gemini-pro",
         api_key=os.getenv("GOOGLE_API_KEY"),
-        max_tokens=6000  # Safe limit for Gemini Pro (8192 max)
+        max_tokens=6000,  # Safe limit for Gemini Pro (8192 max)
+        requests_per_minute=60
     ),
     
     "ollama": ModelConfig(
@@ -38,7 +45,9 @@ PROVIDER_CONFIGS = {
         model="azure/gpt-4",
         api_key=os.getenv("AZURE_API_KEY"),
         api_base=os.getenv("AZURE_API_BASE"),
-        max_tokens=6000  # Adjust based on your Azure model capabilities
+        max_tokens=6000,  # Adjust based on your Azure model capabilities
+        requests_per_minute=None,  # Set to your deployment's quota
+        tokens_per_minute=None
     )
 }
 
@@ -9,4 +9,13 @@ class ModelConfig:
     api_base: Optional[str] = None
     temperature: float = 0.3
     max_tokens: int = 3000  # Safe for most models including Claude Haiku (4096 max)
-    timeout: int = 60
\ No newline at end of file
+    timeout: int = 60
+    context_window: Optional[int] = None  # input tokens the model accepts; None asks LiteLLM
+    chunk_tokens: Optional[int] = None  # transcript tokens per chunk; None derives it from max_tokens
+    max_retries: int = 5
+    requests_per_minute: Optional[int] = None  # provider limits; None means unlimited
+    tokens_per_minute: Optional[int] = None
+    use_cache: bool = True  # answer repeated prompts from the on-disk response cache
+    structured_output: bool = True  # JSON schema / tool-call output where the provider supports it
+    prompt_caching: bool = True  # mark static prompt prefixes for provider prompt caching
+    stream: bool = False  # stream completions so agents persist items as they arrive
@@ -1,11 +1,19 @@
 import os
 import asyncio
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from src.models.config import ModelConfig
 from src.utils.llm_client import LLMClient
-from src.utils.file_utils import ensure_directory_exists, initialize_json_file, load_json
+from src.utils.batch import DEFAULT_POLL_SECONDS, BatchBackend, BatchJobs, get_batch_backend
+from src.utils.file_utils import ensure_directory_exists
+from src.utils.manifest import RunManifest, content_hash
+from src.utils.parse_stats import ParseStats
+from src.utils.repository import PokerRepository
 from src.processing_agents import ChunkingAgent, QuestionAgent, RulesAgent
+from src.prompts import question_generation_prompt, rules_extraction_prompt
+
+# Transcripts processed at once by process_all_transcripts
+DEFAULT_CONCURRENCY = 4
 
 class PokerTutorialProcessor:
     """
@@ -17,14 +25,14 @@ class PokerTutorialProcessor:
     - RulesAgent: Extracts actionable rules and guidelines
     """
     
-    def __init__(self, config: ModelConfig = None):
+    def __init__(self, config: ModelConfig = None, per_chunk: bool = True):
         self.config = config or ModelConfig()
+        self.per_chunk = per_chunk  # one question/rules prompt per chunk instead of one per transcript
         self.output_dir = Path("./poker_output")
-        self.questions_file = self.output_dir / "questions.json"
-        self.rules_file = self.output_dir / "poker_rules.json"
         
         # Initialize output directory and files
         self._initialize_output_dir()
+        self.manifest = RunManifest(self.output_dir)
         
         # Set up LiteLLM client and agents
         self._setup_clients_and_agents()
@@ -48,117 +56,294 @@ class PokerTutorialProcessor:
             return "API_KEY"
     
     def _initialize_output_dir(self):
-        """Create output directory and initialize JSON files if they don't exist"""
+        """Create output directory; the agents create their JSONL stores on first write"""
         ensure_directory_exists(self.output_dir)
-        
-        # Initialize questions file
-        initialize_json_file(self.questions_file, [])
-        
-        # Initialize rules file
-        initial_rules = {
-            "bet_sizing_rules": [],
-            "flop_guidelines": [],
-            "turn_guidelines": [],
-            "river_guidelines": [],
-            "general_principles": []
-        }
-        initialize_json_file(self.rules_file, initial_rules)
     
     def _setup_clients_and_agents(self):
         """Initialize LLM client and specialized agents"""
         self.llm_client = LLMClient(self.config)
         self.chunking_agent = ChunkingAgent(self.llm_client, self.output_dir)
-        self.question_agent = QuestionAgent(self.llm_client, self.output_dir)
-        self.rules_agent = RulesAgent(self.llm_client, self.output_dir)
+        self.repository = PokerRepository(self.output_dir / "poker.sqlite")
+        self.question_agent = QuestionAgent(self.llm_client, self.output_dir, self.repository)
+        self.rules_agent = RulesAgent(self.llm_client, self.output_dir, self.repository)
+        self.questions_file = self.question_agent.questions_file
+        self.rules_file = self.rules_agent.rules_file
+        self.parse_stats_file = self.output_dir / "parse_stats.json"
     
-    async def process_transcript(self, transcript_path: Path):
+    async def process_transcript(self, transcript_path: Path) -> bool:
         """
         Main processing pipeline: runs all three agents sequentially
         
+        Stages already recorded in the manifest for the transcript's current
+        content are skipped, so re-runs only do missing or stale work.
+        
         Args:
             transcript_path: Path to the transcript file to process
+            
+        Returns:
+            True if every agent succeeded, False otherwise
         """
         try:
-            print(f"\n🚀 Processing {transcript_path.name}...")
             transcript_name = transcript_path.stem
+            digest = content_hash(transcript_path)
+            pending = self.manifest.pending_stages(transcript_name, digest)
+            if not pending:
+                print(f"⏭ {transcript_path.name} is up to date")
+                return True
+            
+            print(f"\n🚀 Processing {transcript_path.name} (stages: {', '.join(pending)})...")
             
-            # Agent 1: Chunk the transcript
-            print("📝 Agent 1: Chunking transcript...")
-            chunks = await self.chunking_agent.process(transcript_path)
+            # Agent 1: Chunk the transcript, or reuse the chunks of an earlier run
+            if "chunk" in pending or not self.chunking_agent.chunks_file(transcript_path).exists():
+                print(f"📝 Agent 1: Chunking {transcript_name}...")
+                chunks = await self.chunking_agent.process(transcript_path)
+                self.manifest.mark_done(transcript_name, digest, "chunk")
+                pending = self.manifest.pending_stages(transcript_name, digest)
+            else:
+                chunks = self.chunking_agent.load(transcript_path)
             
-            # Agent 2: Generate questions
-            print("❓ Agent 2: Generating questions...")
-            await self.question_agent.process(chunks, transcript_name)
+            # Agents 2 and 3 only depend on the chunks, so run them concurrently
+            async def questions():
+                print(f"❓ Agent 2: Generating questions for {transcript_name}...")
+                await self.question_agent.process(chunks, transcript_name, per_chunk=self.per_chunk)
+                self.manifest.mark_done(transcript_name, digest, "questions")
             
-            # Agent 3: Extract rules
-            print("📋 Agent 3: Extracting rules...")
-            await self.rules_agent.process(chunks, transcript_name)
+            async def rules():
+                print(f"📋 Agent 3: Extracting rules for {transcript_name}...")
+                await self.rules_agent.process(chunks, transcript_name, per_chunk=self.per_chunk)
+                self.manifest.mark_done(transcript_name, digest, "rules")
+            
+            stages = {"questions": questions, "rules": rules}
+            outcomes = await asyncio.gather(
+                *(run() for stage, run in stages.items() if stage in pending),
+                return_exceptions=True
+            )
+            # A failed agent leaves the other's finished stage recorded; report the first error
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException):
+                    raise outcome
             
             print(f"✅ Successfully processed {transcript_name}")
+            return True
             
         except Exception as e:
             print(f"Error processing transcript {transcript_path}: {e}")
+            return False
     
-    async def process_all_transcripts(self, transcripts_dir: Path):
+    async def process_all_transcripts(self, transcripts_dir: Path,
+                                      concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, List[str]]:
         """
         Process all .txt files in the specified directory
         
         Args:
             transcripts_dir: Directory containing transcript files
+            concurrency: Number of transcripts processed at once. 1 keeps the
+                sequential mode with a fixed pause between transcripts
+            
+        Returns:
+            Dictionary with the names of succeeded and failed transcripts
         """
+        results = {"succeeded": [], "failed": []}
         try:
             transcripts_dir = Path(transcripts_dir)
-            txt_files = list(transcripts_dir.glob("*.txt"))
+            txt_files = sorted(transcripts_dir.glob("*.txt"))
+            total = len(txt_files)
             
-            print(f"Found {len(txt_files)} transcript files to process")
+            print(f"Found {total} transcript files to process")
             
-            for file_path in txt_files:
-                await self.process_transcript(file_path)
+            if concurrency <= 1:
+                for file_path in txt_files:
+                    ok = await self.process_transcript(file_path)
+                    results["succeeded" if ok else "failed"].append(file_path.name)
+                    
+                    # Small delay to avoid rate limiting
+                    print("⏳ Waiting 2 seconds to avoid rate limits...")
+                    await asyncio.sleep(2)
+            else:
+                print(f"⚡ Running up to {concurrency} transcripts at once")
+                semaphore = asyncio.Semaphore(concurrency)
+                
+                async def run(file_path: Path):
+                    async with semaphore:
+                        ok = await self.process_transcript(file_path)
+                    results["succeeded" if ok else "failed"].append(file_path.name)
+                    done = len(results["succeeded"]) + len(results["failed"])
+                    status = "✅" if ok else "❌"
+                    print(f"{status} [{done}/{total}] {file_path.name}")
                 
-                # Small delay to avoid rate limiting
-                print("⏳ Waiting 2 seconds to avoid rate limits...")
-                await asyncio.sleep(2)
+                # process_transcript catches its own errors, so one failure never cancels the rest
+                await asyncio.gather(*(run(file_path) for file_path in txt_files))
+            
+            # Drop records superseded by re-processed transcripts
+            self.question_agent.store.compact()
+            self.rules_agent.store.compact()
+            
+            # Parse outcomes per output mode, accumulated across runs
+            self.llm_client.parse_stats.save(self.parse_stats_file)
+            
+            tokens = self.llm_client.input_tokens
+            if tokens["calls"]:
+                print(f"\n🧮 Input tokens over {tokens['calls']} calls: {tokens['cached']} cached, "
+                      f"{tokens['uncached']} uncached ({tokens['cache_write']} written to cache)")
             
-            print("\n🎉 All transcripts processed successfully!")
+            if results["failed"]:
+                print(f"\n⚠️ Processed {len(results['succeeded'])}/{total} transcripts; "
+                      f"failed: {', '.join(results['failed'])}")
+            else:
+                print("\n🎉 All transcripts processed successfully!")
             
         except Exception as e:
             print(f"Error processing transcripts: {e}")
+        return results
+    
+    async def process_all_transcripts_batch(self, transcripts_dir: Path,
+                                            backend: Optional[BatchBackend] = None,
+                                            poll_seconds: float = DEFAULT_POLL_SECONDS) -> Dict[str, List[str]]:
+        """
+        Process all .txt files in the directory through provider batch jobs
+        
+        One job chunks every transcript that needs it; a second runs the
+        question and rules prompts of all their chunks. Batch requests cost
+        about half as much and bypass the rate limiter. Job ids are kept in
+        batch_jobs.json, so a restarted run resumes polling instead of
+        resubmitting; stages already in the manifest are not resubmitted.
+        
+        Args:
+            transcripts_dir: Directory containing transcript files
+            backend: Batch API to use; defaults to the provider of config.model
+            poll_seconds: Pause between job status checks
+            
+        Returns:
+            Dictionary with the names of succeeded and failed transcripts
+        """
+        results = {"succeeded": [], "failed": []}
+        try:
+            backend = backend or get_batch_backend(self.config.model, self.config.api_key)
+            mode = backend.output_mode if self.config.structured_output else "prompt"
+            jobs = BatchJobs(self.output_dir / "batch_jobs.json")
+            paths = {path.stem: path for path in sorted(Path(transcripts_dir).glob("*.txt"))}
+            digests = {name: content_hash(path) for name, path in paths.items()}
+            print(f"Found {len(paths)} transcript files to process in batch mode ({backend.name})")
+            
+            def needs_chunks(name: str) -> bool:
+                return ("chunk" in self.manifest.pending_stages(name, digests[name])
+                        or not self.chunking_agent.chunks_file(paths[name]).exists())
+            
+            def is_current(entry: Dict[str, Any]) -> bool:
+                # A transcript removed or edited since submission is redone by the next run
+                return digests.get(entry["transcript"]) == entry["digest"]
+            
+            # Job 1: chunk plans
+            def chunk_requests() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+                requests, meta = {}, {}
+                for name, path in paths.items():
+                    if needs_chunks(name):
+                        custom_id = f"chunk-{len(requests):05d}"
+                        prompt = self.chunking_agent.build_prompt(path)
+                        requests[custom_id] = self.llm_client.batch_request(prompt, "chunking", mode)
+                        meta[custom_id] = {"transcript": name, "digest": digests[name]}
+                return requests, meta
+            
+            meta, answers = await jobs.run("chunk", backend, chunk_requests, poll_seconds)
+            mapped = True
+            for custom_id, entry in meta.items():
+                if not is_current(entry) or answers.get(custom_id) is None:
+                    continue
+                try:
+                    plan, outcome = self.llm_client.parse_result(answers[custom_id], "chunking", f"batch-{mode}")
+                    if outcome == "failed":
+                        # Left pending, so the next run submits it again
+                        print(f"⚠️ Unusable chunk plan for {entry['transcript']}; will retry")
+                        continue
+                    self.chunking_agent.save_plan(paths[entry["transcript"]], plan)
+                    self.manifest.mark_done(entry["transcript"], entry["digest"], "chunk")
+                except Exception as e:
+                    mapped = False
+                    print(f"Error saving batch chunks for {entry['transcript']}: {e}")
+            # Keep a job whose answers could not all be stored; the next run maps it again
+            if mapped:
+                jobs.finish("chunk")
+            
+            # Job 2: questions and rules for every chunk (or transcript, without per_chunk)
+            def extraction_requests() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+                requests, meta = {}, {}
+                for name, path in paths.items():
+                    if needs_chunks(name):
+                        continue
+                    pending = self.manifest.pending_stages(name, digests[name])
+                    chunks = self.chunking_agent.load(path)
+                    units = ([{"chunks": [chunk]} for chunk in chunks["chunks"]] if self.per_chunk
+                             else [chunks])
+                    for stage, build_prompt in (("questions", question_generation_prompt),
+                                                ("rules", rules_extraction_prompt)):
+                        if stage not in pending:
+                            continue
+                        for index, unit in enumerate(units):
+                            custom_id = f"{stage}-{len(requests):05d}"
+                            requests[custom_id] = self.llm_client.batch_request(
+                                build_prompt(unit, name), stage, mode)
+                            meta[custom_id] = {"transcript": name, "digest": digests[name], "stage": stage,
+                                               "chunk": index if self.per_chunk else None}
+                return requests, meta
+            
+            meta, answers = await jobs.run("extract", backend, extraction_requests, poll_seconds)
+            grouped: Dict[Tuple[str, str], List[str]] = {}
+            for custom_id, entry in meta.items():
+                grouped.setdefault((entry["transcript"], entry["stage"]), []).append(custom_id)
+            mapped = True
+            for (name, stage), custom_ids in grouped.items():
+                entries = [meta[custom_id] for custom_id in custom_ids]
+                if not is_current(entries[0]) or any(answers.get(c) is None for c in custom_ids):
+                    continue
+                agent = self.question_agent if stage == "questions" else self.rules_agent
+                try:
+                    parsed = [self.llm_client.parse_result(answers[c], stage, f"batch-{mode}") for c in custom_ids]
+                    if any(outcome == "failed" for _, outcome in parsed):
+                        # Left pending, so the next run submits this stage again
+                        print(f"⚠️ Unusable {stage} answer for {name}; will retry")
+                        continue
+                    if entries[0]["chunk"] is None:
+                        data = parsed[0][0]
+                        agent.save(data.get("questions", []) if stage == "questions" else data, name)
+                    else:
+                        chunk_list = self.chunking_agent.load(paths[name])["chunks"]
+                        agent.save_results([(chunk_list[e["chunk"]], data)
+                                            for e, (data, _) in zip(entries, parsed)], name)
+                    self.manifest.mark_done(name, entries[0]["digest"], stage)
+                except Exception as e:
+                    mapped = False
+                    print(f"Error saving batch {stage} for {name}: {e}")
+            if mapped:
+                jobs.finish("extract")
+            
+            self.question_agent.store.compact()
+            self.rules_agent.store.compact()
+            self.llm_client.parse_stats.save(self.parse_stats_file)
+            
+            for name, path in paths.items():
+                done = not self.manifest.pending_stages(name, digests[name])
+                results["succeeded" if done else "failed"].append(path.name)
+            if results["failed"]:
+                print(f"\n⚠️ Processed {len(results['succeeded'])}/{len(paths)} transcripts; "
+                      f"failed: {', '.join(results['failed'])}")
+            else:
+                print("\n🎉 All transcripts processed successfully!")
+            
+        except Exception as e:
+            print(f"Error processing transcripts in batch mode: {e}")
+        return results
     
     def get_stats(self) -> Dict[str, Any]:
         """
-        Get processing statistics from generated files
+        Get processing statistics from the indexed repository
         
         Returns:
             Dictionary containing comprehensive statistics
         """
         try:
-            questions = load_json(self.questions_file)
-            rules = load_json(self.rules_file)
-            
-            stats = {
-                "total_questions": len(questions),
-                "questions_by_street": {},
-                "questions_by_difficulty": {},
-                "questions_by_type": {},
-                "total_rules": len(rules["bet_sizing_rules"]),
-                "total_guidelines": {
-                    "flop": len(rules["flop_guidelines"]),
-                    "turn": len(rules["turn_guidelines"]),
-                    "river": len(rules["river_guidelines"])
-                },
-                "general_principles": len(rules["general_principles"])
-            }
-            
-            # Count questions by various categories
-            for question in questions:
-                street = question.get("street", "unknown")
-                difficulty = question.get("difficulty", "unknown")
-                q_type = question.get("question_type", "unknown")
-                
-                stats["questions_by_street"][street] = stats["questions_by_street"].get(street, 0) + 1
-                stats["questions_by_difficulty"][difficulty] = stats["questions_by_difficulty"].get(difficulty, 0) + 1
-                stats["questions_by_type"][q_type] = stats["questions_by_type"].get(q_type, 0) + 1
-            
+            stats = self.repository.stats()
+            stats["parse_outcomes"] = ParseStats.load(self.parse_stats_file).summary()
+            stats["input_tokens"] = dict(self.llm_client.input_tokens)
             return stats
             
         except Exception as e:
@@ -3,19 +3,77 @@ Combined agents for poker tutorial processing.
 All three agents (Chunking, Question Generation, Rules Extraction) in one file.
 """
 
+import asyncio
 import json
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
 from src.utils.llm_client import LLMClient
-from src.utils.json_utils import parse_json_response
 from src.utils.file_utils import load_json, save_json
+from src.utils.json_stream import JsonObjectStream, SchemaError
+from src.utils.jsonl_store import JsonlStore
+from src.utils.repository import PokerRepository
+from src.utils.text_utils import sentence_spans
 from src.prompts import (
     chunking_prompt,
     question_generation_prompt,
     rules_extraction_prompt
 )
 
+# Chunk size used when the model's chunk plan is unusable
+FALLBACK_CHUNK_WORDS = 1500
+
+RULE_CATEGORIES = ["bet_sizing_rules", "flop_guidelines", "turn_guidelines",
+                   "river_guidelines", "general_principles"]
+
+# Streamed responses: collection -> fields each item needs (other shapes abort the stream)
+STREAM_SCHEMAS = {
+    "questions": {"questions": ["question"]},
+    "rules": {category: [] for category in RULE_CATEGORIES},
+}
+
+# Called with (collection, item) as soon as a streamed item is complete
+ItemCallback = Callable[[str, Dict[str, Any]], None]
+
+class StreamedRecords:
+    """
+    on_item callback that saves streamed items to a JSONL store and the
+    repository as they arrive.
+    
+    The transcript's earlier records are superseded only when the first
+    item arrives, and restore() puts them back if the response then fails,
+    so a failed or empty stream never loses the last good results.
+    """
+    
+    def __init__(self, store: JsonlStore, repository: PokerRepository, table: str, field: str,
+                 transcript_name: str, to_record: Callable[[str, Dict[str, Any]], Dict[str, Any]]):
+        self.store = store
+        self.repository = repository
+        self.table = table
+        self.field = field
+        self.transcript_name = transcript_name
+        self.to_record = to_record
+        self.previous: Optional[List[Dict[str, Any]]] = None
+    
+    def _replace(self, records: List[Dict[str, Any]]):
+        self.store.replace(self.field, self.transcript_name, records)
+        self.repository.replace(self.table, self.field, self.transcript_name, records)
+    
+    def __call__(self, collection: str, item: Dict[str, Any]):
+        record = self.to_record(collection, item)
+        if self.previous is None:
+            self.previous = [r for r in self.store.iter_records() if r.get(self.field) == self.transcript_name]
+            self._replace([record])
+        else:
+            self.store.append([record])
+            self.repository.add(self.table, [record])
+    
+    def restore(self):
+        """Put back the records that streamed items superseded"""
+        if self.previous is not None:
+            self._replace(self.previous)
+            self.previous = None
+
 class BaseAgent(ABC):
     """Base class for all processing agents"""
     
@@ -28,18 +86,92 @@ class BaseAgent(ABC):
         """Main processing method to be implemented by each agent"""
         pass
     
-    async def _call_llm_and_parse(self, prompt: str, context: str, **kwargs) -> Dict[str, Any]:
-        """Helper method to call LLM and parse JSON response"""
+    async def _call_llm_and_parse(self, prompt: str, context: str,
+                                  on_item: Optional[ItemCallback] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Helper method to call LLM and parse JSON response
+        
+        With config.stream, contexts in STREAM_SCHEMAS are streamed: on_item
+        gets each item as soon as it is complete, and a response that goes
+        off schema is abandoned at once with SchemaError.
+        """
         # Use config max_tokens as default, but allow override
         if 'max_tokens' not in kwargs:
             kwargs['max_tokens'] = self.llm_client.config.max_tokens
         
-        response = await self.llm_client.call(prompt, **kwargs)
-        return parse_json_response(response, context)
+        if self.llm_client.config.stream and context in STREAM_SCHEMAS:
+            return await self._stream_and_parse(prompt, context, on_item, **kwargs)
+        
+        return await self.llm_client.call_json(prompt, context, **kwargs)
+    
+    async def _stream_and_parse(self, prompt: str, context: str,
+                                on_item: Optional[ItemCallback], **kwargs) -> Dict[str, Any]:
+        """Stream a response through the incremental parser"""
+        parser = JsonObjectStream(STREAM_SCHEMAS[context])
+        stream = self.llm_client.stream(prompt, **kwargs)
+        try:
+            async for text in stream:
+                for collection, item in parser.feed(text):
+                    if on_item:
+                        on_item(collection, item)
+        finally:
+            await stream.aclose()
+        
+        if not parser.started:
+            # No JSON object at all; don't let the cache replay it, and keep earlier results
+            await self.llm_client.forget(prompt, **kwargs)
+            raise SchemaError(f"{context} response contained no JSON object")
+        if not parser.finished:
+            # Usually max_tokens cut the answer off; the complete items are still good
+            count = sum(len(items) for items in parser.result.values())
+            print(f"⚠️ {context} response ended early; keeping {count} complete items")
+        return parser.result
+    
+    async def _map_chunks(self, chunks: Dict[str, Any], build_prompt: Callable[..., str],
+                          transcript_name: str, context: str,
+                          on_item: Optional[ItemCallback] = None) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Run one prompt per chunk concurrently and pair each chunk with its parsed result"""
+        chunk_list = chunks.get("chunks", [])
+        results = await asyncio.gather(*(
+            self._call_llm_and_parse(build_prompt({"chunks": [chunk]}, transcript_name), context, on_item)
+            for chunk in chunk_list
+        ))
+        return list(zip(chunk_list, results))
 
 class ChunkingAgent(BaseAgent):
     """Agent 1: Break transcript into logical, coherent chunks"""
     
+    def chunks_file(self, transcript_path: Path) -> Path:
+        """Where the chunks of a transcript are saved"""
+        return self.output_dir / f"chunks_{transcript_path.stem}.json"
+    
+    def load(self, transcript_path: Path) -> Dict[str, Any]:
+        """Chunks saved by an earlier run"""
+        return load_json(self.chunks_file(transcript_path))
+    
+    @staticmethod
+    def _read_sentences(transcript_path: Path) -> Tuple[str, List[Tuple[int, int]]]:
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            transcript = f.read()
+        return transcript, sentence_spans(transcript)
+    
+    def build_prompt(self, transcript_path: Path) -> str:
+        """Chunking prompt listing the transcript's numbered sentences"""
+        transcript, spans = self._read_sentences(transcript_path)
+        return chunking_prompt([transcript[start:end] for start, end in spans])
+    
+    def save_plan(self, transcript_path: Path, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Slice the transcript at the model's chunk starts and save the chunks"""
+        # The model only returns boundaries; chunk text is sliced locally
+        transcript, spans = self._read_sentences(transcript_path)
+        chunks = {"chunks": self._slice_chunks(transcript, spans, plan.get("chunks", []))}
+        
+        # Save chunks to file
+        save_json(self.chunks_file(transcript_path), chunks)
+        
+        print(f"✅ Chunked {transcript_path.name} into {len(chunks['chunks'])} chunks")
+        return chunks
+    
     async def process(self, transcript_path: Path) -> Dict[str, Any]:
         """
         Chunk a transcript into logical sections
@@ -51,103 +183,254 @@ class ChunkingAgent(BaseAgent):
             Dictionary containing chunks with metadata
         """
         try:
-            with open(transcript_path, 'r', encoding='utf-8') as f:
-                transcript = f.read()
-            
-            # Get prompt from prompts module
-            prompt = chunking_prompt(transcript)
-            
-            chunks = await self._call_llm_and_parse(prompt, "chunking")
-            
-            # Save chunks to file
-            chunks_file = self.output_dir / f"chunks_{transcript_path.stem}.json"
-            with open(chunks_file, 'w') as f:
-                json.dump(chunks, f, indent=2)
-            
-            print(f"✅ Chunked {transcript_path.name} into {len(chunks['chunks'])} chunks")
-            return chunks
+            plan = await self._call_llm_and_parse(self.build_prompt(transcript_path), "chunking")
+            return self.save_plan(transcript_path, plan)
             
         except Exception as e:
             print(f"Error chunking transcript {transcript_path}: {e}")
             raise
 
+    @staticmethod
+    def _slice_chunks(transcript: str, spans: List[Tuple[int, int]],
+                      plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build chunks from the model's start sentences
+        
+        Invalid or duplicate starts are dropped and the first chunk always
+        starts at sentence 0, so the chunks cover the transcript exactly once.
+        Without a usable plan the transcript is split every ~FALLBACK_CHUNK_WORDS words.
+        """
+        starts = {}
+        for entry in plan:
+            try:
+                start = int(entry.get("start_sentence"))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= start < len(spans):
+                starts.setdefault(start, entry)
+        
+        if not starts:
+            words = 0
+            for index, (begin, end) in enumerate(spans):
+                if index == 0 or words >= FALLBACK_CHUNK_WORDS:
+                    starts[index] = {"topic": f"Part {len(starts) + 1}", "street": "general"}
+                    words = 0
+                words += len(transcript[begin:end].split())
+        
+        ordered = sorted(starts)
+        if ordered and ordered[0] != 0:
+            starts[0] = starts.pop(ordered[0])
+            ordered[0] = 0
+        
+        chunks = []
+        for number, start in enumerate(ordered):
+            end = ordered[number + 1] - 1 if number + 1 < len(ordered) else len(spans) - 1
+            content = transcript[spans[start][0]:spans[end][1]]
+            entry = starts[start]
+            chunks.append({
+                "id": number + 1,
+                "topic": entry.get("topic", ""),
+                "content": content,
+                "street": entry.get("street", "general"),
+                "key_concepts": entry.get("key_concepts", []),
+                "word_count": len(content.split()),
+                "start_sentence": start,
+                "end_sentence": end,
+            })
+        return chunks
+
 class QuestionAgent(BaseAgent):
     """Agent 2: Generate specific, testable questions from chunks"""
     
-    def __init__(self, llm_client: LLMClient, output_dir: Path):
+    def __init__(self, llm_client: LLMClient, output_dir: Path,
+                 repository: Optional[PokerRepository] = None):
         super().__init__(llm_client, output_dir)
-        self.questions_file = output_dir / "questions.json"
+        self.questions_file = output_dir / "questions.jsonl"
+        self.store = JsonlStore(self.questions_file)
+        self.repository = repository or PokerRepository(output_dir / "poker.sqlite")
+        
+        # One-time import of the questions.json written by earlier versions
+        legacy_file = output_dir / "questions.json"
+        if legacy_file.exists() and not self.questions_file.exists():
+            self.store.append(load_json(legacy_file))
+        
+        # The JSONL store is the durable log; the repository is its queryable index
+        self.repository.sync("questions", self.store.iter_records)
     
-    async def process(self, chunks: Dict[str, Any], transcript_name: str) -> List[Dict[str, Any]]:
+    def iter_questions(self) -> Iterator[Dict[str, Any]]:
+        """Stream every current question"""
+        return self.store.iter_records()
+    
+    async def process(self, chunks: Dict[str, Any], transcript_name: str,
+                      per_chunk: bool = False) -> List[Dict[str, Any]]:
         """
         Generate test questions from transcript chunks
         
         Args:
             chunks: Dictionary containing transcript chunks
             transcript_name: Name of the source transcript
+            per_chunk: Send one prompt per chunk concurrently and merge the results
             
         Returns:
             List of generated questions
         """
+        on_item = None
+        if self.llm_client.config.stream:
+            # Persist streamed questions at once; the final save() supersedes them
+            on_item = StreamedRecords(self.store, self.repository, "questions", "source_transcript",
+                                      transcript_name,
+                                      lambda _, question: {**question, "source_transcript": transcript_name})
+        
         try:
+            if per_chunk:
+                results = await self._map_chunks(chunks, question_generation_prompt,
+                                                 transcript_name, "questions", on_item)
+                return self.save_results(results, transcript_name)
+            
             # Get prompt from prompts module
             prompt = question_generation_prompt(chunks, transcript_name)
-            
-            new_questions = await self._call_llm_and_parse(prompt, "questions")
-            
-            # Load existing questions and append new ones
-            existing_questions = load_json(self.questions_file)
-            existing_questions.extend(new_questions["questions"])
-            save_json(self.questions_file, existing_questions)
-            
-            print(f"✅ Generated {len(new_questions['questions'])} questions from {transcript_name}")
-            return new_questions["questions"]
+            new_questions = await self._call_llm_and_parse(prompt, "questions", on_item)
+            return self.save(new_questions["questions"], transcript_name)
             
         except Exception as e:
+            if on_item:
+                on_item.restore()
             print(f"Error generating questions: {e}")
             raise
+    
+    def save_results(self, results: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                     transcript_name: str) -> List[Dict[str, Any]]:
+        """Merge (chunk, parsed response) pairs and save them as the transcript's questions"""
+        return self.save(self._reduce(results, transcript_name), transcript_name)
+    
+    def save(self, questions: List[Dict[str, Any]], transcript_name: str) -> List[Dict[str, Any]]:
+        """Replace this transcript's earlier questions instead of appending duplicates"""
+        for question in questions:
+            question["source_transcript"] = transcript_name
+        self.store.replace("source_transcript", transcript_name, questions)
+        self.repository.replace_questions(transcript_name, questions)
+        
+        print(f"✅ Generated {len(questions)} questions from {transcript_name}")
+        return questions
+    
+    @staticmethod
+    def _reduce(results: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                transcript_name: str) -> List[Dict[str, Any]]:
+        """Merge per-chunk questions, dropping repeats and keeping ids unique"""
+        merged, seen = [], set()
+        for chunk, result in results:
+            for number, question in enumerate(result.get("questions", []), 1):
+                text = " ".join(str(question.get("question", "")).lower().split())
+                if text in seen:
+                    continue
+                seen.add(text)
+                question["source_chunk_id"] = chunk.get("id")
+                question["id"] = f"{transcript_name}-{chunk.get('id')}-{number}"
+                merged.append(question)
+        return merged
 
 class RulesAgent(BaseAgent):
     """Agent 3: Extract actionable rules and guidelines from chunks"""
     
-    def __init__(self, llm_client: LLMClient, output_dir: Path):
+    def __init__(self, llm_client: LLMClient, output_dir: Path,
+                 repository: Optional[PokerRepository] = None):
         super().__init__(llm_client, output_dir)
-        self.rules_file = output_dir / "poker_rules.json"
+        self.rules_file = output_dir / "poker_rules.jsonl"
+        self.store = JsonlStore(self.rules_file)
+        self.repository = repository or PokerRepository(output_dir / "poker.sqlite")
+        
+        # One-time import of the poker_rules.json written by earlier versions
+        legacy_file = output_dir / "poker_rules.json"
+        if legacy_file.exists() and not self.rules_file.exists():
+            legacy_rules = load_json(legacy_file)
+            self.store.append({"category": category, **rule}
+                              for category in RULE_CATEGORIES
+                              for rule in legacy_rules.get(category, []))
+        
+        self.repository.sync("rules", self.store.iter_records)
+    
+    def iter_rules(self) -> Iterator[Dict[str, Any]]:
+        """Stream every current rule, each tagged with its category"""
+        return self.store.iter_records()
     
-    async def process(self, chunks: Dict[str, Any], transcript_name: str) -> Dict[str, Any]:
+    def load_rules(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Current rules grouped by category, in the layout of the old poker_rules.json"""
+        rules = {category: [] for category in RULE_CATEGORIES}
+        for record in self.iter_rules():
+            category = record.pop("category", "general_principles")
+            rules.setdefault(category, []).append(record)
+        return rules
+    
+    async def process(self, chunks: Dict[str, Any], transcript_name: str,
+                      per_chunk: bool = False) -> Dict[str, Any]:
         """
         Extract actionable rules and guidelines from chunks
         
         Args:
             chunks: Dictionary containing transcript chunks
             transcript_name: Name of the source transcript
+            per_chunk: Send one prompt per chunk concurrently and merge the results
             
         Returns:
             Dictionary containing extracted rules by category
         """
+        on_item = None
+        if self.llm_client.config.stream:
+            # Persist streamed rules at once; the final save() supersedes them
+            on_item = StreamedRecords(self.store, self.repository, "rules", "source", transcript_name,
+                                      lambda category, rule: {"category": category, **rule,
+                                                              "source": transcript_name})
+        
         try:
+            if per_chunk:
+                results = await self._map_chunks(chunks, rules_extraction_prompt,
+                                                 transcript_name, "rules", on_item)
+                return self.save_results(results, transcript_name)
+            
             # Get prompt from prompts module
             prompt = rules_extraction_prompt(chunks, transcript_name)
-            
-            new_rules = await self._call_llm_and_parse(prompt, "rules")
-            
-            # Load existing rules and merge
-            existing_rules = load_json(self.rules_file)
-            
-            # Merge each rule category
-            for category in ["bet_sizing_rules", "flop_guidelines", "turn_guidelines", 
-                           "river_guidelines", "general_principles"]:
-                if category in new_rules:
-                    existing_rules[category].extend(new_rules[category])
-            
-            save_json(self.rules_file, existing_rules)
-            
-            print(f"✅ Extracted rules from {transcript_name}")
-            return new_rules
+            new_rules = await self._call_llm_and_parse(prompt, "rules", on_item)
+            return self.save(new_rules, transcript_name)
             
         except Exception as e:
+            if on_item:
+                on_item.restore()
             print(f"Error extracting rules: {e}")
             raise
+    
+    def save_results(self, results: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                     transcript_name: str) -> Dict[str, Any]:
+        """Merge (chunk, parsed response) pairs and save them as the transcript's rules"""
+        return self.save(self._reduce(results), transcript_name)
+    
+    def save(self, new_rules: Dict[str, Any], transcript_name: str) -> Dict[str, Any]:
+        """Replace this transcript's earlier rules instead of appending duplicates"""
+        records = []
+        for category in RULE_CATEGORIES:
+            for rule in new_rules.get(category, []):
+                rule["source"] = transcript_name
+                records.append({"category": category, **rule})
+        self.store.replace("source", transcript_name, records)
+        self.repository.replace_rules(transcript_name, records)
+        
+        print(f"✅ Extracted rules from {transcript_name}")
+        return new_rules
+    
+    @staticmethod
+    def _reduce(results: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, Any]:
+        """Merge per-chunk rules category by category, dropping exact repeats"""
+        merged = {category: [] for category in RULE_CATEGORIES}
+        seen = set()
+        for _, result in results:
+            for category in RULE_CATEGORIES:
+                for rule in result.get(category, []):
+                    # Ids differ between chunks even for the same rule, so compare the content only
+                    content = {k: v for k, v in rule.items() if not k.endswith("_id")}
+                    key = (category, json.dumps(content, sort_keys=True).lower())
+                    if key not in seen:
+                        seen.add(key)
+                        merged[category].append(rule)
+        return merged
 
 # Export all agents for easy importing
 __all__ = ['BaseAgent', 'ChunkingAgent', 'QuestionAgent', 'RulesAgent']
\ No newline at end of file
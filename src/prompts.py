@@ -1,16 +1,31 @@
 """
 Centralized prompts for all poker processing agents.
-Each prompt is a function that takes parameters and returns the formatted prompt string.
+Each prompt is a function that takes parameters and returns a Prompt: the
+static instructions first, identical on every call so providers can cache
+them, then the variable content.
 """
 
 import json
-from typing import Dict, Any
-
-def chunking_prompt(transcript: str) -> str:
-    """Generate chunking prompt for Agent 1"""
-    return f"""
+from dataclasses import dataclass
+from typing import Dict, Any, List
+
+# Bump whenever a template below changes, so cached LLM responses are not reused
+PROMPT_VERSION = "3"
+
+@dataclass(frozen=True)
+class Prompt:
+    """A prompt split into a cacheable static prefix and the content that varies per call"""
+    instructions: str
+    content: str
+    
+    def __str__(self) -> str:
+        return f"{self.instructions}\n{self.content}"
+
+CHUNKING_INSTRUCTIONS = """
 You are a poker strategy expert. Analyze this poker tutorial transcript and break it into logical, coherent chunks.
 
+The transcript is given as numbered sentences starting at [0]. Lines starting with "##" are section headers.
+
 Each chunk should:
 1. Focus on a single concept or scenario
 2. Be 1000-2000 words long (comprehensive coverage)
@@ -18,35 +33,34 @@ Each chunk should:
 4. Have a clear topic/theme
 5. Preserve strategic context and reasoning flow
 
+Chunks are contiguous: each chunk starts at its "start_sentence" and runs until the next chunk's start.
+The first chunk starts at sentence 0. Do NOT copy any transcript text into your answer.
+
 IMPORTANT: Return ONLY a valid JSON object. Do not include any markdown formatting, explanations, or other text.
 
 JSON Structure:
-{{
+{
   "chunks": [
-    {{
+    {
       "id": 1,
+      "start_sentence": 0,
       "topic": "Brief topic description",
-      "content": "The actual chunk content - escape all quotes and newlines properly",
       "street": "preflop/flop/turn/river/general",
-      "key_concepts": ["concept1", "concept2"],
-      "word_count": 1200
-    }}
+      "key_concepts": ["concept1", "concept2"]
+    }
   ]
-}}
-
-CRITICAL: 
-- Escape all quotes in content with \"
-- Replace actual newlines in content with \\n
-- Do not use unescaped control characters
-- Ensure all JSON values are properly quoted and escaped
-
-Transcript:
-{transcript}
+}
 """
 
-def question_generation_prompt(chunks: Dict[str, Any], transcript_name: str) -> str:
-    """Generate question generation prompt for Agent 2"""
-    return f"""
+def chunking_prompt(sentences: List[str]) -> Prompt:
+    """Generate chunking prompt for Agent 1 from the transcript's numbered sentences"""
+    numbered = "\n".join(f"[{i}] {' '.join(sentence.split())}" for i, sentence in enumerate(sentences))
+    return Prompt(CHUNKING_INSTRUCTIONS, f"""
+Transcript sentences [0] to [{len(sentences) - 1}]:
+{numbered}
+""")
+
+QUESTION_INSTRUCTIONS = """
 You are a poker coach creating practice questions. Based on these poker strategy chunks, generate specific, actionable test questions.
 
 Create questions that test:
@@ -60,41 +74,45 @@ For each chunk, generate 2-4 questions based on the chunk's complexity and conte
 IMPORTANT: Return ONLY a valid JSON object. Do not include any markdown formatting, explanations, or other text.
 
 JSON Structure:
-{{
+{
   "questions": [
-    {{
+    {
       "id": "unique_id",
-      "source_transcript": "{transcript_name}",
+      "source_transcript": "the source transcript named below",
       "source_chunk_id": 1,
       "question_type": "scenario/concept/application",
       "street": "preflop/flop/turn/river",
       "question": "The actual question text - escape quotes properly",
-      "scenario": {{
+      "scenario": {
         "position": "BTN/SB/BB/UTG/etc or null",
         "stack_size": "effective stack in BBs or null",
         "board": "board cards if applicable or null",
         "action": "previous action sequence or null",
         "hero_hand": "if specified or example hand or null"
-      }},
+      },
       "correct_answer": "detailed explanation of correct play - escape quotes properly",
       "key_concepts": ["concept1", "concept2"],
       "difficulty": "beginner/intermediate/advanced"
-    }}
+    }
   ]
-}}
+}
 
 CRITICAL: 
 - Escape all quotes in text with \"
 - Replace actual newlines with \\n
 - Ensure all JSON values are properly quoted and escaped
+"""
+
+def question_generation_prompt(chunks: Dict[str, Any], transcript_name: str) -> Prompt:
+    """Generate question generation prompt for Agent 2"""
+    return Prompt(QUESTION_INSTRUCTIONS, f"""
+Source transcript: {transcript_name}
 
 Chunks to analyze:
 {json.dumps(chunks, indent=2)}
-"""
+""")
 
-def rules_extraction_prompt(chunks: Dict[str, Any], transcript_name: str) -> str:
-    """Generate rules extraction prompt for Agent 3"""
-    return f"""
+RULES_INSTRUCTIONS = """
 You are a poker strategist extracting actionable rules and guidelines from this tutorial.
 
 Extract specific, implementable rules. 
@@ -102,61 +120,61 @@ Extract specific, implementable rules.
 IMPORTANT: Return ONLY a valid JSON object. Do not include any markdown formatting, explanations, or other text.
 
 JSON Structure:
-{{
+{
   "bet_sizing_rules": [
-    {{
+    {
       "rule_id": "unique_id",
-      "source": "{transcript_name}",
+      "source": "the source transcript named below",
       "condition": "when this situation occurs",
       "action": "do this specific action",
       "reasoning": "why this works",
       "street": "flop/turn/river/general",
       "priority": "high/medium/low",
       "examples": ["example1", "example2"]
-    }}
+    }
   ],
   "flop_guidelines": [
-    {{
+    {
       "guideline_id": "unique_id",
-      "source": "{transcript_name}", 
+      "source": "the source transcript named below", 
       "board_type": "wet/dry/static/dynamic",
       "opponent_tendency": "fast_play/trap/capped/uncapped",
       "sizing_strategy": "specific strategy",
       "value_bluff_relationship": "same_size/different_sizes",
       "position_considerations": "position-specific notes"
-    }}
+    }
   ],
   "turn_guidelines": [
-    {{
+    {
       "guideline_id": "unique_id",
-      "source": "{transcript_name}",
+      "source": "the source transcript named below",
       "scenario": "scenario description",
       "key_question": "will opponent fast play?",
       "recommended_action": "specific action",
       "size_guideline": "sizing recommendation",
       "multiway_considerations": "adjustments for multiway pots"
-    }}
+    }
   ],
   "river_guidelines": [
-    {{
+    {
       "guideline_id": "unique_id", 
-      "source": "{transcript_name}",
+      "source": "the source transcript named below",
       "scenario_type": "bluff_big_value_small/bluff_small_value_big/etc",
       "opponent_range": "capped/uncapped/strong/weak",
       "sizing_strategy": "specific strategy",
       "stack_depth_factors": "deep vs shallow considerations"
-    }}
+    }
   ],
   "general_principles": [
-    {{
+    {
       "principle_id": "unique_id",
-      "source": "{transcript_name}",
+      "source": "the source transcript named below",
       "principle": "general principle statement",
       "application": "how to apply this",
       "exceptions": "when this doesn't apply"
-    }}
+    }
   ]
-}}
+}
 
 CRITICAL: 
 - Escape all quotes in text with \"
@@ -169,10 +187,16 @@ Focus on extracting:
 - Opponent tendency classifications
 - Street-specific strategies
 - Position and stack depth considerations
+"""
+
+def rules_extraction_prompt(chunks: Dict[str, Any], transcript_name: str) -> Prompt:
+    """Generate rules extraction prompt for Agent 3"""
+    return Prompt(RULES_INSTRUCTIONS, f"""
+Source transcript: {transcript_name}
 
 Chunks to analyze:
 {json.dumps(chunks, indent=2)}
-"""
+""")
 
 # Optional: Test prompts for development/debugging
 def connection_test_prompt() -> str:
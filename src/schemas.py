@@ -0,0 +1,131 @@
+"""
+JSON schemas of the agents' responses, used for structured output, and the
+request parameters that ask a model to follow them. Each schema mirrors the
+"JSON Structure" shown in the matching prompt.
+"""
+
+from typing import Any, Dict
+
+def _array_of(properties: Dict[str, Any], required: list) -> Dict[str, Any]:
+    return {
+        "type": "array",
+        "items": {"type": "object", "properties": properties, "required": required},
+    }
+
+_TEXT = {"type": "string"}
+_TEXT_OR_NULL = {"type": ["string", "null"]}  # the prompts ask for null when unknown
+_TEXT_LIST = {"type": "array", "items": {"type": "string"}}
+
+CHUNKS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "chunks": _array_of({
+            "id": {"type": "integer"},
+            "start_sentence": {"type": "integer"},
+            "topic": _TEXT,
+            "street": _TEXT,
+            "key_concepts": _TEXT_LIST,
+        }, ["start_sentence", "topic"]),
+    },
+    "required": ["chunks"],
+}
+
+QUESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": _array_of({
+            "id": _TEXT,
+            "source_transcript": _TEXT,
+            "source_chunk_id": {"type": "integer"},
+            "question_type": _TEXT,
+            "street": _TEXT,
+            "question": _TEXT,
+            "scenario": {
+                "type": "object",
+                "properties": {
+                    "position": _TEXT_OR_NULL,
+                    "stack_size": _TEXT_OR_NULL,
+                    "board": _TEXT_OR_NULL,
+                    "action": _TEXT_OR_NULL,
+                    "hero_hand": _TEXT_OR_NULL,
+                },
+            },
+            "correct_answer": _TEXT,
+            "key_concepts": _TEXT_LIST,
+            "difficulty": _TEXT,
+        }, ["question", "correct_answer", "street", "difficulty", "question_type"]),
+    },
+    "required": ["questions"],
+}
+
+RULES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "bet_sizing_rules": _array_of({
+            "rule_id": _TEXT, "source": _TEXT, "condition": _TEXT, "action": _TEXT,
+            "reasoning": _TEXT, "street": _TEXT, "priority": _TEXT, "examples": _TEXT_LIST,
+        }, ["condition", "action"]),
+        "flop_guidelines": _array_of({
+            "guideline_id": _TEXT, "source": _TEXT, "board_type": _TEXT,
+            "opponent_tendency": _TEXT, "sizing_strategy": _TEXT,
+            "value_bluff_relationship": _TEXT, "position_considerations": _TEXT,
+        }, ["sizing_strategy"]),
+        "turn_guidelines": _array_of({
+            "guideline_id": _TEXT, "source": _TEXT, "scenario": _TEXT, "key_question": _TEXT,
+            "recommended_action": _TEXT, "size_guideline": _TEXT, "multiway_considerations": _TEXT,
+        }, ["scenario", "recommended_action"]),
+        "river_guidelines": _array_of({
+            "guideline_id": _TEXT, "source": _TEXT, "scenario_type": _TEXT,
+            "opponent_range": _TEXT, "sizing_strategy": _TEXT, "stack_depth_factors": _TEXT,
+        }, ["scenario_type", "sizing_strategy"]),
+        "general_principles": _array_of({
+            "principle_id": _TEXT, "source": _TEXT, "principle": _TEXT,
+            "application": _TEXT, "exceptions": _TEXT,
+        }, ["principle"]),
+    },
+    "required": ["bet_sizing_rules", "flop_guidelines", "turn_guidelines",
+                 "river_guidelines", "general_principles"],
+}
+
+# create_json.py asks for a bare array; structured output needs an object around it
+GUIDELINES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "guidelines": _array_of({
+            "title": _TEXT,
+            "category": {"type": "string", "enum": [
+                "betting", "position", "board_texture", "hand_strength", "bluffing",
+                "value", "multiway", "bankroll", "exploitation",
+            ]},
+            "situation": _TEXT,
+            "action": _TEXT,
+            "reasoning": _TEXT,
+            "example": _TEXT,
+        }, ["title", "category", "situation", "action", "reasoning"]),
+    },
+    "required": ["guidelines"],
+}
+
+# Agent context -> schema
+SCHEMAS = {
+    "chunking": CHUNKS_SCHEMA,
+    "questions": QUESTIONS_SCHEMA,
+    "rules": RULES_SCHEMA,
+    "guidelines": GUIDELINES_SCHEMA,
+}
+
+def output_mode_params(mode: str, context: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Completion parameters that request a JSON answer in the given mode"""
+    if mode == "json_schema":
+        return {"response_format": {"type": "json_schema",
+                                    "json_schema": {"name": f"{context}_response", "schema": schema}}}
+    if mode == "tools":
+        name = f"record_{context}"
+        return {
+            "tools": [{"type": "function", "function": {
+                "name": name, "description": f"Record the extracted {context}", "parameters": schema}}],
+            "tool_choice": {"type": "function", "function": {"name": name}},
+        }
+    if mode == "json_object":
+        return {"response_format": {"type": "json_object"}}
+    return {}
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Job states every backend reports
+RUNNING, ENDED, FAILED = "running", "ended", "failed"
+
+# Seconds between status polls; provider batches usually finish within hours
+DEFAULT_POLL_SECONDS = 60
+
+# Request parameters a batch file must not carry
+TRANSPORT_PARAMS = {"timeout", "api_base", "api_key", "stream", "stream_options"}
+
+def _message_text(message: Any) -> str:
+    """Text of an OpenAI-style message, or the arguments of its first tool call"""
+    if isinstance(message, dict):
+        tool_calls = message.get("tool_calls")
+        return tool_calls[0]["function"]["arguments"] if tool_calls else message.get("content")
+    tool_calls = getattr(message, "tool_calls", None)
+    return tool_calls[0].function.arguments if tool_calls else message.content
+
+def _bare_model(model: str) -> str:
+    """Provider model name without a LiteLLM "provider/" prefix"""
+    return model.split("/", 1)[-1]
+
+class BatchBackend(ABC):
+    """
+    One provider's batch API. Requests are OpenAI-style chat parameters
+    keyed by a custom id; results map each id to the answer text, or None
+    when that request failed.
+    """
+
+    name = "base"
+    output_mode = "prompt"  # structured-output mode (see llm_client.OUTPUT_MODES) requests should use
+
+    @abstractmethod
+    def submit(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        """Create the job; returns its id"""
+
+    @abstractmethod
+    def status(self, job_id: str) -> str:
+        """RUNNING, ENDED or FAILED"""
+
+    @abstractmethod
+    def results(self, job_id: str) -> Dict[str, Optional[str]]:
+        """Answer text per custom id of an ended job"""
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches"""
+
+    name = "anthropic"
+    output_mode = "tools"
+
+    def __init__(self, api_key: Optional[str] = None):
+        import anthropic
+        self.client = anthropic.Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+
+    @staticmethod
+    def _params(params: Dict[str, Any]) -> Dict[str, Any]:
+        converted = {
+            "model": _bare_model(params["model"]),
+            "max_tokens": params["max_tokens"],
+            "messages": [m for m in params["messages"] if m["role"] != "system"],
+        }
+        # Messages API takes system prompts (with their cache_control blocks) separately
+        system = [m["content"] for m in params["messages"] if m["role"] == "system"]
+        if system:
+            converted["system"] = system[0]
+        if params.get("temperature") is not None:
+            converted["temperature"] = params["temperature"]
+        if params.get("tools"):
+            converted["tools"] = [{
+                "name": tool["function"]["name"],
+                "description": tool["function"].get("description", ""),
+                "input_schema": tool["function"]["parameters"],
+            } for tool in params["tools"]]
+        if params.get("tool_choice"):
+            converted["tool_choice"] = {"type": "tool", "name": params["tool_choice"]["function"]["name"]}
+        return converted
+
+    def submit(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": self._params(params)}
+            for custom_id, params in requests.items()
+        ])
+        return batch.id
+
+    def status(self, job_id: str) -> str:
+        batch = self.client.messages.batches.retrieve(job_id)
+        return ENDED if batch.processing_status == "ended" else RUNNING
+
+    def results(self, job_id: str) -> Dict[str, Optional[str]]:
+        answers = {}
+        for entry in self.client.messages.batches.results(job_id):
+            if entry.result.type != "succeeded":
+                answers[entry.custom_id] = None
+                continue
+            blocks = entry.result.message.content
+            tool_use = next((block for block in blocks if block.type == "tool_use"), None)
+            answers[entry.custom_id] = (json.dumps(tool_use.input) if tool_use else
+                                        "".join(block.text for block in blocks if block.type == "text"))
+        return answers
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API over /v1/chat/completions"""
+
+    name = "openai"
+    output_mode = "json_schema"
+
+    def __init__(self, api_key: Optional[str] = None):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        lines = []
+        for custom_id, params in requests.items():
+            body = {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS}
+            body["model"] = _bare_model(body["model"])
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST",
+                                     "url": "/v1/chat/completions", "body": body}))
+        batch_file = self.client.files.create(file=("batch.jsonl", "\n".join(lines).encode()),
+                                              purpose="batch")
+        batch = self.client.batches.create(input_file_id=batch_file.id,
+                                           endpoint="/v1/chat/completions", completion_window="24h")
+        return batch.id
+
+    def status(self, job_id: str) -> str:
+        batch = self.client.batches.retrieve(job_id)
+        if batch.status == "failed":
+            return FAILED
+        # Expired and cancelled jobs keep the answers they finished
+        return ENDED if batch.status in ("completed", "expired", "cancelled") else RUNNING
+
+    def results(self, job_id: str) -> Dict[str, Optional[str]]:
+        batch = self.client.batches.retrieve(job_id)
+        answers = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                answers[record["custom_id"]] = (_message_text(response["body"]["choices"][0]["message"])
+                                                if response.get("status_code") == 200 else None)
+        return answers
+
+def _litellm_answer(params: Dict[str, Any]) -> str:
+    from litellm import completion
+    return _message_text(completion(**params).choices[0].message)
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Batch API stand-in that keeps jobs as JSON files in a directory and
+    answers them with ordinary completion calls once they have been polled
+    polls_until_done times. Jobs survive restarts like provider jobs do,
+    which makes it suitable for local runs and tests.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path = Path(".batch_jobs"),
+                 answer: Callable[[Dict[str, Any]], str] = _litellm_answer,
+                 polls_until_done: int = 1, output_mode: str = "prompt"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.answer = answer
+        self.polls_until_done = polls_until_done
+        self.output_mode = output_mode
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _load(self, job_id: str) -> Dict[str, Any]:
+        with open(self._path(job_id), 'r') as f:
+            return json.load(f)
+
+    def _save(self, job_id: str, job: Dict[str, Any]):
+        tmp_path = self._path(job_id).with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._path(job_id))
+
+    def submit(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        job_id = f"local_{uuid.uuid4().hex[:12]}"
+        self._save(job_id, {"requests": requests, "polls": 0, "results": None})
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        job = self._load(job_id)
+        if job["results"] is None:
+            job["polls"] += 1
+            if job["polls"] < self.polls_until_done:
+                self._save(job_id, job)
+                return RUNNING
+            results = {}
+            for custom_id, params in job["requests"].items():
+                try:
+                    results[custom_id] = self.answer(params)
+                except Exception as e:
+                    print(f"Local batch request {custom_id} failed: {e}")
+                    results[custom_id] = None
+            job["results"] = results
+            self._save(job_id, job)
+        return ENDED
+
+    def results(self, job_id: str) -> Dict[str, Optional[str]]:
+        return self._load(job_id)["results"] or {}
+
+def get_batch_backend(model: str, api_key: Optional[str] = None) -> BatchBackend:
+    """Batch backend of the provider serving model"""
+    name = model.lower()
+    if "claude" in name or "anthropic" in name:
+        return AnthropicBatchBackend(api_key)
+    if "gpt" in name or "openai" in name:
+        return OpenAIBatchBackend(api_key)
+    raise ValueError(f"No batch API known for {model}; pass a LocalBatchBackend instead")
+
+class BatchJobs:
+    """
+    Submitted batch jobs and what each request was for, in a JSON file.
+
+    A run that restarts finds its jobs here and polls them instead of
+    submitting (and paying for) the same prompts again. A job is dropped
+    only after its results have been stored.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.data: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+
+    def _save(self):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    async def run(self, key: str, backend: BatchBackend,
+                  build: Callable[[], Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]],
+                  poll_seconds: float = DEFAULT_POLL_SECONDS) -> Tuple[Dict[str, Any], Dict[str, Optional[str]]]:
+        """
+        Resume the job stored under key, or submit a new one, and wait for it
+
+        Args:
+            key: Name of the job within this file, e.g. "chunk"
+            backend: Provider backend; must match the one a stored job was submitted to
+            build: Returns (requests by custom id, metadata by custom id); only
+                called when no job is stored. No requests means nothing to submit
+            poll_seconds: Pause between status polls
+
+        Returns:
+            (metadata by custom id, answer text by custom id); call finish(key)
+            once the answers are stored
+        """
+        job = self.data.get(key)
+        if job is not None and job["backend"] != backend.name:
+            raise ValueError(f"Batch job {job['job_id']} was submitted to {job['backend']}, not {backend.name}")
+        if job is None:
+            requests, meta = build()
+            if not requests:
+                return {}, {}
+            job_id = backend.submit(requests)
+            job = self.data[key] = {"job_id": job_id, "backend": backend.name, "meta": meta,
+                                    "submitted": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            self._save()
+            print(f"📦 Submitted batch job {job_id} with {len(requests)} requests")
+        else:
+            print(f"📦 Resuming batch job {job['job_id']} submitted {job['submitted']}")
+
+        while True:
+            status = await asyncio.to_thread(backend.status, job["job_id"])
+            if status == FAILED:
+                self.finish(key)
+                raise RuntimeError(f"Batch job {job['job_id']} failed")
+            if status == ENDED:
+                break
+            print(f"⏳ Batch job {job['job_id']} still running; next check in {poll_seconds:.0f}s")
+            await asyncio.sleep(poll_seconds)
+
+        results = await asyncio.to_thread(backend.results, job["job_id"])
+        return job["meta"], results
+
+    def finish(self, key: str):
+        if self.data.pop(key, None) is not None:
+            self._save()
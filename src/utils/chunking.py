@@ -0,0 +1,128 @@
+from typing import Callable, Iterable, Iterator, List
+
+from src.models.config import ModelConfig
+from src.utils.text_utils import sentence_spans
+
+# Context window assumed when LiteLLM does not know the model
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Extraction answers run to about a third of the transcript they cover, so a
+# chunk much larger than this many times max_tokens risks a truncated answer
+INPUT_PER_OUTPUT_TOKEN = 3
+
+TokenCounter = Callable[[str], int]
+
+def token_counter(model: str) -> TokenCounter:
+    """
+    Token count function for model's tokenizer, via LiteLLM; falls back to
+    ~4 characters per token when LiteLLM is not installed
+    """
+    try:
+        from litellm import token_counter as litellm_token_counter
+    except ImportError:
+        return lambda text: len(text) // 4 + 1
+    return lambda text: litellm_token_counter(model=model, text=text)
+
+def context_window(config: ModelConfig) -> int:
+    """Input tokens config's model accepts"""
+    if config.context_window:
+        return config.context_window
+    try:
+        import litellm
+        return litellm.get_model_info(config.model).get("max_input_tokens") or DEFAULT_CONTEXT_WINDOW
+    except Exception:
+        return DEFAULT_CONTEXT_WINDOW  # LiteLLM missing or the model unknown to it
+
+def chunk_token_budget(config: ModelConfig, reserved: int = 0) -> int:
+    """
+    Transcript tokens per chunk: config.chunk_tokens, or INPUT_PER_OUTPUT_TOKEN
+    times max_tokens, never more than the context window leaves after the
+    answer and the reserved tokens (the instructions sent with each chunk)
+    """
+    wanted = config.chunk_tokens or config.max_tokens * INPUT_PER_OUTPUT_TOKEN
+    available = context_window(config) - config.max_tokens - reserved
+    return max(min(wanted, available), 1)
+
+def iter_sentences(lines: Iterable[str], max_chars: int = 2000) -> Iterator[str]:
+    """
+    Sentences and "## Section" header lines of a transcript read line by line
+
+    Only the sentence still being read is held in memory, so lines can come
+    straight from an open file. Unpunctuated stretches (common in
+    auto-generated captions) are cut at the last line break once they pass
+    max_chars, so they still yield pieces that end on a caption line.
+    """
+    pending = ""
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("## "):
+            if pending.strip():
+                yield pending.strip()
+            pending = ""
+            yield line.strip()
+            continue
+        pending = f"{pending}\n{line}" if pending else line
+        spans = sentence_spans(pending)
+        # The last sentence may continue on the next line
+        for start, end in spans[:-1]:
+            yield pending[start:end]
+        pending = pending[spans[-1][0]:] if spans else ""
+        if len(pending) > max_chars:
+            cut = pending.rfind("\n")
+            if cut <= 0:
+                cut = len(pending)
+            yield pending[:cut].strip()
+            pending = pending[cut:].lstrip("\n")
+    if pending.strip():
+        yield pending.strip()
+
+def _split_long(sentence: str, tokens: int, budget: int) -> List[str]:
+    """Word windows of a sentence that alone exceeds the budget"""
+    words = sentence.split()
+    per_window = max(int(len(words) * budget / tokens), 1)
+    return [" ".join(words[i:i + per_window]) for i in range(0, len(words), per_window)]
+
+def token_chunks(sentences: Iterable[str], budget: int, count_tokens: TokenCounter,
+                 overlap: int = 0) -> Iterator[str]:
+    """
+    Pack sentences into chunks of at most budget tokens, lazily
+
+    A chunk ends early at a "## Section" header once it is half full, so
+    sections start chunks where possible. Sentences of up to overlap tokens
+    from the end of a chunk are repeated at the start of the next one within
+    the same section. A single sentence over the budget is split into word windows.
+
+    Args:
+        sentences: Sentences and header lines, e.g. from iter_sentences
+        budget: Token limit per chunk
+        count_tokens: Tokenizer of the target model, e.g. from token_counter
+        overlap: Token limit of the repeated context
+    """
+    chunk: List[str] = []
+    sizes: List[int] = []
+    used = 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence)
+        if tokens > budget:
+            pieces = _split_long(sentence, tokens, budget)
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            size = count_tokens(piece) if len(pieces) > 1 else tokens
+            header = piece.startswith("## ")
+            if chunk and (used + size > budget or (header and used >= budget // 2)):
+                yield "\n".join(chunk)
+                # Carry the last sentences over unless a new section starts here
+                keep = 0
+                if not header:
+                    carried = 0
+                    while keep < len(chunk) and carried + sizes[-1 - keep] <= min(overlap, budget - size):
+                        carried += sizes[-1 - keep]
+                        keep += 1
+                chunk, sizes = chunk[len(chunk) - keep:], sizes[len(sizes) - keep:]
+                used = sum(sizes)
+            chunk.append(piece)
+            sizes.append(size)
+            used += size
+    if chunk:
+        yield "\n".join(chunk)
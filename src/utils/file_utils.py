@@ -1,7 +1,10 @@
 import json
+import os
 from pathlib import Path
 from typing import Dict, Any, List
 
+from src.utils.jsonl_store import JsonlStore
+
 def ensure_directory_exists(path: Path):
     """Create directory if it doesn't exist"""
     path.mkdir(parents=True, exist_ok=True)
@@ -18,12 +21,17 @@ def load_json(file_path: Path) -> Any:
         return json.load(f)
 
 def save_json(file_path: Path, data: Any):
-    """Save data to JSON file"""
-    with open(file_path, 'w') as f:
+    """Save data to JSON file atomically (write a temp file, then rename)"""
+    tmp_path = Path(file_path).with_name(Path(file_path).name + ".tmp")
+    with open(tmp_path, 'w') as f:
         json.dump(data, f, indent=2)
+    os.replace(tmp_path, file_path)
 
 def append_to_json_list(file_path: Path, new_items: List[Any]):
-    """Append items to a JSON list file"""
+    """Append items to a list file; .jsonl files are appended to in place"""
+    if Path(file_path).suffix == ".jsonl":
+        JsonlStore(file_path).append(new_items)
+        return
     existing_data = load_json(file_path)
     existing_data.extend(new_items)
     save_json(file_path, existing_data)
\ No newline at end of file
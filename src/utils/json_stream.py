@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+class SchemaError(ValueError):
+    """Streamed JSON does not have the expected shape"""
+
+class JsonObjectStream:
+    """
+    Incremental parser for responses shaped like {"collection": [{...}, ...], ...}.
+
+    feed() takes the text as it arrives and returns every array element
+    completed so far, so callers can persist items before the response ends.
+    Keys not in the schema are skipped; anything else that breaks the shape
+    (a top-level array, a collection that is not an array, a non-object
+    element or one missing a required field) raises SchemaError immediately.
+    Text before the opening brace, such as a code fence, is ignored.
+    """
+
+    def __init__(self, schema: Dict[str, Sequence[str]]):
+        """
+        Args:
+            schema: Collection name -> fields every element must have
+        """
+        self.schema = schema
+        self.result: Dict[str, List[Dict[str, Any]]] = {name: [] for name in schema}
+        self.depth = 0
+        self.started = False
+        self.finished = False
+        self._in_string = False
+        self._escape = False
+        self._string: List[str] = []   # current string at depth 1, a candidate key
+        self._key = None               # last key read at depth 1
+        self._expect_value = False     # a ':' at depth 1 is waiting for its value
+        self._collection = None        # schema collection whose array is open
+        self._element: List[str] = []  # text of the element being captured
+        self._capturing = False
+
+    def feed(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Consume more text; returns (collection, element) for each element it completed"""
+        completed = []
+        start = 0
+        for i, ch in enumerate(text):
+            if self.finished:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self.depth == 1 and not self._expect_value:
+                        self._key = "".join(self._string)
+                elif self.depth == 1:
+                    self._string.append(ch)
+                continue
+
+            if not self.started:
+                if ch == '{':
+                    self.started = True
+                    self.depth = 1
+                elif ch == '[':
+                    raise SchemaError("Expected a JSON object, got an array")
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+                if self.depth == 1 and self._expect_value and self._key in self.schema:
+                    raise SchemaError(f"{self._key!r} is not an array")
+                if self.depth == 2 and self._collection and not self._capturing:
+                    raise SchemaError(f"Element of {self._collection!r} is not an object")
+            elif ch in '{[':
+                self.depth += 1
+                if self.depth == 2 and self._key in self.schema:
+                    if ch != '[':
+                        raise SchemaError(f"{self._key!r} is not an array")
+                    self._collection = self._key
+                elif self.depth == 3 and self._collection:
+                    if ch != '{':
+                        raise SchemaError(f"Element of {self._collection!r} is not an object")
+                    self._capturing = True
+                    self._element = []
+                    start = i
+            elif ch in '}]':
+                self.depth -= 1
+                if self._capturing and self.depth == 2:
+                    self._element.append(text[start:i + 1])
+                    completed.append((self._collection, self._finish_element()))
+                elif self.depth == 1:
+                    self._collection = None
+                elif self.depth == 0:
+                    self.finished = True
+            elif ch == ':' or ch == ',':
+                if self.depth == 1:
+                    self._expect_value = ch == ':'
+            elif ch.isspace():
+                pass
+            elif self.depth == 2 and self._collection:
+                raise SchemaError(f"Element of {self._collection!r} is not an object")
+            elif self.depth == 1 and self._expect_value and self._key in self.schema:
+                raise SchemaError(f"{self._key!r} is not an array")
+
+        if self._capturing:
+            self._element.append(text[start:])
+        return completed
+
+    def _finish_element(self) -> Dict[str, Any]:
+        self._capturing = False
+        raw = "".join(self._element)
+        self._element = []
+        try:
+            element = json.loads(raw, strict=False)  # tolerate raw newlines inside strings
+        except json.JSONDecodeError as e:
+            raise SchemaError(f"Element of {self._collection!r} is not valid JSON: {e}")
+        missing = [field for field in self.schema[self._collection] if field not in element]
+        if missing:
+            raise SchemaError(f"Element of {self._collection!r} is missing {missing}")
+        self.result[self._collection].append(element)
+        return element
@@ -1,96 +1,296 @@
 import json
 import re
-from typing import Dict, Any
-
-def clean_json_string(json_str: str) -> str:
-    """Clean up LLM-generated JSON string to fix common issues"""
-    # Remove markdown code blocks
-    if json_str.strip().startswith("```json"):
-        json_str = json_str.strip()[7:]
-    if json_str.strip().endswith("```"):
-        json_str = json_str.strip()[:-3]
-    
-    # Remove any leading/trailing whitespace
-    json_str = json_str.strip()
-    
-    # Fix common control character issues
-    # Replace problematic characters in string values only
-    def fix_string_content(match):
-        content = match.group(1)
-        # Fix common control characters
-        content = content.replace('\n', '\\n')
-        content = content.replace('\r', '\\r')
-        content = content.replace('\t', '\\t')
-        content = content.replace('\b', '\\b')
-        content = content.replace('\f', '\\f')
-        # Fix unescaped quotes
-        content = content.replace('"', '\\"')
-        return f'"{content}"'
-    
-    # Apply fixes to content within quotes
-    # This regex finds content between quotes that isn't already escaped
-    json_str = re.sub(r'"([^"\\]*(\\.[^"\\]*)*)"', fix_string_content, json_str)
-    
-    return json_str
+from typing import Any, Dict, List, Tuple
 
-def parse_json_response(response: str, context: str = "") -> Dict[str, Any]:
-    """Parse JSON response with error handling and cleanup"""
+class JsonRepairError(ValueError):
+    """No JSON value could be recovered from the text"""
+
+_NUMBER = re.compile(r'-?(?:\d+)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_LITERALS = {"true": True, "false": False, "null": None,
+             "True": True, "False": False, "None": None}
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_CLOSERS = {'{': '}', '[': ']'}
+
+def _after_space(text: str, pos: int) -> str:
+    """First non-whitespace character at or after pos, or "" at the end"""
+    n = len(text)
+    while pos < n and text[pos] in ' \t\r\n':
+        pos += 1
+    return text[pos] if pos < n else ""
+
+def repair_json(text: str, openers: str = "{[") -> Tuple[Any, List[str]]:
+    """
+    Parse LLM output as JSON, repairing common damage in one linear pass
+
+    Skips anything before the first opener (prose, code fences) and after the
+    value, escapes raw control characters and stray inner quotes in strings,
+    drops trailing commas, inserts missing ones, fixes mismatched brackets,
+    accepts Python literals, and closes whatever a truncated tail left open.
+
+    Args:
+        text: Raw model output
+        openers: Characters that may start the value, e.g. "{" for an object
+
+    Returns:
+        (value, recoveries) where recoveries describes each kind of repair made
+
+    Raises:
+        JsonRepairError: if the text contains no opener
+    """
+    counts: Dict[str, int] = {}
+
+    def recovered(what: str):
+        counts[what] = counts.get(what, 0) + 1
+
+    n = len(text)
+    pos = 0
+    while pos < n and text[pos] not in openers:
+        pos += 1
+    if pos == n:
+        raise JsonRepairError(f"No JSON value starting with {openers!r} found")
+    if text[:pos].strip():
+        recovered("skipped leading text")
+
+    # Each frame: [opener, container, pending key, expecting a value (or key) next]
+    stack: List[list] = []
+    result = None
+    done = False
+
+    def add(value: Any):
+        nonlocal result, done
+        if not stack:
+            result, done = value, True
+            return
+        frame = stack[-1]
+        if frame[0] == '[':
+            frame[1].append(value)
+        elif frame[2] is None:
+            if isinstance(value, (dict, list)):
+                recovered("dropped value without key")
+                frame[3] = False
+                return
+            if not isinstance(value, str):
+                recovered("converted non-string key")
+                value = json.dumps(value)
+            frame[2] = value
+            return
+        else:
+            frame[1][frame[2]] = value
+            frame[2] = None
+        frame[3] = False
+
+    while pos < n and not done:
+        ch = text[pos]
+        frame = stack[-1] if stack else None
+
+        if ch in ' \t\r\n':
+            pos += 1
+            continue
+
+        # A value follows a value without a comma: insert one
+        if frame is not None and not frame[3] and ch not in ',:]}' and (frame[0] == '[' or frame[2] is None):
+            recovered("inserted missing comma")
+            frame[3] = True
+
+        if ch in '{[':
+            stack.append([ch, {} if ch == '{' else [], None, True])
+            pos += 1
+        elif ch in '}]':
+            if frame is None:
+                pos += 1
+                continue
+            if ch != _CLOSERS[frame[0]]:
+                recovered("fixed mismatched bracket")
+            if frame[3] and frame[1] and frame[2] is None:
+                recovered("removed trailing comma")
+            if frame[0] == '{' and frame[2] is not None:
+                recovered("dropped key without value")
+            stack.pop()
+            pos += 1
+            add(frame[1])
+        elif ch == ',':
+            if frame is not None:
+                if frame[3]:
+                    recovered("removed extra comma")
+                frame[3] = True
+            pos += 1
+        elif ch == ':':
+            pos += 1
+        elif ch == '"' or ch == "'":
+            # String: a quote only closes it when followed by structure
+            quote = ch
+            pos += 1
+            parts = []
+            start = pos
+            surrogates = False
+            while True:
+                if pos >= n:
+                    parts.append(text[start:pos])
+                    recovered("closed truncated string")
+                    break
+                c = text[pos]
+                if c == '\\':
+                    parts.append(text[start:pos])
+                    esc = text[pos + 1] if pos + 1 < n else ""
+                    if esc in _ESCAPES:
+                        parts.append(_ESCAPES[esc])
+                        pos += 2
+                    elif esc == 'u' and re.fullmatch(r'[0-9a-fA-F]{4}', text[pos + 2:pos + 6]):
+                        code = int(text[pos + 2:pos + 6], 16)
+                        surrogates = surrogates or 0xD800 <= code <= 0xDFFF
+                        parts.append(chr(code))
+                        pos += 6
+                    else:
+                        recovered("kept invalid escape")
+                        parts.append(esc)
+                        pos += 2
+                    start = pos
+                elif c == quote:
+                    if _after_space(text, pos + 1) in ('', ',', ':', '}', ']', '"'):
+                        parts.append(text[start:pos])
+                        pos += 1
+                        break
+                    recovered("kept unescaped quote inside string")
+                    pos += 1
+                elif c < ' ':
+                    recovered("escaped control character")
+                    pos += 1
+                else:
+                    pos += 1
+            if quote == "'":
+                recovered("converted single-quoted string")
+            value = "".join(parts)
+            if surrogates:
+                # Join \ud83d\ude00-style pairs into one character
+                value = value.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+            add(value)
+        else:
+            match = _NUMBER.match(text, pos)
+            if match:
+                number = match.group()
+                add(float(number) if any(c in number for c in '.eE') else int(number))
+                pos = match.end()
+                continue
+            word = re.match(r'[A-Za-z_]+', text[pos:pos + 6])
+            if word and word.group() in _LITERALS:
+                if word.group() not in ("true", "false", "null"):
+                    recovered("converted Python literal")
+                add(_LITERALS[word.group()])
+                pos += len(word.group())
+                continue
+            recovered("skipped unexpected character")
+            pos += 1
+
+    if not done:
+        recovered("closed truncated containers")
+        while stack:
+            frame = stack.pop()
+            add(frame[1])
+    elif text[pos:].strip().strip('`').strip():
+        recovered("ignored trailing text")
+
+    recoveries = [what if count == 1 else f"{what} (x{count})" for what, count in counts.items()]
+    return result, recoveries
+
+# Collections an answer must hold, per context; rules answers need at least one
+EXPECTED_KEYS = {
+    "chunking": ("chunks",),
+    "questions": ("questions",),
+    "rules": ("bet_sizing_rules", "flop_guidelines", "turn_guidelines",
+              "river_guidelines", "general_principles"),
+}
+
+def _shape_problem(data: Any, context: str) -> Tuple[str, bool]:
+    """
+    Why data is not a usable answer for context ("" if it is), and whether
+    non-object items had to be dropped; fills in missing rule categories
+    """
+    keys = EXPECTED_KEYS.get(context)
+    if keys is None:
+        return "", False
+    if not isinstance(data, dict):
+        return f"expected an object, got {type(data).__name__}", False
+    if not any(key in data for key in keys):
+        return (f"missing {keys[0]!r}" if len(keys) == 1 else f"none of {list(keys)}"), False
+    dropped = False
+    for key in keys:
+        items = data.setdefault(key, [])
+        if not isinstance(items, list):
+            return f"{key!r} is {type(items).__name__}, not an array", False
+        if not all(isinstance(item, dict) for item in items):
+            print(f"Dropped non-object items from {key!r} for {context}")
+            data[key] = [item for item in items if isinstance(item, dict)]
+            dropped = True
+    return "", dropped
+
+def parse_json_outcome(response: str, context: str = "") -> Tuple[Dict[str, Any], str]:
+    """
+    Parse a JSON object from a model response, repairing it when needed
+
+    Returns:
+        (data, outcome) where outcome is "clean", "repaired" or "failed"; a
+        failed parse, or an answer without the context's collections, gives
+        the empty result of the context's expected shape
+    """
+    data, outcome = None, "failed"
     try:
-        # First attempt - try parsing as-is
-        cleaned_response = response.strip()
-        if cleaned_response.startswith("```json"):
-            cleaned_response = cleaned_response[7:]
-        if cleaned_response.endswith("```"):
-            cleaned_response = cleaned_response[:-3]
-        cleaned_response = cleaned_response.strip()
-        
-        return json.loads(cleaned_response)
-        
-    except json.JSONDecodeError as e:
-        print(f"First parse attempt failed for {context}: {e}")
-        print("Attempting to clean JSON...")
-        
+        data, outcome = json.loads(response), "clean"
+    except (json.JSONDecodeError, TypeError) as e:
+        error = e
         try:
-            # Second attempt - clean the JSON string
-            cleaned_json = clean_json_string(response)
-            return json.loads(cleaned_json)
-            
-        except json.JSONDecodeError as e2:
-            print(f"Second parse attempt failed for {context}: {e2}")
-            print("Attempting regex extraction...")
-            
-            try:
-                # Third attempt - extract JSON from response using regex
-                json_pattern = r'\{.*\}'
-                matches = re.findall(json_pattern, response, re.DOTALL)
-                
-                if matches:
-                    # Try the largest JSON object found
-                    largest_match = max(matches, key=len)
-                    cleaned_match = clean_json_string(largest_match)
-                    return json.loads(cleaned_match)
-                else:
-                    raise Exception("No JSON object found in response")
-                    
-            except (json.JSONDecodeError, Exception) as e3:
-                print(f"All JSON parsing attempts failed for {context}")
-                print(f"Original error: {e}")
-                print(f"Cleaned JSON error: {e2}")
-                print(f"Regex extraction error: {e3}")
-                print(f"Raw response (first 500 chars): {response[:500]}")
-                
-                # Last resort - try to salvage what we can
-                if context == "chunking":
-                    return {"chunks": []}
-                elif context == "questions":
-                    return {"questions": []}
-                elif context == "rules":
-                    return {
-                        "bet_sizing_rules": [],
-                        "flop_guidelines": [],
-                        "turn_guidelines": [],
-                        "river_guidelines": [],
-                        "general_principles": []
-                    }
-                else:
-                    raise Exception(f"Failed to parse JSON response {context}: {e}")
\ No newline at end of file
+            data, recoveries = repair_json(response or "", "{")
+            outcome = "repaired"
+            if recoveries:
+                print(f"Recovered JSON for {context}: {', '.join(recoveries)}")
+        except JsonRepairError as e:
+            print(f"JSON parsing failed for {context}")
+            print(f"Original error: {error}")
+            print(f"Repair error: {e}")
+            print(f"Raw response (first 500 chars): {(response or '')[:500]}")
+
+    if outcome != "failed":
+        problem, dropped = _shape_problem(data, context)
+        if not problem:
+            return data, "repaired" if dropped else outcome
+        error = problem
+        print(f"Unexpected JSON shape for {context}: {problem}")
+        print(f"Raw response (first 500 chars): {(response or '')[:500]}")
+
+    # Last resort - empty result of the expected shape
+    if context == "chunking":
+        return {"chunks": []}, "failed"
+    elif context == "questions":
+        return {"questions": []}, "failed"
+    elif context == "rules":
+        return {
+            "bet_sizing_rules": [],
+            "flop_guidelines": [],
+            "turn_guidelines": [],
+            "river_guidelines": [],
+            "general_principles": []
+        }, "failed"
+    else:
+        raise Exception(f"Failed to parse JSON response {context}: {error}")
+
+def parse_json_response(response: str, context: str = "") -> Dict[str, Any]:
+    """Parse a JSON object from a model response, repairing it when needed"""
+    return parse_json_outcome(response, context)[0]
+
+if __name__ == "__main__":
+    import time
+
+    # Pathological ~50 KB inputs: the old greedy/nested-quantifier regexes backtracked on these
+    item = '{"question": "Bet 1/3 pot?\n", "tags": ["a", "b",], "note": "he said "fold" there"},'
+    cases = {
+        "valid": json.dumps({"questions": [{"question": "x" * 40, "n": i} for i in range(800)]}),
+        "fenced, trailing commas, raw newlines": "```json\n{\"questions\": [" + item * 600 + "]}\n```",
+        "truncated": '{"questions": [' + item * 600,
+        "unbalanced braces": "{" * 25_000 + "x" * 25_000,
+        "unterminated quotes": '{"a": "' + '\\"' * 25_000,
+        "many quotes": '{"q": "' + '" ' * 25_000 + '"}',
+    }
+    for name, text in cases.items():
+        start = time.perf_counter()
+        _, recoveries = repair_json(text, "{")
+        elapsed = time.perf_counter() - start
+        print(f"{name:40s} {len(text) / 1024:5.0f} KB  {elapsed * 1000:7.1f} ms  {recoveries[:3]}")
@@ -0,0 +1,139 @@
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# A line {"_delete": {field: value}} removes every earlier record where record[field] == value
+DELETE_KEY = "_delete"
+
+class JsonlStore:
+    """
+    Append-only JSON Lines file with cross-process locking.
+
+    Writers append whole lines under an exclusive lock on a sidecar
+    ``.lock`` file, so concurrent writers never interleave or lose records.
+    Replacing a group of records appends a delete marker followed by the new
+    records; compact() rewrites only the live records to a temporary file
+    and renames it over the original, so the store is never half-written.
+    Readers stream line by line and skip a torn last line left by a crash.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.skipped_lines = 0
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a+b") as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_lines(self, lines: List[str]):
+        if not lines:
+            return
+        data = "".join(line + "\n" for line in lines).encode("utf-8")
+        with self._locked():
+            with open(self.path, "ab") as f:
+                # Start on a fresh line if a crash left a torn record at the end
+                if f.tell() > 0:
+                    with open(self.path, "rb") as tail:
+                        tail.seek(-1, os.SEEK_END)
+                        if tail.read(1) != b"\n":
+                            data = b"\n" + data
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append(self, records: Iterable[Dict[str, Any]]):
+        """Append records in one locked write"""
+        self._write_lines([json.dumps(record, ensure_ascii=False) for record in records])
+
+    def replace(self, field: str, value: Any, records: Iterable[Dict[str, Any]]):
+        """Atomically supersede every record with record[field] == value by records"""
+        marker = json.dumps({DELETE_KEY: {field: value}}, ensure_ascii=False)
+        self._write_lines([marker] + [json.dumps(record, ensure_ascii=False) for record in records])
+
+    def _raw_lines(self, f, limit: int, count_skipped: bool = False) -> Iterator[Dict[str, Any]]:
+        """Decoded lines of an open file up to byte offset limit"""
+        f.seek(0)
+        while f.tell() < limit:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                self.skipped_lines += count_skipped
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
+
+    def iter_records(self, where: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream live records
+
+        A first pass collects only the delete markers, so memory stays
+        proportional to the number of replacements, not records. Both passes
+        read the same open file up to the same length, so a concurrent append
+        or compaction never mixes two versions.
+
+        Args:
+            where: Only yield records whose fields equal these values
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            limit = os.fstat(f.fileno()).st_size
+
+            # field -> {value: position of the last delete marker}
+            deleted: Dict[str, Dict[Any, int]] = {}
+            for position, record in enumerate(self._raw_lines(f, limit, count_skipped=True)):
+                if DELETE_KEY in record:
+                    for field, value in record[DELETE_KEY].items():
+                        deleted.setdefault(field, {})[value] = position
+
+            for position, record in enumerate(self._raw_lines(f, limit)):
+                if DELETE_KEY in record:
+                    continue
+                if any(marks.get(record.get(field), -1) > position
+                       for field, marks in deleted.items()):
+                    continue
+                if where and any(record.get(k) != v for k, v in where.items()):
+                    continue
+                yield record
+
+    def compact(self) -> int:
+        """Rewrite the file with live records only; returns the number of records kept"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with self._locked():
+            kept = 0
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in self.iter_records():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    kept += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        return kept
@@ -1,22 +1,217 @@
 import asyncio
-from typing import Dict, Any
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
+import litellm
 from litellm import acompletion
 from src.models.config import ModelConfig
+from src.prompts import PROMPT_VERSION, Prompt
+from src.schemas import SCHEMAS, output_mode_params
+from src.utils.json_utils import parse_json_outcome
+from src.utils.parse_stats import ParseStats
+from src.utils.rate_limiter import (
+    backoff_delay,
+    estimate_tokens,
+    get_rate_limiter,
+    input_token_split,
+    is_rate_limit_error,
+    retry_after_seconds,
+    usage_tokens,
+)
+from src.utils.response_cache import bypass_requested, get_response_cache
+
+# Ways to ask for JSON, most reliable first; "prompt" relies on the prompt text alone
+OUTPUT_MODES = ("json_schema", "tools", "json_object", "prompt")
+
+def supported_output_modes(model: str) -> List[str]:
+    """Structured-output modes LiteLLM reports for a model, best first; always ends with prompt"""
+    checks = {
+        "json_schema": lambda: litellm.supports_response_schema(model=model),
+        "tools": lambda: litellm.supports_function_calling(model=model),
+        "json_object": lambda: "response_format" in (litellm.get_supported_openai_params(model=model) or []),
+    }
+    modes = []
+    for mode, check in checks.items():
+        try:
+            if check():
+                modes.append(mode)
+        except Exception:
+            pass  # unknown model or an older LiteLLM without the helper
+    return modes + ["prompt"]
+
+def uses_cache_control(model: str) -> bool:
+    """
+    True for Anthropic models, which only cache prompt prefixes marked with
+    cache_control; OpenAI caches long prefixes automatically
+    """
+    name = model.lower()
+    return "claude" in name or name.startswith("anthropic/")
+
+def is_unsupported_output_error(error: Exception) -> bool:
+    """True when the provider rejected the response_format / tools parameters themselves"""
+    status = getattr(error, "status_code", None)
+    message = str(error).lower()
+    return (status == 400 or "badrequest" in type(error).__name__.lower()) and any(
+        word in message for word in ("response_format", "json_schema", "tool", "function"))
 
 class LLMClient:
-    """Centralized LiteLLM client with retry logic and error handling"""
+    """Centralized LiteLLM client with rate limiting, retry logic and error handling"""
     
     def __init__(self, config: ModelConfig):
         self.config = config
+        self.rate_limiter = get_rate_limiter(config)
+        self.response_cache = get_response_cache()
+        self.parse_stats = ParseStats()
+        self.input_tokens = {"calls": 0, "cached": 0, "cache_write": 0, "uncached": 0}
+        self._output_modes: Optional[List[str]] = None
     
-    async def call(self, prompt: str, **kwargs) -> str:
-        """Make LiteLLM API call with retry logic"""
-        max_retries = 3
-        last_error = None
+    async def call(self, prompt: Union[str, Prompt], use_cache: Optional[bool] = None, bypass_cache: bool = False,
+                   prompt_version: str = PROMPT_VERSION, **kwargs) -> str:
+        """
+        Make LiteLLM API call, answered from the response cache when possible
+        
+        Args:
+            prompt: User prompt, or a Prompt whose instructions are sent first as a cacheable system message
+            use_cache: Override config.use_cache for this call
+            bypass_cache: Ignore a cached answer and store the fresh one
+            prompt_version: Template version, part of the cache key
+        """
+        call_params = self._call_params(prompt, kwargs)
+        
+        if not (self.config.use_cache if use_cache is None else use_cache):
+            return await self._call_with_retries(call_params)
+        
+        key = self.response_cache.make_key(call_params, prompt_version)
+        return await self.response_cache.get_or_call(
+            key, self.config.model, lambda: self._call_with_retries(call_params), bypass=bypass_cache
+        )
+    
+    async def forget(self, prompt: Union[str, Prompt], use_cache: Optional[bool] = None, bypass_cache: bool = False,
+               prompt_version: str = PROMPT_VERSION, **kwargs):
+        """Drop the cached answer of a call, e.g. one that could not be parsed, so the next run asks again"""
+        if self.config.use_cache if use_cache is None else use_cache:
+            call_params = self._call_params(prompt, kwargs)
+            key = self.response_cache.make_key(call_params, prompt_version)
+            await asyncio.to_thread(self.response_cache.delete, key)
+    
+    def output_modes(self) -> List[str]:
+        """Modes call_json tries in order; just "prompt" when structured output is off"""
+        if not self.config.structured_output:
+            return ["prompt"]
+        if self._output_modes is None:
+            self._output_modes = supported_output_modes(self.config.model)
+        return self._output_modes
+    
+    async def call_json(self, prompt: Union[str, Prompt], context: str, schema: Optional[Dict[str, Any]] = None,
+                        **kwargs) -> Dict[str, Any]:
+        """
+        Call the model for a JSON object, using structured output where supported
+        
+        Tries the best mode the model supports (JSON schema, then a forced tool
+        call, then plain JSON mode). A mode the provider rejects is dropped for
+        the rest of the run and the next one is tried, down to the prompt text
+        alone. Every parse is recorded in parse_stats.
+        
+        Args:
+            prompt: User prompt
+            context: Agent context ("chunking", "questions", "rules", "guidelines")
+            schema: JSON schema of the answer; defaults to SCHEMAS[context]
+            **kwargs: Passed to call()
+        """
+        schema = schema or SCHEMAS[context]
+        modes = self.output_modes()
+        for mode in list(modes):
+            start = time.perf_counter()
+            try:
+                response = await self.call(prompt, **kwargs, **output_mode_params(mode, context, schema))
+            except Exception as error:
+                if mode == "prompt" or not is_unsupported_output_error(error):
+                    raise
+                print(f"⚠️ {mode} output rejected for {self.config.model}, falling back: {error}")
+                if mode in modes:
+                    modes.remove(mode)
+                continue
+            
+            data, outcome = self.parse_result(response, context, mode, prompt, time.perf_counter() - start)
+            if outcome == "failed":
+                # Otherwise every re-run would replay the same unusable answer
+                await self.forget(prompt, **kwargs, **output_mode_params(mode, context, schema))
+            return data
+    
+    def parse_result(self, response: Optional[str], context: str, mode: str,
+                     prompt: Union[str, Prompt] = "", seconds: float = 0.0) -> Tuple[Dict[str, Any], str]:
+        """
+        Parse an answer and record the outcome in parse_stats (prompt only feeds the token estimate)
+        
+        Returns:
+            (data, outcome) as from parse_json_outcome
+        """
+        data, outcome = parse_json_outcome(response, context)
+        tokens = estimate_tokens({"messages": [{"content": prompt}]}) + len(response or "") // 4
+        self.parse_stats.record(context, mode, outcome, seconds, tokens)
+        return data, outcome
+    
+    def batch_request(self, prompt: Union[str, Prompt], context: str, mode: str, **kwargs) -> Dict[str, Any]:
+        """Chat parameters of one batch-API request, asking for JSON in the given mode"""
+        params = self._call_params(prompt, kwargs)
+        params.pop("timeout", None)
+        params.pop("api_base", None)
+        params.update(output_mode_params(mode, context, SCHEMAS[context]))
+        return params
+    
+    async def stream(self, prompt: Union[str, Prompt], use_cache: Optional[bool] = None, bypass_cache: bool = False,
+                     prompt_version: str = PROMPT_VERSION, **kwargs) -> AsyncIterator[str]:
+        """
+        Yield the completion text piece by piece as the provider sends it
+        
+        A cached answer is yielded whole. The full text is cached only once
+        the stream ends, so a consumer that stops early (e.g. on a schema
+        error) never caches a partial answer. Takes the same arguments as call().
+        """
+        call_params = self._call_params(prompt, kwargs)
+        cache = self.config.use_cache if use_cache is None else use_cache
+        
+        if cache:
+            key = self.response_cache.make_key(call_params, prompt_version)
+            if not (bypass_cache or bypass_requested()):
+                cached = await asyncio.to_thread(self.response_cache.get, key)
+                if cached is not None:
+                    self.response_cache.hits += 1
+                    yield cached
+                    return
+            self.response_cache.misses += 1
         
+        parts = []
+        async for text in self._stream_with_retries(call_params):
+            parts.append(text)
+            yield text
+        
+        if cache and "".join(parts).strip():
+            await asyncio.to_thread(self.response_cache.put, key, self.config.model, "".join(parts))
+    
+    def _messages(self, prompt: Union[str, Prompt]) -> List[Dict[str, Any]]:
+        """Chat messages for a prompt, static instructions first so the provider can cache them"""
+        if not isinstance(prompt, Prompt):
+            return [{"role": "user", "content": prompt}]
+        system: Any = prompt.instructions
+        if self.config.prompt_caching and uses_cache_control(self.config.model):
+            system = [{"type": "text", "text": prompt.instructions, "cache_control": {"type": "ephemeral"}}]
+        return [{"role": "system", "content": system}, {"role": "user", "content": prompt.content}]
+    
+    def _record_input_tokens(self, response: Any):
+        """Add a response's cached / uncached input tokens to the totals and report them"""
+        if getattr(response, "usage", None) is None:
+            return
+        split = input_token_split(response)
+        self.input_tokens["calls"] += 1
+        for name, value in split.items():
+            self.input_tokens[name] += value
+        written = f", {split['cache_write']} written to cache" if split["cache_write"] else ""
+        print(f"🧮 Input tokens: {split['cached']} cached, {split['uncached']} uncached{written}")
+    
+    def _call_params(self, prompt: Union[str, Prompt], kwargs: Dict[str, Any]) -> Dict[str, Any]:
         call_params = {
             "model": self.config.model,
-            "messages": [{"role": "user", "content": prompt}],
+            "messages": self._messages(prompt),
             "temperature": self.config.temperature,
             "max_tokens": self.config.max_tokens,
             "timeout": self.config.timeout,
@@ -25,29 +220,113 @@ class LLMClient:
         
         if self.config.api_base:
             call_params["api_base"] = self.config.api_base
+        return call_params
+    
+    async def _retry_wait(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying after error"""
+        # Honor the provider's hint and pause every caller sharing this model's budget
+        wait_time = retry_after_seconds(error)
+        if wait_time is not None:
+            wait_time += backoff_delay(0)
+            await asyncio.to_thread(self.rate_limiter.pause, wait_time)
+        elif is_rate_limit_error(error):
+            wait_time = backoff_delay(attempt + 1)
+            await asyncio.to_thread(self.rate_limiter.pause, wait_time)
+        else:
+            wait_time = backoff_delay(attempt + 1)
+        return wait_time
+    
+    async def _call_with_retries(self, call_params: Dict[str, Any]) -> str:
+        """Call the provider within the shared rate limit, with retry logic"""
+        max_retries = self.config.max_retries
+        last_error = None
+        estimated_tokens = estimate_tokens(call_params)
         
         for attempt in range(max_retries):
+            await self.rate_limiter.acquire(estimated_tokens)
             try:
                 response = await acompletion(**call_params)
-                return response.choices[0].message.content
+                await asyncio.to_thread(self.rate_limiter.settle, estimated_tokens, usage_tokens(response))
+                self._record_input_tokens(response)
+                return self._response_text(response)
                 
             except Exception as error:
+                if is_unsupported_output_error(error):
+                    raise  # retrying the same parameters cannot help; call_json falls back
                 last_error = error
                 print(f"LLM call attempt {attempt + 1} failed: {error}")
                 
+                wait_time = await self._retry_wait(error, attempt)
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f"Retrying in {wait_time} seconds...")
+                    print(f"Retrying in {wait_time:.1f} seconds...")
                     await asyncio.sleep(wait_time)
         
         raise Exception(f"All LLM call attempts failed. Last error: {last_error}")
     
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Message text, or the arguments of the forced tool call in "tools" mode"""
+        message = response.choices[0].message
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            return tool_calls[0].function.arguments
+        return message.content
+    
+    async def _stream_with_retries(self, call_params: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the completion within the shared rate limit
+        
+        Failures before the first piece of text are retried like call();
+        once text has been yielded a failure is raised, since the caller
+        has already consumed part of the answer.
+        """
+        max_retries = self.config.max_retries
+        last_error = None
+        estimated_tokens = estimate_tokens(call_params)
+        stream_params = {**call_params, "stream": True, "stream_options": {"include_usage": True}}
+        
+        for attempt in range(max_retries):
+            await self.rate_limiter.acquire(estimated_tokens)
+            started = False
+            response = None
+            try:
+                response = await acompletion(**stream_params)
+                last_chunk = None
+                async for chunk in response:
+                    last_chunk = chunk
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        started = True
+                        yield text
+                # The usage report arrives on the final chunk
+                await asyncio.to_thread(self.rate_limiter.settle, estimated_tokens, usage_tokens(last_chunk))
+                self._record_input_tokens(last_chunk)
+                return
+                
+            except Exception as error:
+                if started:
+                    raise
+                last_error = error
+                print(f"LLM stream attempt {attempt + 1} failed: {error}")
+                
+                wait_time = await self._retry_wait(error, attempt)
+                if attempt < max_retries - 1:
+                    print(f"Retrying in {wait_time:.1f} seconds...")
+                    await asyncio.sleep(wait_time)
+            finally:
+                # Drop the connection when the consumer stopped reading early
+                close = getattr(response, "aclose", None)
+                if close is not None:
+                    await close()
+        
+        raise Exception(f"All LLM stream attempts failed. Last error: {last_error}")
+    
     async def test_connection(self) -> bool:
         """Test LiteLLM connection and model availability"""
         try:
             from src.prompts import connection_test_prompt
             test_prompt = connection_test_prompt()
-            response = await self.call(test_prompt, max_tokens=10)
+            response = await self.call(test_prompt, use_cache=False, max_tokens=10)
             print(f"✅ LiteLLM connection test successful: {response.strip()}")
             return True
         except Exception as e:
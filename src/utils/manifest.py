@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+# Pipeline stages and the stages whose output they consume; redoing a stage
+# makes everything that depends on it stale
+STAGES = {
+    "chunk": [],
+    "questions": ["chunk"],
+    "rules": ["chunk"],
+}
+
+def content_hash(file_path: Path) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class RunManifest:
+    """
+    Records, per transcript, the content hash it was processed with and which
+    pipeline stages have finished, in manifest.json inside the output directory.
+    """
+
+    def __init__(self, output_dir: Path, stages: Dict[str, list] = STAGES):
+        self.path = Path(output_dir) / "manifest.json"
+        self.stages = dict(stages)
+        self.data: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+
+    def _save(self):
+        # Write then rename, so a crash never leaves a half-written manifest
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def pending_stages(self, name: str, digest: str) -> list:
+        """Stages still to run for a transcript with this content hash"""
+        entry = self.data.get(name)
+        if entry is None or entry.get("hash") != digest:
+            return list(self.stages)
+        return [stage for stage in self.stages if stage not in entry.get("stages", {})]
+
+    def is_done(self, name: str, digest: str, stage: str) -> bool:
+        return stage not in self.pending_stages(name, digest)
+
+    def mark_done(self, name: str, digest: str, stage: str):
+        """Record a finished stage and invalidate the stages that consume its output"""
+        entry = self.data.get(name)
+        if entry is None or entry.get("hash") != digest:
+            entry = self.data[name] = {"hash": digest, "stages": {}}
+        dependents = {s for s, needs in self.stages.items() if stage in needs}
+        entry["stages"] = {s: t for s, t in entry["stages"].items() if s not in dependents}
+        entry["stages"][stage] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._save()
+
+    def forget(self, name: str):
+        """Drop a transcript so the next run redoes every stage"""
+        if self.data.pop(name, None) is not None:
+            self._save()
@@ -0,0 +1,64 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+# How a response was turned into data
+OUTCOMES = ("clean", "repaired", "failed")
+
+class ParseStats:
+    """
+    Per (context, output mode) counts of clean, repaired and failed parses,
+    with the latency and estimated tokens spent on each, so structured
+    output can be compared with plain prompting.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, context: str, mode: str, outcome: str, seconds: float, tokens: int):
+        entry = self.data.setdefault(f"{context}/{mode}", {
+            **{name: 0 for name in OUTCOMES}, "seconds": 0.0, "tokens": 0,
+        })
+        entry[outcome] += 1
+        entry["seconds"] += seconds
+        entry["tokens"] += tokens
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Failure rate, mean latency and tokens wasted on failed parses per context/mode"""
+        summary = {}
+        for key, entry in sorted(self.data.items()):
+            calls = sum(entry[name] for name in OUTCOMES)
+            summary[key] = {
+                "calls": calls,
+                "failure_rate": round(entry["failed"] / calls, 3) if calls else 0.0,
+                "repair_rate": round(entry["repaired"] / calls, 3) if calls else 0.0,
+                "mean_seconds": round(entry["seconds"] / calls, 2) if calls else 0.0,
+                "tokens_per_call": entry["tokens"] // calls if calls else 0,
+            }
+        return summary
+
+    def save(self, path: Path):
+        """Add these counts to the totals in path (created if missing) and reset them"""
+        path = Path(path)
+        totals: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, 'r') as f:
+                totals = json.load(f)
+        for key, entry in self.data.items():
+            total = totals.setdefault(key, {name: 0 for name in entry})
+            for name, value in entry.items():
+                total[name] = total.get(name, 0) + value
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(totals, f, indent=2)
+        os.replace(tmp_path, path)
+        self.data = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "ParseStats":
+        stats = cls()
+        if Path(path).exists():
+            with open(path, 'r') as f:
+                stats.data = json.load(f)
+        return stats
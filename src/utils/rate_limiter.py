@@ -0,0 +1,239 @@
+import asyncio
+import email.utils
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.models.config import ModelConfig
+
+# Shared by every process on the machine, whatever its working directory
+STATE_FILE = Path(tempfile.gettempdir()) / "poker_llm_rate_limits.sqlite"
+
+MAX_BACKOFF = 60.0
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests and tokens per minute of one model.
+
+    Bucket levels live in a SQLite file and are updated inside an immediate
+    transaction, so every agent in this process and every other process using
+    the same file draws from one budget. A provider rate-limit hint pauses the
+    model for all of them.
+    """
+
+    def __init__(self, model: str, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None, state_file: Path = STATE_FILE):
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.state_file = Path(state_file)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "model TEXT PRIMARY KEY, requests REAL, tokens REAL, "
+                "updated REAL NOT NULL, blocked_until REAL NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self) -> closing:
+        return closing(sqlite3.connect(str(self.state_file), timeout=30, isolation_level=None))
+
+    def _refill(self, row: Optional[Tuple], now: float) -> Tuple[float, float, float]:
+        """Bucket levels at time now, starting full for a model not seen before"""
+        rpm = self.requests_per_minute or 0
+        tpm = self.tokens_per_minute or 0
+        if row is None:
+            return float(rpm), float(tpm), 0.0
+        requests, tokens, updated, blocked_until = row
+        elapsed = max(0.0, now - updated)
+        requests = min(rpm, requests + elapsed * rpm / 60)
+        tokens = min(tpm, tokens + elapsed * tpm / 60)
+        return requests, tokens, blocked_until
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take one request and tokens from the buckets, or return the seconds to wait"""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT requests, tokens, updated, blocked_until FROM buckets WHERE model = ?",
+                    (self.model,),
+                ).fetchone()
+                requests, available, blocked_until = self._refill(row, now)
+
+                wait = blocked_until - now
+                if self.requests_per_minute and requests < 1:
+                    wait = max(wait, (1 - requests) * 60 / self.requests_per_minute)
+                if self.tokens_per_minute:
+                    # A single call larger than the whole bucket would otherwise never fit
+                    tokens = min(tokens, self.tokens_per_minute)
+                    if available < tokens:
+                        wait = max(wait, (tokens - available) * 60 / self.tokens_per_minute)
+
+                if wait <= 0:
+                    requests -= 1 if self.requests_per_minute else 0
+                    available -= tokens if self.tokens_per_minute else 0
+                db.execute(
+                    "INSERT OR REPLACE INTO buckets (model, requests, tokens, updated, blocked_until) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.model, requests, available, now, blocked_until),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return max(0.0, wait)
+
+    async def acquire(self, tokens: int = 0):
+        """
+        Wait until one request carrying roughly `tokens` tokens fits the budget
+
+        The SQLite transaction (which may wait for another process's lock)
+        runs in a worker thread, so it never blocks the event loop.
+        """
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire, tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated: int, actual: int):
+        """
+        Return (or charge) the difference between the estimated and actual token use
+
+        Blocks on SQLite; from async code run it with asyncio.to_thread, like pause.
+        """
+        if not self.tokens_per_minute or actual <= 0:
+            return
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE model = ?",
+                (self.tokens_per_minute, estimated - actual, self.model),
+            )
+            db.execute("COMMIT")
+
+    def pause(self, seconds: float):
+        """Block the model for every process, e.g. after a 429 with Retry-After"""
+        until = time.time() + seconds
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            updated = db.execute(
+                "UPDATE buckets SET blocked_until = MAX(blocked_until, ?), "
+                "requests = MIN(requests, 0) WHERE model = ?",
+                (until, self.model),
+            ).rowcount
+            if not updated:
+                db.execute(
+                    "INSERT INTO buckets (model, requests, tokens, updated, blocked_until) "
+                    "VALUES (?, 0, ?, ?, ?)",
+                    (self.model, self.tokens_per_minute or 0, time.time(), until),
+                )
+            db.execute("COMMIT")
+
+_LIMITERS: Dict[Tuple[str, Path], RateLimiter] = {}
+
+def get_rate_limiter(config: ModelConfig, state_file: Path = STATE_FILE) -> RateLimiter:
+    """Shared limiter for a model, so every client in the process uses one instance"""
+    key = (config.model, Path(state_file))
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = RateLimiter(config.model, config.requests_per_minute,
+                              config.tokens_per_minute, state_file)
+        _LIMITERS[key] = limiter
+    return limiter
+
+def estimate_tokens(call_params: Dict[str, Any]) -> int:
+    """Rough token charge for a call: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in call_params.get("messages", []))
+    return prompt_chars // 4 + int(call_params.get("max_tokens") or 0)
+
+def usage_tokens(response: Any) -> int:
+    """Prompt plus completion tokens reported by the provider, or 0 if unknown"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0
+    return int(getattr(usage, "prompt_tokens", 0) or 0) + int(getattr(usage, "completion_tokens", 0) or 0)
+
+def input_token_split(response: Any) -> Dict[str, int]:
+    """
+    Input tokens of a call: read from the provider's prompt cache, written to
+    it, and uncached (which includes the written ones). LiteLLM reports cache
+    reads as prompt_tokens_details.cached_tokens, Anthropic ones also as
+    cache_read_input_tokens, and Anthropic cache writes as cache_creation_input_tokens.
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {"cached": 0, "cache_write": 0, "uncached": 0}
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (int(getattr(details, "cached_tokens", 0) or 0)
+              or int(getattr(usage, "cache_read_input_tokens", 0) or 0))
+    written = int(getattr(usage, "cache_creation_input_tokens", 0) or 0)
+    prompt = int(getattr(usage, "prompt_tokens", 0) or 0)
+    return {"cached": cached, "cache_write": written, "uncached": max(prompt - cached, 0)}
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Seconds from "20", "1.5", "250ms", "6m0s", or an HTTP / ISO date"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(n) * scale[u] for n, u in parts)
+
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return moment.timestamp() - time.time()
+
+def _error_headers(error: Exception) -> Dict[str, str]:
+    for source in (getattr(error, "response", None), error):
+        headers = getattr(source, "headers", None)
+        if headers:
+            return {str(k).lower(): str(v) for k, v in dict(headers).items()}
+    return {}
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "ratelimit" in type(error).__name__.lower() or "rate limit" in str(error).lower()
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Wait requested by the provider in a rate-limit error, if any
+
+    Checks Retry-After / retry-after-ms first, then the OpenAI
+    x-ratelimit-reset-* and Anthropic anthropic-ratelimit-*-reset headers.
+    """
+    headers = _error_headers(error)
+    if "retry-after-ms" in headers:
+        seconds = _parse_duration(headers["retry-after-ms"])
+        if seconds is not None:
+            return max(0.0, seconds / 1000)
+    if "retry-after" in headers:
+        seconds = _parse_duration(headers["retry-after"])
+        if seconds is not None:
+            return max(0.0, seconds)
+
+    resets = [_parse_duration(v) for k, v in headers.items()
+              if k.startswith("x-ratelimit-reset")
+              or (k.startswith("anthropic-ratelimit-") and k.endswith("-reset"))]
+    resets = [r for r in resets if r is not None]
+    return max(0.0, max(resets)) if resets else None
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = MAX_BACKOFF) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
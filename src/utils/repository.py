@@ -0,0 +1,281 @@
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+REPOSITORY_FILE = Path("./poker_output/poker.sqlite")
+
+# table -> (filterable columns, full-text columns); every record is also kept whole in "data"
+TABLES = {
+    "questions": (
+        ["question_id", "source_transcript", "source_chunk_id", "street", "difficulty", "question_type"],
+        ["question", "correct_answer", "key_concepts"],
+    ),
+    "rules": (
+        ["category", "source", "street", "priority"],
+        ["text"],
+    ),
+    "guidelines": (
+        ["category", "source_file"],
+        ["title", "situation", "action", "reasoning", "example"],
+    ),
+}
+
+# table -> field naming the source whose records are always replaced together
+SOURCE_COLUMNS = {"questions": "source_transcript", "rules": "source", "guidelines": "source_file"}
+
+# Rule categories use different field names; these are joined into the searchable text
+RULE_TEXT_FIELDS = [
+    "condition", "action", "reasoning", "examples", "board_type", "opponent_tendency",
+    "sizing_strategy", "value_bluff_relationship", "position_considerations", "scenario",
+    "key_question", "recommended_action", "size_guideline", "multiway_considerations",
+    "scenario_type", "opponent_range", "stack_depth_factors", "principle", "application",
+    "exceptions",
+]
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value)
+
+def _digest(record: Dict[str, Any]) -> int:
+    """64-bit hash of a record's content, independent of key order"""
+    text = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+
+def _match_query(search: str) -> str:
+    """Quote every word so user text never trips FTS5 query syntax; words are ANDed"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in search.split())
+
+class PokerRepository:
+    """
+    SQLite store of generated questions, rules and guidelines.
+    
+    Filter columns are indexed and the text fields are mirrored into FTS5
+    tables by triggers, so filtered and full-text queries stay fast as the
+    corpus grows. Writes replace all records of one source in a single
+    transaction.
+    """
+    
+    def __init__(self, path: Path = REPOSITORY_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+    
+    def _create_schema(self):
+        for table, (columns, text_columns) in TABLES.items():
+            all_columns = columns + text_columns
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, "
+                + ", ".join(all_columns) + ", data TEXT NOT NULL)"
+            )
+            for column in columns:
+                self.db.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})")
+    
+            # External-content FTS index kept in sync by triggers
+            fts_columns = ", ".join(text_columns)
+            new_values = ", ".join(f"new.{c}" for c in text_columns)
+            old_values = ", ".join(f"old.{c}" for c in text_columns)
+            self.db.executescript(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts
+                    USING fts5({fts_columns}, content='{table}', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {table}_fts (rowid, {fts_columns}) VALUES (new.id, {new_values});
+                END;
+                CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {table}_fts ({table}_fts, rowid, {fts_columns})
+                    VALUES ('delete', old.id, {old_values});
+                END;
+            """)
+        self.db.commit()
+    
+    def close(self):
+        self.db.close()
+    
+    def __enter__(self) -> "PokerRepository":
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    @staticmethod
+    def _rows(table: str, records: Iterable[Dict[str, Any]],
+              fixed: Dict[str, Any]) -> Iterator[list]:
+        columns, text_columns = TABLES[table]
+        for record in records:
+            if table == "rules":
+                values = {**record, "text": " ".join(filter(None, (_text(record.get(f))
+                                                                   for f in RULE_TEXT_FIELDS)))}
+            elif table == "questions":
+                values = {**record, "question_id": record.get("id")}
+            else:
+                values = record
+            row = [_text(fixed.get(c, values.get(c))) for c in columns + text_columns]
+            yield row + [json.dumps(record, ensure_ascii=False)]
+    
+    def _insert(self, table: str, records: Iterable[Dict[str, Any]],
+                fixed: Optional[Dict[str, Any]] = None):
+        columns, text_columns = TABLES[table]
+        all_columns = columns + text_columns + ["data"]
+        self.db.executemany(
+            f"INSERT INTO {table} ({', '.join(all_columns)}) "
+            f"VALUES ({', '.join('?' for _ in all_columns)})",
+            self._rows(table, records, fixed or {}),
+        )
+    
+    def _replace(self, table: str, key_column: str, key: Optional[str],
+                 records: Iterable[Dict[str, Any]]):
+        with self.db:
+            if key is None:
+                self.db.execute(f"DELETE FROM {table}")
+            else:
+                self.db.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+            self._insert(table, records, {} if key is None else {key_column: key})
+    
+    def replace(self, table: str, key_column: str, key: str, records: Iterable[Dict[str, Any]]):
+        """Bulk-insert records, replacing those whose key_column equals key"""
+        self._replace(table, key_column, key, records)
+    
+    def replace_questions(self, source_transcript: str, questions: Iterable[Dict[str, Any]]):
+        """Bulk-insert a transcript's questions, replacing its earlier ones"""
+        self._replace("questions", "source_transcript", source_transcript, questions)
+    
+    def replace_rules(self, source: str, rules: Iterable[Dict[str, Any]]):
+        """Bulk-insert a transcript's rules (each with a "category"), replacing its earlier ones"""
+        self._replace("rules", "source", source, rules)
+    
+    def replace_guidelines(self, guidelines: Iterable[Dict[str, Any]], source_file: Optional[str] = None):
+        """Bulk-insert guidelines, replacing those of source_file (or all when None)"""
+        self._replace("guidelines", "source_file", source_file, guidelines)
+    
+    def add(self, table: str, records: Iterable[Dict[str, Any]]):
+        """Insert records without replacing any, e.g. items saved while a response streams"""
+        with self.db:
+            self._insert(table, records)
+    
+    def sync(self, table: str, iter_records: Callable[[], Iterable[Dict[str, Any]]]) -> List[Optional[str]]:
+        """
+        Re-import the sources whose indexed records differ from the durable log
+        
+        Compares the count and an order-independent checksum of each source's
+        records, so a crash between the log write and the index write (or an
+        index deleted outright) is repaired the next time the log is opened.
+        
+        Args:
+            table: "questions" or "rules"
+            iter_records: Streams the log's live records, e.g. JsonlStore.iter_records;
+                called a second time to read the stale sources' records
+        
+        Returns:
+            The sources that were re-imported
+        """
+        column = SOURCE_COLUMNS[table]
+        logged: Dict[Optional[str], list] = {}  # source -> [count, checksum]
+        for record in iter_records():
+            entry = logged.setdefault(_text(record.get(column)), [0, 0])
+            entry[0] += 1
+            entry[1] = (entry[1] + _digest(record)) % 2 ** 64
+        
+        indexed: Dict[Optional[str], list] = {}
+        for source, data in self.db.execute(f"SELECT {column}, data FROM {table}"):
+            entry = indexed.setdefault(source, [0, 0])
+            entry[0] += 1
+            entry[1] = (entry[1] + _digest(json.loads(data))) % 2 ** 64
+        
+        stale = [source for source in set(logged) | set(indexed)
+                 if logged.get(source, [0, 0]) != indexed.get(source, [0, 0])]
+        if not stale:
+            return stale
+        stale_set = set(stale)
+        with self.db:
+            for source in stale:
+                if source is None:
+                    self.db.execute(f"DELETE FROM {table} WHERE {column} IS NULL")
+                else:
+                    self.db.execute(f"DELETE FROM {table} WHERE {column} = ?", (source,))
+            self._insert(table, (record for record in iter_records()
+                                 if _text(record.get(column)) in stale_set))
+        print(f"🔄 Re-indexed {len(stale)} stale source(s) in {table}")
+        return stale
+    
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def count(self, table: str) -> int:
+        return self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def query(self, table: str, search: Optional[str] = None, limit: Optional[int] = None,
+              **filters) -> List[Dict[str, Any]]:
+        """
+        Records matching column filters and an optional full-text search
+    
+        Args:
+            table: "questions", "rules" or "guidelines"
+            search: Words that must all appear in the text fields (best matches first)
+            limit: Maximum number of records
+            **filters: Column equality filters, e.g. street="flop"
+        """
+        columns, _ = TABLES[table]
+        unknown = set(filters) - set(columns)
+        if unknown:
+            raise ValueError(f"Cannot filter {table} on {sorted(unknown)}")
+    
+        where, params = [], []
+        for column, value in filters.items():
+            if value is not None:
+                where.append(f"t.{column} = ?")
+                params.append(str(value))
+        sql = f"SELECT t.data FROM {table} t"
+        order = "t.id"
+        if search:
+            sql += f" JOIN {table}_fts f ON f.rowid = t.id"
+            where.append(f"{table}_fts MATCH ?")
+            params.append(_match_query(search))
+            order = "f.rank"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [json.loads(row[0]) for row in self.db.execute(sql, params)]
+    
+    def questions(self, **kwargs) -> List[Dict[str, Any]]:
+        return self.query("questions", **kwargs)
+    
+    def rules(self, **kwargs) -> List[Dict[str, Any]]:
+        return self.query("rules", **kwargs)
+    
+    def guidelines(self, **kwargs) -> List[Dict[str, Any]]:
+        return self.query("guidelines", **kwargs)
+    
+    def _group_counts(self, table: str, column: str) -> Dict[str, int]:
+        rows = self.db.execute(
+            f"SELECT COALESCE({column}, 'unknown'), COUNT(*) FROM {table} GROUP BY 1 ORDER BY 1"
+        )
+        return dict(rows.fetchall())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Processing statistics computed with SQL aggregates"""
+        rules = self._group_counts("rules", "category")
+        return {
+            "total_questions": self.count("questions"),
+            "questions_by_street": self._group_counts("questions", "street"),
+            "questions_by_difficulty": self._group_counts("questions", "difficulty"),
+            "questions_by_type": self._group_counts("questions", "question_type"),
+            "total_rules": rules.get("bet_sizing_rules", 0),
+            "total_guidelines": {
+                "flop": rules.get("flop_guidelines", 0),
+                "turn": rules.get("turn_guidelines", 0),
+                "river": rules.get("river_guidelines", 0)
+            },
+            "general_principles": rules.get("general_principles", 0)
+        }
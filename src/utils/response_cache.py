@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Set LLM_CACHE_FILE to use another cache file
+CACHE_FILE_ENV = "LLM_CACHE_FILE"
+
+# One cache file in the project root for main.py and create_json.py, whatever
+# directory they are started from
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+CACHE_FILE = Path(os.getenv(CACHE_FILE_ENV) or PROJECT_ROOT / ".llm_cache.sqlite")
+
+# Call parameters that never change the model's answer
+TRANSPORT_PARAMS = {"timeout", "api_base", "api_key"}
+
+# Set LLM_CACHE_BYPASS=1 to ignore cached answers (fresh answers are still stored)
+BYPASS_ENV = "LLM_CACHE_BYPASS"
+
+class ResponseCache:
+    """
+    Content-addressed store of LLM responses in a single SQLite file.
+
+    Keys hash every output-affecting call parameter plus the prompt-template
+    version, so editing a template or switching models misses naturally.
+    Entries older than max_age_days are dropped and the least recently used
+    ones go once the file holds more than max_bytes of responses.
+    """
+
+    def __init__(self, path: Path = CACHE_FILE, max_bytes: int = 256 * 1024 * 1024,
+                 max_age_days: float = 30, evict_every: int = 100):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.evict()
+
+    def _connect(self) -> closing:
+        return closing(sqlite3.connect(str(self.path), timeout=30, isolation_level=None))
+
+    @staticmethod
+    def make_key(call_params: Dict[str, Any], prompt_version: str) -> str:
+        """Hash of the model, messages, sampling settings and prompt-template version"""
+        params = {k: v for k, v in call_params.items() if k not in TRANSPORT_PARAMS}
+        text = json.dumps([prompt_version, params], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as db:
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] < time.time() - self.max_age_days * 86400:
+                return None
+            db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode()), now, now),
+            )
+        self._puts += 1
+        if self._puts % self.evict_every == 0:
+            self.evict()
+
+    def delete(self, key: str):
+        with self._connect() as db:
+            db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            removed = db.execute(
+                "DELETE FROM responses WHERE created < ?",
+                (time.time() - self.max_age_days * 86400,),
+            ).rowcount
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                freed = 0
+                stale = []
+                for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                    stale.append((key,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                db.executemany("DELETE FROM responses WHERE key = ?", stale)
+                removed += len(stale)
+            db.execute("COMMIT")
+        return removed
+
+    def clear(self):
+        with self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+    async def get_or_call(self, key: str, model: str, fetch: Callable[[], Awaitable[str]],
+                          bypass: bool = False) -> str:
+        """
+        Cached response for key, calling fetch on a miss
+
+        Concurrent callers with the same key share one in-flight fetch, so a
+        burst of identical prompts costs a single API call. SQLite reads and
+        writes run in worker threads to keep the event loop free.
+        """
+        bypass = bypass or bypass_requested()
+        if not bypass:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await fetch()
+            # An empty answer is never worth replaying
+            if response and response.strip():
+                await asyncio.to_thread(self.put, key, model, response)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._in_flight[key]
+
+def bypass_requested() -> bool:
+    """True when LLM_CACHE_BYPASS is set to anything but 0"""
+    return os.getenv(BYPASS_ENV, "") not in ("", "0")
+
+_CACHES: Dict[Path, ResponseCache] = {}
+
+def get_response_cache(path: Path = CACHE_FILE) -> ResponseCache:
+    """Shared cache instance for a file, so concurrent calls see each other's in-flight requests"""
+    path = Path(path).resolve()
+    cache = _CACHES.get(path)
+    if cache is None:
+        cache = _CACHES[path] = ResponseCache(path)
+    return cache
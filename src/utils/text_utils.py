@@ -0,0 +1,43 @@
+import re
+from typing import List, Tuple
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, then whitespace or end
+_SENTENCE_END = re.compile(r'[.!?]+["\'”’)\]]*(?=\s|$)')
+
+# "## Section" headers written by clean_transcript.py
+_SECTION_HEADER = re.compile(r'^## .*$', re.MULTILINE)
+
+def _skip_space(text: str, pos: int, stop: int) -> int:
+    while pos < stop and text[pos].isspace():
+        pos += 1
+    return pos
+
+def _sentences(text: str, start: int, stop: int) -> List[Tuple[int, int]]:
+    spans = []
+    for match in _SENTENCE_END.finditer(text, start, stop):
+        begin = _skip_space(text, start, match.end())
+        if begin < match.end():
+            spans.append((begin, match.end()))
+        start = match.end()
+    begin = _skip_space(text, start, stop)
+    tail = text[begin:stop].rstrip()
+    if tail:
+        spans.append((begin, begin + len(tail)))
+    return spans
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Character (start, end) offsets of every sentence in text
+
+    Section header lines are spans of their own, so chunk boundaries can
+    fall on them. Slicing text with consecutive spans keeps the original
+    wording, line breaks included.
+    """
+    spans = []
+    pos = 0
+    for header in _SECTION_HEADER.finditer(text):
+        spans.extend(_sentences(text, pos, header.start()))
+        spans.append((header.start(), header.end()))
+        pos = header.end()
+    spans.extend(_sentences(text, pos, len(text)))
+    return spans
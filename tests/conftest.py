@@ -0,0 +1,108 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+# Manual connectivity scripts that call live APIs at import time
+collect_ignore = ["embedding_test.py", "test_connection.py"]
+
+
+def message_text(params):
+    """All message text of a chat call, for matching prompts in fake replies"""
+    parts = []
+    for message in params["messages"]:
+        content = message["content"]
+        parts.append(content if isinstance(content, str) else " ".join(b["text"] for b in content))
+    return "\n".join(parts)
+
+
+class FakeCompletion:
+    """
+    Stand-in for litellm.acompletion.
+
+    reply(params) returns the answer text or raises; streamed calls get the
+    same text in small pieces followed by a usage-only chunk.
+    """
+
+    def __init__(self, reply=lambda params: "{}"):
+        self.reply = reply
+        self.calls = []
+
+    async def __call__(self, **params):
+        self.calls.append(params)
+        await asyncio.sleep(0)
+        text = self.reply(params)
+        usage = SimpleNamespace(prompt_tokens=len(message_text(params)) // 4,
+                                completion_tokens=len(text) // 4)
+        if params.get("stream"):
+            return self._stream(text, usage)
+        message = SimpleNamespace(content=text, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    @staticmethod
+    async def _stream(text, usage):
+        for start in range(0, len(text), 7):
+            delta = SimpleNamespace(content=text[start:start + 7])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+@pytest.fixture
+def fake_llm(tmp_path, monkeypatch):
+    """
+    Route LLMClient calls to a FakeCompletion, with the response cache and
+    rate-limit state in tmp_path
+    """
+    pytest.importorskip("litellm")
+    from src.utils import llm_client
+    from src.utils.rate_limiter import RateLimiter
+    from src.utils.response_cache import ResponseCache
+
+    cache = ResponseCache(tmp_path / "llm_cache.sqlite")
+    monkeypatch.setattr(llm_client, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(llm_client, "get_rate_limiter", lambda config: RateLimiter(
+        config.model, config.requests_per_minute, config.tokens_per_minute,
+        tmp_path / "rate_limits.sqlite"))
+    fake = FakeCompletion()
+    monkeypatch.setattr(llm_client, "acompletion", fake)
+    return fake
+
+
+def pipeline_reply(params):
+    """Plausible answers to the chunking, question and rules prompts"""
+    from src.prompts import CHUNKING_INSTRUCTIONS, QUESTION_INSTRUCTIONS
+
+    text = message_text(params)
+    if CHUNKING_INSTRUCTIONS in text:
+        return json.dumps({"chunks": [
+            {"id": 1, "start_sentence": 0, "topic": "Preflop", "street": "preflop"},
+            {"id": 2, "start_sentence": 2, "topic": "Flop", "street": "flop"},
+        ]})
+    if QUESTION_INSTRUCTIONS in text:
+        return json.dumps({"questions": [
+            {"question": "How big should the c-bet be?", "street": "flop",
+             "correct_answer": "Small on dry boards", "difficulty": "beginner"},
+        ]})
+    return json.dumps({
+        "bet_sizing_rules": [{"rule_id": "r1", "condition": "dry board", "action": "bet small"}],
+        "general_principles": [{"principle_id": "p1", "principle": "Position matters"}],
+    })
+
+
+@pytest.fixture
+def pipeline_llm(fake_llm):
+    """fake_llm answering the pipeline prompts with pipeline_reply"""
+    fake_llm.reply = pipeline_reply
+    return fake_llm
+
+
+@pytest.fixture
+def processor(fake_llm, tmp_path, monkeypatch):
+    """PokerTutorialProcessor writing to tmp_path/poker_output, with the response cache off"""
+    from src.models.config import ModelConfig
+    from src.poker_processor import PokerTutorialProcessor
+
+    monkeypatch.chdir(tmp_path)
+    return PokerTutorialProcessor(ModelConfig(model="test-model", use_cache=False,
+                                              structured_output=False))
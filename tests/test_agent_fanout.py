@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+TRANSCRIPT = ("Open the button to two and a half blinds. Fold the small hands. "
+              "On dry flops bet small. On wet flops bet bigger or check.")
+
+
+@pytest.fixture
+def agents():
+    pytest.importorskip("litellm")
+    from src.processing_agents import QuestionAgent, RulesAgent
+
+    return QuestionAgent, RulesAgent
+
+
+def test_question_reduce_drops_repeats_and_numbers_ids(agents):
+    QuestionAgent, _ = agents
+    results = [
+        ({"id": 1}, {"questions": [{"question": "Why bet small?"}, {"question": "When to check?"}]}),
+        ({"id": 2}, {"questions": [{"question": "why  BET small?"}, {"question": "Why bet big?"}]}),
+        ({"id": 3}, {}),
+    ]
+    merged = QuestionAgent._reduce(results, "lesson")
+    assert [q["question"] for q in merged] == ["Why bet small?", "When to check?", "Why bet big?"]
+    assert [q["id"] for q in merged] == ["lesson-1-1", "lesson-1-2", "lesson-2-2"]
+    assert [q["source_chunk_id"] for q in merged] == [1, 1, 2]
+
+
+def test_rules_reduce_ignores_ids(agents):
+    _, RulesAgent = agents
+    rule = {"condition": "dry board", "action": "bet small"}
+    results = [
+        ({"id": 1}, {"bet_sizing_rules": [{"rule_id": "a", **rule}]}),
+        ({"id": 2}, {"bet_sizing_rules": [{"rule_id": "b", **rule}, {"rule_id": "c", "condition": "wet"}],
+                     "general_principles": [{"principle_id": "p", "principle": "Position"}]}),
+    ]
+    merged = RulesAgent._reduce(results)
+    assert [r["rule_id"] for r in merged["bet_sizing_rules"]] == ["a", "c"]
+    assert len(merged["general_principles"]) == 1
+    assert merged["flop_guidelines"] == []
+
+
+def test_chunks_and_agents_fan_out_concurrently(processor, pipeline_llm, tmp_path, monkeypatch):
+    from src.utils import llm_client
+
+    active, peak = 0, 0
+
+    async def tracked(**params):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.02)
+            return await pipeline_llm(**params)
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(llm_client, "acompletion", tracked)
+    path = tmp_path / "lesson.txt"
+    path.write_text(TRANSCRIPT)
+    assert asyncio.run(processor.process_transcript(path))
+
+    # One chunking call, then questions and rules for both chunks at once
+    assert len(pipeline_llm.calls) == 5
+    assert peak == 4
+    questions = list(processor.question_agent.iter_questions())
+    assert [q["source_chunk_id"] for q in questions] == [1]
+    assert all(q["source_transcript"] == "lesson" for q in questions)
+    rules = processor.rules_agent.load_rules()
+    assert len(rules["bet_sizing_rules"]) == 1 and len(rules["general_principles"]) == 1
@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.batch import ENDED, RUNNING, BatchJobs, LocalBatchBackend
+from src.utils.manifest import content_hash
+
+TRANSCRIPT = ("Open the button to two and a half blinds. Fold the small hands. "
+              "On dry flops bet small. On wet flops bet bigger or check.")
+
+
+class Answers:
+    """Batch answers that echo the prompt, counting each request answered"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.asked = []
+
+    def __call__(self, params):
+        text = params["messages"][-1]["content"]
+        self.asked.append(text)
+        if text in self.fail:
+            raise RuntimeError("request failed")
+        return text.upper()
+
+
+def requests(*prompts):
+    return {f"r-{n}": {"model": "m", "messages": [{"role": "user", "content": p}]}
+            for n, p in enumerate(prompts)}
+
+
+def test_local_backend_runs_after_polls(tmp_path):
+    answers = Answers(fail={"b"})
+    backend = LocalBatchBackend(tmp_path, answers, polls_until_done=3)
+    job_id = backend.submit(requests("a", "b"))
+    assert [backend.status(job_id) for _ in range(4)] == [RUNNING, RUNNING, ENDED, ENDED]
+    assert backend.results(job_id) == {"r-0": "A", "r-1": None}
+    assert answers.asked == ["a", "b"]
+    # Jobs live on disk, so another backend instance sees the same job
+    assert LocalBatchBackend(tmp_path, answers).results(job_id) == {"r-0": "A", "r-1": None}
+
+
+def test_run_submits_once_and_returns_meta(tmp_path):
+    jobs = BatchJobs(tmp_path / "jobs.json")
+    backend = LocalBatchBackend(tmp_path / "server", Answers(), polls_until_done=2)
+    meta, answers = asyncio.run(jobs.run(
+        "chunk", backend, lambda: (requests("a"), {"r-0": {"transcript": "t"}}), poll_seconds=0))
+    assert meta == {"r-0": {"transcript": "t"}}
+    assert answers == {"r-0": "A"}
+    assert "chunk" in json.loads((tmp_path / "jobs.json").read_text())
+    jobs.finish("chunk")
+    assert BatchJobs(tmp_path / "jobs.json").data == {}
+
+
+def test_restarted_run_resumes_the_stored_job(tmp_path):
+    answers = Answers()
+    backend = LocalBatchBackend(tmp_path / "server", answers, polls_until_done=1000)
+    jobs = BatchJobs(tmp_path / "jobs.json")
+
+    async def interrupted():
+        run = jobs.run("extract", backend, lambda: (requests("a", "b"), {"r-0": 0, "r-1": 1}), poll_seconds=0)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(run, 0.05)
+
+    asyncio.run(interrupted())
+    assert answers.asked == []
+    assert len(list((tmp_path / "server").glob("*.json"))) == 1
+
+    def build():
+        raise AssertionError("a stored job must not be submitted again")
+
+    backend.polls_until_done = 1
+    meta, results = asyncio.run(BatchJobs(tmp_path / "jobs.json").run("extract", backend, build, poll_seconds=0))
+    assert meta == {"r-0": 0, "r-1": 1}
+    assert results == {"r-0": "A", "r-1": "B"}
+    assert answers.asked == ["a", "b"]
+    assert len(list((tmp_path / "server").glob("*.json"))) == 1
+
+
+def test_nothing_to_submit(tmp_path):
+    jobs = BatchJobs(tmp_path / "jobs.json")
+    backend = LocalBatchBackend(tmp_path / "server", Answers())
+    assert asyncio.run(jobs.run("chunk", backend, lambda: ({}, {}), poll_seconds=0)) == ({}, {})
+    assert not (tmp_path / "jobs.json").exists()
+    assert list((tmp_path / "server").iterdir()) == []
+
+
+def test_stored_job_of_another_backend_is_refused(tmp_path):
+    jobs = BatchJobs(tmp_path / "jobs.json")
+    jobs.data["chunk"] = {"job_id": "msgbatch_1", "backend": "anthropic", "meta": {}, "submitted": "-"}
+    backend = LocalBatchBackend(tmp_path / "server", Answers())
+    with pytest.raises(ValueError, match="anthropic"):
+        asyncio.run(jobs.run("chunk", backend, lambda: (requests("a"), {}), poll_seconds=0))
+
+
+def test_processor_batch_run_resubmits_only_failed_stages(processor, pipeline_llm, tmp_path):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    path = transcripts / "lesson.txt"
+    path.write_text(TRANSCRIPT)
+    asked = []
+    broken = {"rules"}
+
+    def answer(params):
+        text = pipeline_llm.reply(params)
+        asked.append(text)
+        if "bet_sizing_rules" in text and "rules" in broken:
+            return "Sorry, no rules here."
+        return text
+
+    backend = LocalBatchBackend(tmp_path / "server", answer)
+    results = asyncio.run(processor.process_all_transcripts_batch(transcripts, backend, poll_seconds=0))
+    assert results == {"succeeded": [], "failed": ["lesson.txt"]}
+    assert len(asked) == 5  # chunk plan, then questions and rules for each of two chunks
+    assert processor.manifest.pending_stages("lesson", content_hash(path)) == ["rules"]
+    assert [q["question"] for q in processor.question_agent.store] == ["How big should the c-bet be?"]
+    assert BatchJobs(processor.output_dir / "batch_jobs.json").data == {}
+
+    broken.clear()
+    results = asyncio.run(processor.process_all_transcripts_batch(transcripts, backend, poll_seconds=0))
+    assert results == {"succeeded": ["lesson.txt"], "failed": []}
+    assert len(asked) == 7
+    assert [r["category"] for r in processor.rules_agent.store] == ["bet_sizing_rules", "general_principles"]
+
+    results = asyncio.run(processor.process_all_transcripts_batch(transcripts, backend, poll_seconds=0))
+    assert results == {"succeeded": ["lesson.txt"], "failed": []}
+    assert len(asked) == 7
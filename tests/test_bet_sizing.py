@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from bet_sizing import sizing_surface
+from utils import calculate_pot_odds
+
+
+def test_pot_sized_bet_figures():
+    surface = sizing_surface(100, 1000, 1000, 0.5, sizes=np.array([1.0]))
+    assert surface.bets[0] == 100
+    assert surface.pot_odds[0] == pytest.approx(1 / 3)
+    assert surface.bluff_breakeven[0] == pytest.approx(0.5)
+    assert surface.mdf[0] == pytest.approx(0.5)
+    assert surface.pot_odds[0] == pytest.approx(calculate_pot_odds(200, 100))
+
+
+def test_pure_bluff_breaks_even_at_mdf():
+    surface = sizing_surface(100, 1000, 1000, 0.0)
+    np.testing.assert_allclose(surface.ev_bet, 0.0, atol=1e-9)
+
+
+def test_bets_cap_at_the_effective_stack():
+    surface = sizing_surface(100, 80, 500, 0.5, sizes=np.array([0.5, 1.0, 2.0]))
+    np.testing.assert_array_equal(surface.bets, [50, 80, 80])
+    np.testing.assert_array_equal(surface.all_in, [False, True, True])
+
+
+def test_ev_matches_scalar_formula():
+    sizes = np.array([0.33, 0.75, 1.5])
+    surface = sizing_surface(60, 400, 300, 0.4, fold_freq=lambda s: 0.2 + 0.2 * s, sizes=sizes)
+    for i, size in enumerate(sizes):
+        bet = size * 60
+        fold = 0.2 + 0.2 * size
+        expected = fold * 60 + (1 - fold) * (0.4 * (60 + 2 * bet) - bet)
+        assert surface.ev_bet[i] == pytest.approx(expected)
+    np.testing.assert_allclose(surface.ev_check, 0.4 * 60)
+
+
+def test_equity_grid_broadcasts():
+    equities = np.linspace(0, 1, 11)[:, None]
+    surface = sizing_surface(100, 1000, 1000, equities, call_freq=0.5)
+    assert surface.ev_bet.shape == (11, surface.sizes.shape[-1])
+    np.testing.assert_allclose(surface.fold_freq, 0.5)
+    # With nuts and a fixed call rate the largest size wins
+    assert surface.best_size[-1] == surface.sizes[-1, -1]
@@ -0,0 +1,41 @@
+import pickle
+
+import pytest
+
+from utils import Card, Deck, Suit, compare_hands, parse_cards
+
+
+def test_cards_are_interned():
+    assert Card("A", Suit.HEARTS) is Card.parse("Ah") is Card.from_id(Card.parse("Ah").id)
+    assert Card("10", Suit.CLUBS) is Card.parse("Tc") is Card.parse("10c")
+    assert pickle.loads(pickle.dumps(Card.parse("Ks"))) is Card.parse("Ks")
+
+
+def test_tens_display_as_10():
+    assert str(Card("10", Suit.HEARTS)) == "10♥"
+    assert Card("10", Suit.HEARTS).rank == "T"
+    assert str(Card.parse("Ad")) == "A♦"
+
+
+def test_parse_cards():
+    assert parse_cards("Ah 10d, Kc") == [Card.parse("Ah"), Card.parse("Td"), Card.parse("Kc")]
+    with pytest.raises(ValueError):
+        Card.parse("Xx")
+
+
+def test_deck_deals_each_card_once():
+    dead = parse_cards("AhKd")
+    deck = Deck(seed=3, dead=dead)
+    deck.shuffle()
+    dealt = deck.deal(50)
+    assert len(set(dealt)) == 50
+    assert not set(dealt) & set(dead)
+    assert deck.remaining == 0
+    with pytest.raises(ValueError):
+        deck.deal(1)
+
+
+def test_compare_hands():
+    board = parse_cards("2h7d9cJsQh")
+    assert compare_hands(parse_cards("AhAd") + board, parse_cards("KhKd") + board) == 1
+    assert compare_hands(parse_cards("3c4d") + board, parse_cards("3d4c") + board) == 0
@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.text_utils import sentence_spans
+
+TRANSCRIPT = """## Preflop
+Open the button to 2.5 blinds. Fold the small hands!
+## Flop
+On dry flops bet small? "Yes," he said. On wet flops bet bigger
+"""
+
+
+def test_sentence_spans_keep_the_original_text():
+    spans = sentence_spans(TRANSCRIPT)
+    assert [TRANSCRIPT[start:end] for start, end in spans] == [
+        "## Preflop",
+        "Open the button to 2.5 blinds.",
+        "Fold the small hands!",
+        "## Flop",
+        "On dry flops bet small?",
+        '"Yes," he said.',
+        "On wet flops bet bigger",
+    ]
+    assert all(start < end for start, end in spans)
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+
+
+@pytest.fixture
+def slice_chunks():
+    pytest.importorskip("litellm")
+    from src.processing_agents import ChunkingAgent
+
+    spans = sentence_spans(TRANSCRIPT)
+    return lambda plan: ChunkingAgent._slice_chunks(TRANSCRIPT, spans, plan)
+
+
+def test_chunks_cover_the_transcript_once(slice_chunks):
+    chunks = slice_chunks([{"start_sentence": 3, "topic": "Flop", "street": "flop"},
+                           {"start_sentence": 0, "topic": "Preflop"}])
+    assert [(c["start_sentence"], c["end_sentence"]) for c in chunks] == [(0, 2), (3, 6)]
+    assert [c["topic"] for c in chunks] == ["Preflop", "Flop"]
+    assert chunks[0]["content"] == TRANSCRIPT[:TRANSCRIPT.index("## Flop")].rstrip()
+    assert chunks[1]["content"] == TRANSCRIPT[TRANSCRIPT.index("## Flop"):].rstrip()
+    assert chunks[1]["word_count"] == len(chunks[1]["content"].split())
+
+
+def test_bad_starts_are_dropped_and_the_first_chunk_starts_at_zero(slice_chunks):
+    chunks = slice_chunks([{"start_sentence": 2, "topic": "A"}, {"start_sentence": "x"},
+                           {"start_sentence": 99}, {"start_sentence": 2, "topic": "dup"},
+                           {"start_sentence": 4, "topic": "B"}])
+    assert [(c["start_sentence"], c["topic"]) for c in chunks] == [(0, "A"), (4, "B")]
+
+
+def test_unusable_plan_falls_back_to_word_count(slice_chunks, monkeypatch):
+    from src import processing_agents
+
+    monkeypatch.setattr(processing_agents, "FALLBACK_CHUNK_WORDS", 8)
+    chunks = slice_chunks([])
+    assert len(chunks) > 1
+    assert "".join(c["content"] for c in chunks).replace(" ", "").replace("\n", "") == \
+        TRANSCRIPT.replace(" ", "").replace("\n", "")
+
+
+def test_the_model_only_sees_numbered_sentences(processor, pipeline_llm, tmp_path):
+    path = tmp_path / "lesson.txt"
+    path.write_text(TRANSCRIPT)
+    chunks = asyncio.run(processor.chunking_agent.process(path))
+    prompt = pipeline_llm.calls[0]["messages"][-1]["content"]
+    assert "[1] Open the button to 2.5 blinds." in prompt
+    assert [c["start_sentence"] for c in chunks["chunks"]] == [0, 2]
+    assert json.loads(processor.chunking_agent.chunks_file(path).read_text()) == chunks
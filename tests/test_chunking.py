@@ -0,0 +1,113 @@
+import sys
+
+import pytest
+
+from src.models.config import ModelConfig
+from src.utils.chunking import chunk_token_budget, iter_sentences, token_chunks, token_counter
+
+
+def words(text):
+    return len(text.split())
+
+
+def sentences(count, size=5, prefix="s"):
+    return [" ".join([f"{prefix}{n}"] * (size - 1) + ["end."]) for n in range(count)]
+
+
+def split(chunks):
+    return [chunk.split("\n") for chunk in chunks]
+
+
+def test_iter_sentences():
+    lines = ["## Intro\n", "Bet small on dry\n", "boards. Check wet ones. Then\n", "fold.\n",
+             "## Turn\n", "um so yeah\n", "more words here\n"]
+    assert list(iter_sentences(lines, max_chars=20)) == [
+        "## Intro", "Bet small on dry\nboards.", "Check wet ones.", "Then\nfold.",
+        "## Turn", "um so yeah", "more words here"]
+
+
+def test_iter_sentences_reads_lazily():
+    read = []
+
+    def lines():
+        for line in ["One. Two.\n", "Three.\n", "Four.\n"]:
+            read.append(line)
+            yield line
+
+    sentences = iter_sentences(lines())
+    assert next(sentences) == "One."
+    assert read == ["One. Two.\n"]
+
+
+@pytest.mark.parametrize("budget", [5, 12, 23, 40])
+def test_chunks_fit_the_budget_and_keep_every_sentence(budget):
+    text = sentences(30)
+    chunks = list(token_chunks(text, budget, words))
+    assert all(words(chunk) <= budget for chunk in chunks)
+    assert [s for chunk in split(chunks) for s in chunk] == text
+
+
+@pytest.mark.parametrize("overlap", [0, 5, 9, 10, 15])
+def test_overlap_repeats_trailing_sentences_within_the_limit(overlap):
+    text = sentences(30)
+    chunks = split(token_chunks(text, 20, words, overlap=overlap))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        repeated = [s for s in chunk if s in previous]
+        assert repeated == previous[len(previous) - len(repeated):]
+        assert chunk[:len(repeated)] == repeated
+        assert sum(map(words, repeated)) == overlap // 5 * 5
+        assert words("\n".join(chunk)) <= 20
+    # Dropping the repeats gives back the transcript
+    seen = []
+    for chunk in chunks:
+        seen += [s for s in chunk if s not in seen]
+    assert seen == text
+
+
+def test_overlap_never_crosses_a_section_header():
+    text = sentences(3) + ["## River"] + sentences(3, prefix="r")
+    chunks = split(token_chunks(text, 16, words, overlap=10))
+    assert chunks == [text[:3], text[3:6], text[4:]]
+
+
+def test_headers_start_chunks_once_half_full():
+    text = sentences(1) + ["## Flop"] + sentences(2, prefix="f") + ["## Turn"] + sentences(1, prefix="t")
+    chunks = split(token_chunks(text, 20, words))
+    # The first chunk is under half full at "## Flop", so the header stays in it
+    assert chunks == [text[:4], text[4:]]
+
+
+def test_long_sentences_are_split_into_word_windows():
+    long = " ".join(f"w{n}" for n in range(50))
+    chunks = list(token_chunks(["Short one.", long, "Last one."], 12, words))
+    assert all(words(chunk) <= 12 for chunk in chunks)
+    assert " ".join(chunks).split() == ["Short", "one."] + long.split() + ["Last", "one."]
+
+
+def test_token_chunks_are_lazy():
+    consumed = []
+
+    def text():
+        for sentence in sentences(100):
+            consumed.append(sentence)
+            yield sentence
+
+    first = next(token_chunks(text(), 10, words))
+    assert first.split("\n") == consumed[:2]
+    assert len(consumed) == 3
+
+
+def test_chunk_token_budget():
+    config = ModelConfig(max_tokens=1000, context_window=8000)
+    assert chunk_token_budget(config) == 3000
+    assert chunk_token_budget(ModelConfig(max_tokens=1000, context_window=8000, chunk_tokens=500)) == 500
+    # The instructions and the answer come out of the context window first
+    assert chunk_token_budget(config, reserved=5000) == 2000
+    assert chunk_token_budget(ModelConfig(max_tokens=3000, context_window=4000), reserved=2000) == 1
+
+
+def test_token_counter_falls_back_without_litellm(monkeypatch):
+    monkeypatch.setitem(sys.modules, "litellm", None)
+    count = token_counter("gpt-4o-mini")
+    assert count("") == 1
+    assert count("x" * 400) == 101
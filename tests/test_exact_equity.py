@@ -0,0 +1,65 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+import hand_evaluator
+from equity import card_ids, exact_equity, villain_combos
+
+
+def brute_force(hero, board, villains, dead=""):
+    """Reference equity by evaluating every runout one hand at a time"""
+    hero, board, dead = card_ids(hero), card_ids(board), card_ids(dead)
+    combos, weights = villain_combos(villains)
+    known = set(hero + board + dead)
+    counts = np.zeros(3)
+    for (a, b), weight in zip(combos.tolist(), weights):
+        if a in known or b in known:
+            continue
+        deck = [c for c in range(52) if c not in known | {a, b}]
+        for runout in combinations(deck, 5 - len(board)):
+            cards = board + list(runout)
+            hero_value = hand_evaluator.evaluate(hero + cards)
+            villain_value = hand_evaluator.evaluate([a, b] + cards)
+            if hero_value > villain_value:
+                counts[0] += weight
+            elif hero_value == villain_value:
+                counts[1] += weight
+            else:
+                counts[2] += weight
+    total = counts.sum()
+    return counts[0] / total, counts[1] / total, (counts[0] + counts[1] / 2) / total
+
+
+@pytest.mark.parametrize(
+    "hero, board, villain, dead",
+    [
+        ("AhKh", "Qh7d2c", "JsJd", ""),
+        ("AhKh", "Qh7d2c5s", "JsJd", ""),
+        ("7c7d", "Ah8s2d", "AKo, 88, T9s:0.5", ""),
+        ("5h4h", "6h7c2s9d", "QQ+, AhQh", "Kc"),
+        ("AsKs", "AhKdQc", "AdKh", ""),
+    ],
+)
+def test_matches_brute_force(hero, board, villain, dead):
+    result = exact_equity(hero, board, villain, dead or None)
+    win, tie, equity = brute_force(hero, board, villain, dead)
+    assert result.win == pytest.approx(win)
+    assert result.tie == pytest.approx(tie)
+    assert result.equity == pytest.approx(equity)
+
+
+def test_counts_every_live_matchup():
+    # 45 turn/river runouts after the flop and both hands
+    assert exact_equity("AhKh", "Qh7d2c", "JsJd").runouts == 990
+    # Range combos holding a board card are skipped, not counted
+    assert exact_equity("AhKh", "Qh7d2c", "QQ").runouts == 3 * 990
+
+
+def test_rejects_dead_villain():
+    with pytest.raises(ValueError, match="villain hand"):
+        exact_equity("AhKh", "Qh7d2c", "QhQd")
+    with pytest.raises(ValueError, match="Every villain combo"):
+        exact_equity("AhKh", "AdAc2c", "AA")
+    with pytest.raises(ValueError, match="at least a flop"):
+        exact_equity("AhKh", "", "QQ")
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from treys import Card, Evaluator
+
+import hand_evaluator as he
+
+# treys ranks 1 (royal flush) to 7462 (seven-high); ours run the other way
+TREYS_OFFSET = 7463
+
+
+def _treys_rank(evaluator, cards):
+    treys_cards = [Card.new(he.card_to_string(int(c))) for c in cards]
+    return evaluator.evaluate(treys_cards[:2], treys_cards[2:])
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_matches_treys_on_random_hands(size):
+    rng = np.random.default_rng(size)
+    hands = np.array([rng.permutation(52)[:size] for _ in range(1000)], dtype=np.int8)
+    values = he.evaluate_batch(hands)
+    evaluator = Evaluator()
+    for hand, value in zip(hands, values):
+        assert _treys_rank(evaluator, hand) == TREYS_OFFSET - value
+        assert he.evaluate([int(c) for c in hand]) == value
+
+
+def test_evaluate_accepts_numpy_cards():
+    hand = np.array([he.card_from_string(c) for c in ["Ah", "Kh", "Qh", "Jh", "Th"]], dtype=np.int8)
+    assert he.evaluate(hand) == 7462
+    assert he.hand_class(he.evaluate(hand)) == "Straight Flush"
+
+
+@pytest.mark.parametrize(
+    "cards, expected",
+    [
+        (["2h", "3d", "4c", "5s", "7h"], "High Card"),
+        (["Ah", "2d", "3c", "4s", "5h"], "Straight"),
+        (["Ah", "Ad", "Kc", "Ks", "2h", "2d", "9c"], "Two Pair"),
+        (["Ah", "Ad", "Ac", "Ks", "Kh", "2d", "2c"], "Full House"),
+        (["2h", "5h", "9h", "Jh", "Kh", "Ad", "Ac"], "Flush"),
+    ],
+)
+def test_hand_class(cards, expected):
+    assert he.hand_class(he.evaluate([he.card_from_string(c) for c in cards])) == expected
+
+
+def test_rejects_wrong_card_count():
+    with pytest.raises(ValueError):
+        he.evaluate([0, 1, 2, 3])
@@ -0,0 +1,130 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import hand_history
+from hand_history import (BET, CALL, RAISE, ColumnarWriter, convert_files, iter_hands,
+                          parse_amount, read_parts)
+from utils import parse_cards
+
+SAMPLE = Path(__file__).parent / "data" / "pokerstars_sample.txt"
+
+
+@pytest.fixture
+def hands():
+    errors = []
+    parsed = list(iter_hands(SAMPLE, errors))
+    assert errors == []
+    return parsed
+
+
+def test_parse_amount():
+    assert parse_amount("$1.25") == 125
+    assert parse_amount("€0.02") == 2
+    assert parse_amount("1,500") == 150_000
+    assert parse_amount("$10") == 1000
+
+
+def test_cash_hand(hands):
+    hand = hands[0]
+    assert hand.hand_id == 208311111111
+    assert hand.table == "Aludra II"
+    assert hand.played_at == 20200101120000
+    assert (hand.small_blind, hand.big_blind, hand.button) == (1, 2, 3)
+    assert hand.board == parse_cards("Kh7c2d9s3h")
+    assert (hand.total_pot, hand.rake) == (421, 13)
+
+
+def test_sitting_out_seats_are_not_dealt_in(hands):
+    hand = hands[0]
+    assert hand.seats == [1, 2, 3, 5, 6]
+    assert [p.name for p in hand.players] == ["alice", "bob", "carol", "erin", "frank"]
+    assert [p.chips for p in hand.players] == [200, 150, 234, 200, 310]
+    assert all(action.player < len(hand.players) for action in hand.actions)
+
+
+def test_cards_actions_and_winnings(hands):
+    hand = hands[0]
+    alice, frank = hand.players[0], hand.players[4]
+    assert alice.hand == parse_cards("AhKd")
+    assert frank.hand == parse_cards("9h9d")
+    assert hand.won == [0, 0, 0, 0, 408]
+
+    by_player = [(a.street, a.action, a.amount, a.all_in) for a in hand.actions if a.player == 4]
+    assert (0, CALL, 4, False) in by_player
+    assert (2, RAISE, 90, False) in by_player
+    assert by_player[-1] == (3, BET, 92, True)
+    # Alice's preflop raise to $0.06 adds six cents
+    assert (0, RAISE, 6) == next((a.street, a.action, a.amount) for a in hand.actions if a.player == 0)
+
+
+def test_zoom_hand(hands):
+    hand = hands[1]
+    assert hand.hand_id == 208322222222
+    assert (hand.small_blind, hand.big_blind) == (5, 10)
+    assert [p.name for p in hand.players] == ["alice", "bob"]
+    # Uncalled bet plus the collected pot
+    assert hand.won == [0, 40]
+
+
+def _summary(hand):
+    players = [(p.name, p.chips, p.hand) for p in hand.players]
+    return hand.hand_id, hand.seats, players, hand.board, hand.actions, hand.won, hand.total_pot
+
+
+def test_small_read_blocks_give_the_same_hands(hands, monkeypatch):
+    monkeypatch.setattr(hand_history, "READ_BLOCK", 37)
+    assert [_summary(h) for h in iter_hands(SAMPLE)] == [_summary(h) for h in hands]
+
+
+def test_bad_hands_are_reported_and_skipped(tmp_path):
+    path = tmp_path / "broken.txt"
+    text = SAMPLE.read_text(encoding="utf-8")
+    path.write_text("PokerStars Hand #1: garbage\n\n" + text, encoding="utf-8")
+    errors = []
+    parsed = list(iter_hands(path, errors))
+    assert [h.hand_id for h in parsed] == [208311111111, 208322222222]
+    assert [number for number, _ in errors] == [0]
+
+
+def test_columnar_round_trip(hands, tmp_path):
+    with ColumnarWriter(tmp_path / "sample", hands_per_part=1) as writer:
+        for hand in hands:
+            writer.write(hand)
+    assert writer.hands_written == 2
+    (tmp_path / "sample-00009.npz.tmp").write_bytes(b"partial")
+    (tmp_path / "sample-00010.tmp.npz").write_bytes(b"partial")
+
+    parts = list(read_parts(tmp_path))
+    assert len(parts) == 2
+    first = parts[0]
+    assert first["hand_id"].tolist() == [208311111111]
+    assert first["names"][first["player_name"]].tolist() == ["alice", "bob", "carol", "erin", "frank"]
+    assert first["player_won"].tolist() == [0, 0, 0, 0, 408]
+    assert first["player_hole"][0].tolist() == [c.id for c in parse_cards("AhKd")]
+    np.testing.assert_array_equal(first["hand_board"][0], [c.id for c in hands[0].board])
+    assert len(first["action_street"]) == len(hands[0].actions)
+
+
+def test_convert_files_skips_finished_files(tmp_path):
+    source = tmp_path / "history.txt"
+    source.write_bytes(SAMPLE.read_bytes())
+    out = tmp_path / "out"
+    manifest = convert_files([source], out, workers=1)
+    entry = manifest[str(source)]
+    assert (entry["hands"], entry["errors"]) == (2, 0)
+    assert json.loads((out / "manifest.json").read_text()) == manifest
+
+    part = out / entry["parts"][0]
+    mtime = part.stat().st_mtime_ns
+    assert convert_files([source], out, workers=1) == manifest
+    assert part.stat().st_mtime_ns == mtime
+
+    # A changed file is converted again
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("\n")
+    os.utime(source, (1, 1))
+    assert convert_files([source], out, workers=1)[str(source)]["mtime"] == 1
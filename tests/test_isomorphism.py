@@ -0,0 +1,76 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+from equity import exact_equity, villain_combos
+from equity_cache import EquityCache
+from isomorphism import PERMUTATIONS, canonical_board, canonicalize, count_canonical_flops
+from utils import parse_cards
+
+
+def ids(text):
+    return [card.id for card in parse_cards(text)]
+
+
+def relabel(cards, perm):
+    return [int(PERMUTATIONS[perm][c]) for c in cards]
+
+
+def test_canonical_flop_count():
+    assert count_canonical_flops() == 1755
+
+
+def test_canonical_form_is_suit_invariant():
+    rng = np.random.default_rng(0)
+    combos, weights = villain_combos("QQ+, AKs, T9s:0.5")
+    for _ in range(50):
+        cards = rng.permutation(52)[:7].tolist()
+        hero, board = cards[:2], cards[2:]
+        perm = int(rng.integers(len(PERMUTATIONS)))
+        moved_combos = PERMUTATIONS[perm][combos]
+        assert canonical_board(board) == canonical_board(relabel(board, perm))
+        assert (canonicalize(hero, board, combos=combos, weights=weights).key()
+                == canonicalize(relabel(hero, perm), relabel(board, perm),
+                                combos=moved_combos, weights=weights).key())
+
+
+def test_range_weights_are_part_of_the_key():
+    combos, _ = villain_combos("AKs")
+    full = canonicalize(ids("QhQd"), ids("2c7s9h"), combos=combos, weights=np.ones(4))
+    half = canonicalize(ids("QhQd"), ids("2c7s9h"), combos=combos, weights=np.full(4, 0.5))
+    assert full.key() != half.key()
+
+
+def test_isomorphic_spots_hit_the_cache():
+    with EquityCache(path=None) as cache:
+        first = cache.exact_equity("AhKh", "Qh7d2c", "JsJd")
+        second = cache.exact_equity("AsKs", "Qs7h2d", "JcJh")
+        assert cache.misses == 1
+        assert cache.hits["memory"] == 1
+    assert first == second
+    assert first.equity == pytest.approx(exact_equity("AhKh", "Qh7d2c", "JsJd").equity)
+
+
+def test_unseeded_monte_carlo_is_not_cached():
+    with EquityCache(path=None) as cache:
+        cache.monte_carlo_equity("AhKh", runouts=1_000)
+        cache.monte_carlo_equity("AhKh", runouts=1_000)
+        assert cache.misses == 0 and cache.hits["memory"] == 0
+
+        cache.monte_carlo_equity("AhKh", runouts=1_000, seed=1)
+        cache.monte_carlo_equity("AdKd", runouts=1_000, seed=1)
+        assert cache.misses == 1 and cache.hits["memory"] == 1
+
+
+def test_disk_level_survives_reopen(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    with EquityCache(path, commit_every=2) as cache:
+        cache.exact_equity("AhKh", "Qh7d2c", "JsJd")
+        # Below commit_every the write is not visible to other connections yet
+        with sqlite3.connect(path) as other:
+            assert other.execute("SELECT COUNT(*) FROM equity").fetchone()[0] == 0
+    with EquityCache(path) as cache:
+        cache.exact_equity("AcKc", "Qc7h2s", "JdJh")
+        assert cache.hits["disk"] == 1
+        assert cache.misses == 0
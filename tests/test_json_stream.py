@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.json_stream import JsonObjectStream, SchemaError
+
+SCHEMA = {"questions": ["question"], "notes": []}
+DOCUMENT = """```json
+{
+  "meta": {"items": [{"x": 1}], "text": "ignored ] } ["},
+  "questions": [
+    {"question": "Bet {small} or [big]?", "answer": "He said \\"small\\"\\n"},
+    {"question": "Line\nbreak", "tags": ["a", "b"], "nested": {"k": [1, 2]}}
+  ],
+  "notes": [],
+  "count": 2
+}
+```"""
+
+
+def stream_items(text, size):
+    parser = JsonObjectStream(SCHEMA)
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return parser, items
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(DOCUMENT)])
+def test_any_split_gives_the_same_items(size):
+    parser, items = stream_items(DOCUMENT, size)
+    assert parser.started and parser.finished
+    assert [collection for collection, _ in items] == ["questions", "questions"]
+    assert items[0][1] == {"question": "Bet {small} or [big]?", "answer": 'He said "small"\n'}
+    assert items[1][1]["question"] == "Line\nbreak"
+    assert items[1][1]["nested"] == {"k": [1, 2]}
+    assert parser.result == {"questions": [item for _, item in items], "notes": []}
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = JsonObjectStream(SCHEMA)
+    head = '{"questions": [{"question": "one"}, {"question": "tw'
+    assert parser.feed(head) == [("questions", {"question": "one"})]
+    assert parser.feed('o"}') == [("questions", {"question": "two"})]
+    assert not parser.finished
+    parser.feed("]}")
+    assert parser.finished
+    assert parser.feed('{"questions": [{"question": "late"}]}') == []
+
+
+def test_truncated_response_keeps_complete_items():
+    parser, items = stream_items('{"questions": [{"question": "one"}, {"question": "tw', 5)
+    assert parser.started and not parser.finished
+    assert parser.result["questions"] == [{"question": "one"}]
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ('[{"question": "q"}]', "got an array"),
+        ('{"questions": {"question": "q"}}', "not an array"),
+        ('{"questions": "none"}', "not an array"),
+        ('{"questions": 3}', "not an array"),
+        ('{"questions": ["q"]}', "not an object"),
+        ('{"questions": [[1]]}', "not an object"),
+        ('{"questions": [7]}', "not an object"),
+        ('{"questions": [{"answer": "a"}]}', "missing"),
+        ('{"questions": [{"question": tru}]}', "not valid JSON"),
+    ],
+)
+def test_off_schema_responses_fail_fast(text, message):
+    with pytest.raises(SchemaError, match=message):
+        stream_items(text, 4)
+
+
+def test_streamed_questions_persist_and_failures_restore(processor, fake_llm):
+    processor.llm_client.config.stream = True
+    agent = processor.question_agent
+    chunks = {"chunks": [{"id": 1, "content": "Bet small on dry boards."}]}
+
+    fake_llm.reply = lambda params: json.dumps({"questions": [{"question": "q1"}, {"question": "q2"}]})
+    asyncio.run(agent.process(chunks, "lesson"))
+    assert [q["question"] for q in agent.iter_questions()] == ["q1", "q2"]
+    assert fake_llm.calls[-1]["stream"] is True
+
+    # One good item, then the response goes off schema
+    fake_llm.reply = lambda params: '{"questions": [{"question": "new"}, "oops"]}'
+    with pytest.raises(SchemaError):
+        asyncio.run(agent.process(chunks, "lesson"))
+    assert [q["question"] for q in agent.iter_questions()] == ["q1", "q2"]
+    assert [q["question"] for q in agent.repository.questions(source_transcript="lesson")] == ["q1", "q2"]
@@ -0,0 +1,84 @@
+import json
+import time
+
+import pytest
+
+from src.utils.json_utils import JsonRepairError, parse_json_outcome, repair_json
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": 1, "b": [true, false, null], "c": {"d": "e\\n\\u00e9"}}',
+    '[1, -2.5, 3e2, "x"]',
+    '{"emoji": "\\ud83d\\ude00", "empty": {}, "list": []}',
+])
+def test_valid_json_round_trips_without_recoveries(text):
+    assert repair_json(text) == (json.loads(text), [])
+
+
+@pytest.mark.parametrize("text, expected, recovery", [
+    ('Sure! ```json\n{"a": 1}\n```', {"a": 1}, "skipped leading text"),
+    ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}, "removed trailing comma (x2)"),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}, "inserted missing comma"),
+    ('{"a": [1, 2}', {"a": [1, 2]}, "fixed mismatched bracket"),
+    ("{'a': 'b'}", {"a": "b"}, "converted single-quoted string (x2)"),
+    ('{"a": True, "b": None}', {"a": True, "b": None}, "converted Python literal (x2)"),
+    ('{"a": "line\nbreak"}', {"a": "line\nbreak"}, "escaped control character"),
+    ('{"q": "he said "fold" there"}', {"q": 'he said "fold" there'}, "kept unescaped quote inside string (x2)"),
+    ('{"a": "c:\\d"}', {"a": "c:d"}, "kept invalid escape"),
+    ('{"a": 1}\nHope this helps!', {"a": 1}, "ignored trailing text"),
+    ('{"a": 1, "b"}', {"a": 1}, "dropped key without value"),
+])
+def test_repairs(text, expected, recovery):
+    value, recoveries = repair_json(text)
+    assert value == expected
+    assert recovery in recoveries
+
+
+def test_truncated_tail_closes_string_and_containers():
+    value, recoveries = repair_json('{"questions": [{"q": "first"}, {"q": "sec')
+    assert value == {"questions": [{"q": "first"}, {"q": "sec"}]}
+    assert recoveries == ["closed truncated string", "closed truncated containers"]
+
+
+def test_openers_restrict_where_the_value_starts():
+    assert repair_json('[noise] {"a": 1}', "{")[0] == {"a": 1}
+    with pytest.raises(JsonRepairError):
+        repair_json("no json here", "{")
+    with pytest.raises(ValueError):
+        repair_json("")
+
+
+@pytest.mark.parametrize("text", [
+    "{" * 25_000 + "x" * 25_000,
+    '{"a": "' + '\\"' * 25_000,
+    '{"q": "' + '" ' * 25_000 + '"}',
+])
+def test_pathological_inputs_stay_linear(text):
+    start = time.perf_counter()
+    repair_json(text, "{")
+    assert time.perf_counter() - start < 2
+
+
+def test_parse_json_outcome():
+    assert parse_json_outcome('{"questions": []}', "questions") == ({"questions": []}, "clean")
+    data, outcome = parse_json_outcome('{"questions": [{"question": "x"},]}', "questions")
+    assert (data, outcome) == ({"questions": [{"question": "x"}]}, "repaired")
+    # Rules answers get the missing categories filled in
+    data, outcome = parse_json_outcome('{"general_principles": [{"id": "p1"}]}', "rules")
+    assert outcome == "clean"
+    assert data["bet_sizing_rules"] == [] and data["general_principles"] == [{"id": "p1"}]
+
+
+def test_parse_json_outcome_drops_non_object_items():
+    data, outcome = parse_json_outcome('{"questions": ["loose", {"question": "x"}]}', "questions")
+    assert (data, outcome) == ({"questions": [{"question": "x"}]}, "repaired")
+
+
+@pytest.mark.parametrize("response", ["no json", '{"answer": 1}', '{"questions": "x"}', None])
+def test_parse_json_outcome_falls_back_to_empty_shape(response):
+    assert parse_json_outcome(response, "questions") == ({"questions": []}, "failed")
+
+
+def test_parse_json_outcome_without_context_raises():
+    with pytest.raises(Exception, match="Failed to parse JSON"):
+        parse_json_outcome("no json")
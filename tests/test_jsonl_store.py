@@ -0,0 +1,71 @@
+import json
+from multiprocessing import Pool
+
+from src.utils.jsonl_store import DELETE_KEY, JsonlStore
+
+
+def records(store, **where):
+    return list(store.iter_records(where or None))
+
+
+def test_append_and_filter(tmp_path):
+    store = JsonlStore(tmp_path / "q.jsonl")
+    assert records(store) == []
+    store.append([{"t": "a", "n": 1}, {"t": "b", "n": 2}])
+    store.append([{"t": "a", "n": 3, "text": "ünïcode"}])
+    assert [r["n"] for r in store] == [1, 2, 3]
+    assert [r["n"] for r in records(store, t="a")] == [1, 3]
+
+
+def test_replace_supersedes_earlier_records_only(tmp_path):
+    store = JsonlStore(tmp_path / "q.jsonl")
+    store.append([{"t": "a", "n": 1}, {"t": "b", "n": 2}, {"t": "a", "n": 3}])
+    store.replace("t", "a", [{"t": "a", "n": 4}])
+    store.append([{"t": "a", "n": 5}])
+    assert [r["n"] for r in store] == [2, 4, 5]
+    store.replace("t", "b", [])
+    assert [r["n"] for r in store] == [4, 5]
+
+
+def test_torn_last_line_is_skipped_and_not_glued_to(tmp_path):
+    path = tmp_path / "q.jsonl"
+    store = JsonlStore(path)
+    store.append([{"n": 1}])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"n": 2, "text": "cut o')
+    assert [r["n"] for r in store] == [1]
+    assert store.skipped_lines == 1
+    store.append([{"n": 3}])
+    assert [r["n"] for r in store] == [1, 3]
+
+
+def test_compact_keeps_live_records_and_drops_markers(tmp_path):
+    path = tmp_path / "q.jsonl"
+    store = JsonlStore(path)
+    for n in range(5):
+        store.replace("t", "a", [{"t": "a", "n": n}, {"t": "a", "n": n + 100}])
+    store.append([{"t": "b", "n": 7}])
+    before = records(store)
+    assert store.compact() == 3
+    assert records(store) == before
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines == before
+    assert not any(DELETE_KEY in line for line in lines)
+    assert not path.with_name(path.name + ".tmp").exists()
+
+
+def _append_many(args):
+    path, worker = args
+    store = JsonlStore(path)
+    for n in range(50):
+        store.append([{"worker": worker, "n": n, "pad": "x" * 500}])
+
+
+def test_concurrent_writers_never_interleave(tmp_path):
+    path = tmp_path / "q.jsonl"
+    with Pool(4) as pool:
+        pool.map(_append_many, [(path, worker) for worker in range(4)])
+    store = JsonlStore(path)
+    found = records(store)
+    assert store.skipped_lines == 0
+    assert sorted((r["worker"], r["n"]) for r in found) == [(w, n) for w in range(4) for n in range(50)]
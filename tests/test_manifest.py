@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from src.utils.manifest import RunManifest, content_hash
+
+TRANSCRIPT = ("Open the button to two and a half blinds. Fold the small hands. "
+              "On dry flops bet small. On wet flops bet bigger or check.")
+
+
+def test_stages_are_pending_until_marked(tmp_path):
+    manifest = RunManifest(tmp_path)
+    assert manifest.pending_stages("t", "h1") == ["chunk", "questions", "rules"]
+    manifest.mark_done("t", "h1", "chunk")
+    manifest.mark_done("t", "h1", "questions")
+    assert manifest.pending_stages("t", "h1") == ["rules"]
+    assert manifest.is_done("t", "h1", "questions")
+
+    reloaded = RunManifest(tmp_path)
+    assert reloaded.pending_stages("t", "h1") == ["rules"]
+    assert set(json.loads((tmp_path / "manifest.json").read_text())["t"]["stages"]) == {"chunk", "questions"}
+
+
+def test_new_content_invalidates_every_stage(tmp_path):
+    manifest = RunManifest(tmp_path)
+    for stage in ("chunk", "questions", "rules"):
+        manifest.mark_done("t", "h1", stage)
+    assert manifest.pending_stages("t", "h1") == []
+    assert manifest.pending_stages("t", "h2") == ["chunk", "questions", "rules"]
+    manifest.mark_done("t", "h2", "chunk")
+    assert manifest.pending_stages("t", "h1") == ["chunk", "questions", "rules"]
+
+
+def test_redoing_a_stage_invalidates_its_dependents(tmp_path):
+    manifest = RunManifest(tmp_path)
+    for stage in ("chunk", "questions", "rules"):
+        manifest.mark_done("t", "h1", stage)
+    manifest.mark_done("t", "h1", "chunk")
+    assert manifest.pending_stages("t", "h1") == ["questions", "rules"]
+    manifest.mark_done("t", "h1", "rules")
+    assert manifest.pending_stages("t", "h1") == ["questions"]
+
+
+def test_forget(tmp_path):
+    manifest = RunManifest(tmp_path)
+    manifest.mark_done("t", "h1", "chunk")
+    manifest.forget("t")
+    assert RunManifest(tmp_path).pending_stages("t", "h1") == ["chunk", "questions", "rules"]
+
+
+def test_content_hash(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_text("abc")
+    first = content_hash(path)
+    path.write_text("abd")
+    assert content_hash(path) != first
+
+
+def test_processor_skips_finished_transcripts(processor, pipeline_llm, tmp_path):
+    path = tmp_path / "lesson.txt"
+    path.write_text(TRANSCRIPT)
+
+    assert asyncio.run(processor.process_transcript(path))
+    calls = len(pipeline_llm.calls)
+    assert calls == 5  # chunk plan, then questions and rules for each of two chunks
+
+    assert asyncio.run(processor.process_transcript(path))
+    assert len(pipeline_llm.calls) == calls
+
+    # Losing the rules stage reruns only that stage
+    processor.manifest.data["lesson"]["stages"].pop("rules")
+    assert asyncio.run(processor.process_transcript(path))
+    assert len(pipeline_llm.calls) == calls + 2
+
+    path.write_text(TRANSCRIPT + " Always think about ranges.")
+    assert asyncio.run(processor.process_transcript(path))
+    assert len(pipeline_llm.calls) == calls + 2 + 5
@@ -0,0 +1,53 @@
+import pytest
+
+from equity import exact_equity, monte_carlo_equity
+from ranges import CLASS_INDEX, class_weights, parse_range
+
+
+def test_parse_range_expands_shorthand():
+    combos, weights = parse_range("QQ+, AKs, AQo:0.5, 7h6h")
+    assert len(combos) == 3 * 6 + 4 + 12 + 1
+    assert (combos[:, 0] > combos[:, 1]).all()
+    assert sorted(set(weights.tolist())) == [0.5, 1.0]
+
+
+def test_parse_range_dash_and_weights():
+    assert len(parse_range("22-55")[0]) == 4 * 6
+    assert len(parse_range("A2s-A5s")[0]) == 4 * 4
+    assert len(parse_range("AKo:0")[0]) == 0
+    weights = class_weights("AKs,AQo:0.5")
+    assert weights[CLASS_INDEX["AKs"]] == 1.0
+    assert weights[CLASS_INDEX["AQo"]] == 0.5
+    assert weights.sum() == 1.5
+
+
+@pytest.mark.parametrize("token", ["AX", "AKx", "AKs:x", "1h2h"])
+def test_parse_range_names_bad_token(token):
+    with pytest.raises(ValueError, match="Invalid range token"):
+        parse_range(f"AA,{token}")
+
+
+def test_seeded_runs_are_reproducible():
+    first = monte_carlo_equity("AhKh", opponents=3, runouts=20_000, seed=7)
+    second = monte_carlo_equity("AhKh", opponents=3, runouts=20_000, seed=7)
+    assert first == second
+    assert first.runouts == 20_000
+    assert first.win + first.tie + first.loss == pytest.approx(1.0)
+
+
+def test_agrees_with_exact_enumeration():
+    sampled = monte_carlo_equity("AhKh", "Qh7d2c", ["JsJd"], runouts=200_000, seed=1)
+    exact = exact_equity("AhKh", "Qh7d2c", "JsJd")
+    assert sampled.equity == pytest.approx(exact.equity, abs=0.005)
+
+
+def test_preflop_aces_against_random_hand():
+    result = monte_carlo_equity("AsAd", runouts=200_000, seed=2)
+    assert result.equity == pytest.approx(0.852, abs=0.005)
+
+
+def test_rejects_duplicate_cards():
+    with pytest.raises(ValueError):
+        monte_carlo_equity("AhKh", "AhQd2c", runouts=10)
+    with pytest.raises(ValueError):
+        monte_carlo_equity("AhKh", opponents=["KhQd"], runouts=10)
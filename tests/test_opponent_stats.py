@@ -0,0 +1,110 @@
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from hand_history import CALL, FOLD, POST, RAISE, HandAction, ParsedHand, iter_hands
+from opponent_stats import STATS, StatsEngine, hand_flags
+from utils import Player
+
+SAMPLE = Path(__file__).parent / "data" / "pokerstars_sample.txt"
+NAMES = ["alice", "bob", "carol", "dave"]
+
+
+def make_hand(day: date, names, raiser: int) -> ParsedHand:
+    """Preflop-only hand: ``raiser`` opens, the player after calls, the rest fold"""
+    played_at = int(day.strftime("%Y%m%d")) * 10 ** 6 + 120000
+    hand = ParsedHand(0, "t", played_at, 1, 2, 1, players=[Player(n, 200) for n in names])
+    hand.actions = [HandAction(0, 0, POST, 1), HandAction(0, 1, POST, 2)]
+    for offset in range(len(names)):
+        player = (raiser + offset) % len(names)
+        code = RAISE if offset == 0 else CALL if offset == 1 else FOLD
+        hand.actions.append(HandAction(0, player, code, 6 if code != FOLD else 0))
+    return hand
+
+
+def ordinal(hand: ParsedHand) -> int:
+    return date.fromisoformat(str(hand.played_at)[:8]).toordinal()
+
+
+def expected_counts(hands, name, window_hands=None, window_days=None):
+    """Reference counters by rescanning the hands the window covers"""
+    latest = max(ordinal(hand) for hand in hands)
+    seen = []
+    for hand in hands:
+        names = [p.name for p in hand.players]
+        if name in names:
+            seen.append((ordinal(hand), hand_flags(hand)[names.index(name)]))
+    if window_hands is not None:
+        seen = seen[-window_hands:]
+    if window_days is not None:
+        seen = [(day, mask) for day, mask in seen if day > latest - window_days]
+    return {stat: sum(mask >> i & 1 for _, mask in seen) for i, stat in enumerate(STATS)}
+
+
+def random_hands(count, seed, shuffle=False):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    hands = []
+    for n in range(count):
+        names = rng.sample(NAMES, rng.randint(2, 4))
+        day = start + timedelta(days=n // 5)
+        hands.append(make_hand(day, names, rng.randrange(len(names))))
+    if shuffle:
+        rng.shuffle(hands)
+    return hands
+
+
+def test_sample_hand_flags():
+    hand = next(iter_hands(SAMPLE))
+    engine = StatsEngine()
+    engine.update(hand)
+    alice = engine.stats("alice").counts
+    assert (alice["vpip"], alice["pfr"], alice["cbet_opp"], alice["cbet"]) == (1, 1, 1, 1)
+    carol = engine.stats("carol").counts
+    assert (carol["three_bet_opp"], carol["three_bet"], carol["fold_to_cbet"]) == (1, 0, 1)
+    frank = engine.stats("frank").counts
+    assert (frank["fold_to_cbet_opp"], frank["fold_to_cbet"]) == (1, 0)
+    assert engine.stats("dave") is None
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_windows_match_a_rescan(shuffle):
+    hands = random_hands(300, seed=1, shuffle=shuffle)
+    engine = StatsEngine(window_hands=25, window_days=7)
+    engine.update_many(hands)
+    for name in NAMES:
+        assert engine.stats(name, "all").counts == expected_counts(hands, name)
+        assert engine.stats(name, "days").counts == expected_counts(hands, name, window_days=7)
+        if not shuffle:
+            assert engine.stats(name, "hands").counts == expected_counts(hands, name, window_hands=25)
+
+
+def test_out_of_order_hands_give_the_same_day_window():
+    ordered = StatsEngine(window_days=10)
+    ordered.update_many(random_hands(200, seed=2))
+    shuffled = StatsEngine(window_days=10)
+    shuffled.update_many(random_hands(200, seed=2, shuffle=True))
+    for name in NAMES:
+        assert shuffled.stats(name, "days") == ordered.stats(name, "days")
+
+
+def test_save_and_load(tmp_path):
+    hands = random_hands(120, seed=3)
+    engine = StatsEngine(window_hands=10, window_days=5)
+    engine.update_many(hands[:100])
+    engine.save(tmp_path / "stats.npz")
+    loaded = StatsEngine.load(tmp_path / "stats.npz")
+    for stats_engine in (engine, loaded):
+        stats_engine.update_many(hands[100:])
+    for name in NAMES:
+        for window in ("all", "hands", "days"):
+            assert loaded.stats(name, window) == engine.stats(name, window)
+
+
+def test_unknown_window():
+    engine = StatsEngine()
+    engine.update(make_hand(date(2024, 1, 1), NAMES, 0))
+    with pytest.raises(ValueError, match="Unknown window"):
+        engine.stats("alice", "weeks")
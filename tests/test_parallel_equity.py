@@ -0,0 +1,36 @@
+import pytest
+
+from equity import exact_equity
+from parallel_equity import ParallelEquityEngine
+
+
+def test_monte_carlo_is_independent_of_worker_count():
+    results = []
+    for workers in (1, 2):
+        with ParallelEquityEngine(workers) as engine:
+            results.append(engine.monte_carlo("AhKh", opponents=2, runouts=50_000,
+                                              seed=7, shard_runouts=8_192))
+    assert results[0] == results[1]
+    assert results[0].runouts == 50_000
+
+
+def test_different_seeds_differ():
+    with ParallelEquityEngine(1) as engine:
+        first = engine.monte_carlo("AhKh", runouts=20_000, seed=1)
+        second = engine.monte_carlo("AhKh", runouts=20_000, seed=2)
+    assert first != second
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_exact_matches_single_process(workers):
+    expected = exact_equity("7c7d", "Ah8s2d", "AKo, 88, T9s:0.5")
+    with ParallelEquityEngine(workers) as engine:
+        result = engine.exact("7c7d", "Ah8s2d", "AKo, 88, T9s:0.5", shard_combos=5)
+    assert result.runouts == expected.runouts
+    assert result.equity == pytest.approx(expected.equity)
+    assert result.tie == pytest.approx(expected.tie)
+
+
+def test_exact_rejects_dead_villain():
+    with ParallelEquityEngine(1) as engine, pytest.raises(ValueError):
+        engine.exact("AhKh", "Qh7d2c", "QhQd")
@@ -0,0 +1,26 @@
+import asyncio
+
+
+def test_transcripts_run_under_the_concurrency_bound(processor, tmp_path):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    for n in range(7):
+        (transcripts / f"t{n}.txt").write_text("text")
+
+    active, peak, seen = 0, 0, []
+
+    async def process_transcript(path):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        seen.append(path.name)
+        return path.name != "t3.txt"
+
+    processor.process_transcript = process_transcript
+    results = asyncio.run(processor.process_all_transcripts(transcripts, concurrency=3))
+    assert peak == 3
+    assert sorted(seen) == [f"t{n}.txt" for n in range(7)]
+    assert results["failed"] == ["t3.txt"]
+    assert len(results["succeeded"]) == 6
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import preflop_table
+from equity import monte_carlo_equity
+from preflop_table import PreflopTable, write_table
+from ranges import CLASS_INDEX, CLASS_SIZES, NUM_CLASSES, class_combos
+
+
+@pytest.fixture
+def table(tmp_path):
+    rng = np.random.default_rng(0)
+    win = rng.uniform(0, 0.5, (NUM_CLASSES, NUM_CLASSES))
+    tie = np.full((NUM_CLASSES, NUM_CLASSES), 0.1)
+    combos = np.outer(CLASS_SIZES, CLASS_SIZES).astype(float)
+    path = tmp_path / "preflop.bin"
+    write_table(path, win, tie, combos)
+    return PreflopTable(path), win, tie, combos
+
+
+def test_round_trips_through_the_file(table):
+    loaded, win, tie, combos = table
+    np.testing.assert_array_equal(loaded.win, win)
+    np.testing.assert_array_equal(loaded.tie, tie)
+    np.testing.assert_array_equal(loaded.combos, combos)
+    assert loaded.equity("AKs", "QQ") == pytest.approx(
+        win[CLASS_INDEX["AKs"], CLASS_INDEX["QQ"]] + 0.05)
+    assert loaded.equity(1, 0) == loaded.equity("AKs", "AA")
+
+
+def test_range_equity_weights_by_combos(table):
+    loaded, win, tie, combos = table
+    hero, villain = CLASS_INDEX["AA"], [CLASS_INDEX["KK"], CLASS_INDEX["AKo"]]
+    equity = win + tie / 2
+    expected = (combos[hero, villain] * equity[hero, villain]).sum() / combos[hero, villain].sum()
+    assert loaded.range_equity("AA", "KK,AKo") == pytest.approx(expected)
+
+
+def test_rejects_bad_input(table, tmp_path):
+    loaded = table[0]
+    with pytest.raises(ValueError, match="Unknown hand class"):
+        loaded.equity("AKx", "QQ")
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"\0" * 128)
+    with pytest.raises(ValueError):
+        PreflopTable(bad)
+
+
+def test_villain_representatives_cover_every_live_combo():
+    hero = class_combos(CLASS_INDEX["AKs"])[0]
+    for villain_class in (CLASS_INDEX["AA"], CLASS_INDEX["AKo"], CLASS_INDEX["T9s"]):
+        live = [c for c in class_combos(villain_class) if not set(c) & set(hero)]
+        reps = preflop_table._villain_representatives(hero, villain_class)
+        assert sum(count for _, count in reps) == len(live)
+        assert len(reps) <= len(live)
+
+
+def test_class_row_matches_sampling():
+    preflop_table._init_boards()
+    deuces = CLASS_INDEX["22"]
+    _, wins, ties, combos = preflop_table._class_row(deuces)
+    hero, villain = class_combos(deuces)[0], class_combos(deuces)[-1]
+    sampled = monte_carlo_equity(list(hero), opponents=[list(villain)], runouts=200_000, seed=1)
+    assert combos[deuces] == 1
+    assert wins[deuces] == pytest.approx(sampled.win, abs=0.003)
+    assert ties[deuces] == pytest.approx(sampled.tie, abs=0.003)
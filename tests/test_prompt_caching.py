@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.config import ModelConfig
+from src.prompts import (
+    CHUNKING_INSTRUCTIONS,
+    QUESTION_INSTRUCTIONS,
+    chunking_prompt,
+    question_generation_prompt,
+    rules_extraction_prompt,
+)
+from src.utils.rate_limiter import input_token_split
+
+
+def test_instructions_are_identical_across_calls():
+    chunks = [{"chunks": [{"id": n, "content": f"chunk {n}"}]} for n in (1, 2)]
+    first, second = (question_generation_prompt(c, "lesson") for c in chunks)
+    assert first.instructions == second.instructions == QUESTION_INSTRUCTIONS
+    assert first.content != second.content
+    assert rules_extraction_prompt(chunks[0], "a").instructions == rules_extraction_prompt(chunks[1], "b").instructions
+    prompt = chunking_prompt(["First.", "Second."])
+    assert prompt.instructions == CHUNKING_INSTRUCTIONS
+    assert "First." in prompt.content and "First." not in prompt.instructions
+    assert str(prompt).startswith(CHUNKING_INSTRUCTIONS)
+
+
+def usage(**fields):
+    return SimpleNamespace(usage=SimpleNamespace(**fields))
+
+
+def test_input_token_split():
+    assert input_token_split(SimpleNamespace()) == {"cached": 0, "cache_write": 0, "uncached": 0}
+    openai = usage(prompt_tokens=1500, prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+    assert input_token_split(openai) == {"cached": 1024, "cache_write": 0, "uncached": 476}
+    anthropic = usage(prompt_tokens=1200, prompt_tokens_details=None,
+                      cache_read_input_tokens=0, cache_creation_input_tokens=1100)
+    assert input_token_split(anthropic) == {"cached": 0, "cache_write": 1100, "uncached": 1200}
+    anthropic = usage(prompt_tokens=1200, cache_read_input_tokens=1100)
+    assert input_token_split(anthropic) == {"cached": 1100, "cache_write": 0, "uncached": 100}
+
+
+@pytest.fixture
+def llm_client(fake_llm):
+    from src.utils import llm_client
+
+    return llm_client
+
+
+def test_uses_cache_control(llm_client):
+    assert llm_client.uses_cache_control("claude-3-5-haiku-20241022")
+    assert llm_client.uses_cache_control("anthropic/claude-sonnet-4")
+    assert llm_client.uses_cache_control("bedrock/anthropic.claude-3-haiku")
+    assert not llm_client.uses_cache_control("gpt-4o-mini")
+    assert not llm_client.uses_cache_control("ollama/llama3")
+
+
+@pytest.mark.parametrize("model, prompt_caching, marked", [
+    ("claude-3-5-haiku-20241022", True, True),
+    ("claude-3-5-haiku-20241022", False, False),
+    ("gpt-4o-mini", True, False),
+])
+def test_messages_put_instructions_first(llm_client, model, prompt_caching, marked):
+    client = llm_client.LLMClient(ModelConfig(model=model, prompt_caching=prompt_caching))
+    prompt = question_generation_prompt({"chunks": []}, "lesson")
+    system, user = client._messages(prompt)
+    assert user == {"role": "user", "content": prompt.content}
+    assert system["role"] == "system"
+    if marked:
+        assert system["content"] == [{"type": "text", "text": QUESTION_INSTRUCTIONS,
+                                      "cache_control": {"type": "ephemeral"}}]
+    else:
+        assert system["content"] == QUESTION_INSTRUCTIONS
+    assert client._messages("plain") == [{"role": "user", "content": "plain"}]
+
+
+def test_cached_input_tokens_are_totalled(fake_llm, llm_client, monkeypatch):
+    fake_llm.reply = lambda params: '{"questions": []}'
+    client = llm_client.LLMClient(ModelConfig(model="gpt-4o-mini", use_cache=False, structured_output=False))
+    splits = iter([
+        SimpleNamespace(prompt_tokens=1500, prompt_tokens_details=SimpleNamespace(cached_tokens=0)),
+        SimpleNamespace(prompt_tokens=1500, prompt_tokens_details=SimpleNamespace(cached_tokens=1280)),
+    ])
+    respond = fake_llm.__call__
+
+    async def with_usage(**params):
+        response = await respond(**params)
+        response.usage = next(splits)
+        return response
+
+    monkeypatch.setattr(llm_client, "acompletion", with_usage)
+    for n in range(2):
+        asyncio.run(client.call_json(question_generation_prompt({"chunks": [n]}, "lesson"), "questions"))
+    assert client.input_tokens == {"calls": 2, "cached": 1280, "cache_write": 0, "uncached": 1720}
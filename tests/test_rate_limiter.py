@@ -0,0 +1,133 @@
+import asyncio
+import email.utils
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.config import ModelConfig
+from src.utils import rate_limiter
+from src.utils.rate_limiter import (RateLimiter, backoff_delay, estimate_tokens,
+                                    is_rate_limit_error, retry_after_seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen time.time for the limiter; advance by assigning clock.now"""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def limiter(tmp_path, rpm=None, tpm=None, model="m"):
+    return RateLimiter(model, rpm, tpm, state_file=tmp_path / "limits.sqlite")
+
+
+def test_request_bucket(tmp_path, clock):
+    bucket = limiter(tmp_path, rpm=2)
+    assert bucket._try_acquire(0) == 0
+    assert bucket._try_acquire(0) == 0
+    assert bucket._try_acquire(0) == pytest.approx(30)
+    clock.now += 30
+    assert bucket._try_acquire(0) == 0
+
+
+def test_token_bucket(tmp_path, clock):
+    bucket = limiter(tmp_path, tpm=1000)
+    assert bucket._try_acquire(600) == 0
+    assert bucket._try_acquire(600) == pytest.approx(12)
+    clock.now += 12
+    assert bucket._try_acquire(600) == 0
+    # A call larger than the whole bucket waits for a full bucket, not forever
+    clock.now += 60
+    assert bucket._try_acquire(5000) == 0
+
+
+def test_settle_returns_unused_tokens(tmp_path, clock):
+    bucket = limiter(tmp_path, tpm=1000)
+    assert bucket._try_acquire(900) == 0
+    bucket.settle(900, 100)
+    assert bucket._try_acquire(900) == 0
+
+
+def test_budget_is_shared_through_the_state_file(tmp_path, clock):
+    first, second = limiter(tmp_path, rpm=1), limiter(tmp_path, rpm=1)
+    other_model = limiter(tmp_path, rpm=1, model="other")
+    assert first._try_acquire(0) == 0
+    assert second._try_acquire(0) == pytest.approx(60)
+    assert other_model._try_acquire(0) == 0
+
+
+def test_pause_blocks_the_model(tmp_path, clock):
+    bucket = limiter(tmp_path)
+    bucket.pause(5)
+    assert bucket._try_acquire(0) == pytest.approx(5)
+    clock.now += 5
+    assert bucket._try_acquire(0) == 0
+
+
+def test_unlimited_acquire_does_not_wait(tmp_path):
+    asyncio.run(asyncio.wait_for(limiter(tmp_path).acquire(10_000), timeout=5))
+
+
+def test_estimate_tokens():
+    params = {"messages": [{"content": "x" * 400}], "max_tokens": 50}
+    assert estimate_tokens(params) == 150
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers=headers, status_code=429)
+
+
+@pytest.mark.parametrize(
+    "headers, seconds",
+    [
+        ({"Retry-After": "20"}, 20),
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"Retry-After": "1.5", "retry-after-ms": "300"}, 0.3),
+        ({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}, 360),
+        ({"anthropic-ratelimit-tokens-reset": "250ms"}, 0.25),
+        ({"Retry-After": "-3"}, 0),
+        ({}, None),
+        ({"Retry-After": "soon"}, None),
+    ],
+)
+def test_retry_after_headers(headers, seconds):
+    assert retry_after_seconds(RateLimited(headers)) == (None if seconds is None else pytest.approx(seconds))
+
+
+def test_retry_after_http_date():
+    moment = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert retry_after_seconds(RateLimited({"Retry-After": moment})) == pytest.approx(30, abs=2)
+
+
+def test_rate_limit_detection_and_backoff():
+    assert is_rate_limit_error(RateLimited({}))
+    assert is_rate_limit_error(Exception("Rate limit reached for gpt-4o-mini"))
+    assert not is_rate_limit_error(ValueError("bad request"))
+    assert all(0 <= backoff_delay(attempt) <= min(60, 2 ** attempt) for attempt in range(10))
+
+
+def test_client_waits_for_retry_after(fake_llm, monkeypatch):
+    from src.utils import llm_client
+    from src.utils.llm_client import LLMClient
+
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt: 0.0)
+    replies = iter([RateLimited({"Retry-After": "0.2"}), "pong"])
+
+    def reply(params):
+        answer = next(replies)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    fake_llm.reply = reply
+    client = LLMClient(ModelConfig(model="test-model", use_cache=False))
+    start = time.monotonic()
+    assert asyncio.run(client.call("ping")) == "pong"
+    assert time.monotonic() - start >= 0.2
+    assert len(fake_llm.calls) == 2
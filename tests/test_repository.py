@@ -0,0 +1,80 @@
+import pytest
+
+from src.utils.jsonl_store import JsonlStore
+from src.utils.repository import PokerRepository
+
+QUESTIONS = [
+    {"id": "a-1", "question": "How big is a river overbet?", "street": "river",
+     "difficulty": "advanced", "key_concepts": ["polarization", "blockers"]},
+    {"id": "a-2", "question": "When do you check the flop?", "street": "flop",
+     "difficulty": "beginner", "correct_answer": "On wet boards out of position"},
+]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    with PokerRepository(tmp_path / "poker.sqlite") as repo:
+        yield repo
+
+
+def fts_in_sync(repo, table):
+    """FTS5 integrity-check raises when the index and its content table disagree"""
+    repo.db.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('integrity-check')")
+    return True
+
+
+def test_full_text_search_and_filters(repo):
+    repo.replace_questions("a", QUESTIONS)
+    assert [q["id"] for q in repo.questions(search="overbet")] == ["a-1"]
+    assert [q["id"] for q in repo.questions(search="blockers")] == ["a-1"]
+    assert [q["id"] for q in repo.questions(search="wet position")] == ["a-2"]
+    assert repo.questions(search="wet overbet") == []
+    assert [q["id"] for q in repo.questions(street="flop")] == ["a-2"]
+    assert [q["id"] for q in repo.questions(source_transcript="a", limit=1)] == ["a-1"]
+    # User text is quoted, so FTS5 operators and stray quotes are just words
+    assert repo.questions(search='river AND "( NEAR') == []
+    with pytest.raises(ValueError, match="Cannot filter"):
+        repo.questions(board="Kh7c2d")
+
+
+def test_replacing_a_source_updates_the_index(repo):
+    repo.replace_questions("a", QUESTIONS)
+    repo.replace_questions("b", [{"id": "b-1", "question": "Why overbet the turn?"}])
+    repo.replace_questions("a", [{"id": "a-3", "question": "How do you play the turn?"}])
+    assert sorted(q["id"] for q in repo.questions(search="turn")) == ["a-3", "b-1"]
+    assert [q["id"] for q in repo.questions(search="overbet")] == ["b-1"]
+    assert repo.count("questions") == 2
+    assert fts_in_sync(repo, "questions")
+
+
+def test_rule_text_fields_are_searchable(repo):
+    repo.replace_rules("a", [
+        {"category": "bet_sizing_rules", "condition": "dry board", "action": "bet a third"},
+        {"category": "general_principles", "principle": "Position is power"},
+    ])
+    assert [r["category"] for r in repo.rules(search="third")] == ["bet_sizing_rules"]
+    assert [r["category"] for r in repo.rules(search="position")] == ["general_principles"]
+    stats = repo.stats()
+    assert stats["total_rules"] == 1 and stats["general_principles"] == 1
+
+
+def test_sync_repairs_the_index_from_the_log(repo, tmp_path):
+    store = JsonlStore(tmp_path / "questions.jsonl")
+    store.replace("source_transcript", "a", [{**q, "source_transcript": "a"} for q in QUESTIONS])
+    store.replace("source_transcript", "b", [{"id": "b-1", "question": "Why overbet?",
+                                             "source_transcript": "b"}])
+
+    assert sorted(repo.sync("questions", store.iter_records)) == ["a", "b"]
+    assert repo.sync("questions", store.iter_records) == []
+    assert repo.count("questions") == 3
+
+    # A crash between the log write and the index write
+    store.replace("source_transcript", "b", [{"id": "b-2", "question": "Why underbet?",
+                                             "source_transcript": "b"}])
+    repo.db.execute("DELETE FROM questions WHERE question_id = 'a-2'")
+    repo.db.commit()
+    assert sorted(repo.sync("questions", store.iter_records)) == ["a", "b"]
+    assert sorted(q["id"] for q in repo.questions()) == ["a-1", "a-2", "b-2"]
+    assert [q["id"] for q in repo.questions(search="underbet")] == ["b-2"]
+    assert [q["id"] for q in repo.questions(search="overbet")] == ["a-1"]
+    assert fts_in_sync(repo, "questions")
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.config import ModelConfig
+from src.utils import response_cache
+from src.utils.response_cache import BYPASS_ENV, CACHE_FILE_ENV, ResponseCache
+
+PARAMS = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.3}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(tmp_path / "cache.sqlite")
+
+
+def test_key_covers_output_affecting_params_only():
+    key = ResponseCache.make_key(PARAMS, "v1")
+    assert ResponseCache.make_key({**PARAMS, "timeout": 5, "api_base": "http://x"}, "v1") == key
+    assert ResponseCache.make_key(dict(reversed(PARAMS.items())), "v1") == key
+    assert ResponseCache.make_key(PARAMS, "v2") != key
+    assert ResponseCache.make_key({**PARAMS, "model": "other"}, "v1") != key
+    assert ResponseCache.make_key({**PARAMS, "temperature": 0.0}, "v1") != key
+
+
+def test_get_put_delete(cache):
+    assert cache.get("k") is None
+    cache.put("k", "m", "answer")
+    assert cache.get("k") == "answer"
+    cache.delete("k")
+    assert cache.get("k") is None
+
+
+def test_expired_entries_are_misses(cache, monkeypatch):
+    cache.put("k", "m", "answer")
+    later = SimpleNamespace(time=lambda: time.time() + 31 * 86400)
+    monkeypatch.setattr(response_cache, "time", later)
+    assert cache.get("k") is None
+    assert cache.evict() == 1
+
+
+def test_evicts_least_recently_used_over_max_bytes(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=25)
+    for key in "abc":
+        cache.put(key, "m", "x" * 10)
+    cache.get("a")  # b is now the least recently used
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+
+
+def test_concurrent_misses_share_one_fetch(cache):
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_call("k", "m", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert fetches == 1
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert asyncio.run(cache.get_or_call("k", "m", fetch)) == "answer"
+    assert (fetches, cache.hits) == (1, 1)
+
+
+def test_failed_and_empty_fetches_are_not_cached(cache):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_call("k", "m", fail) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+    assert cache.get("k") is None
+
+    async def empty():
+        return "  "
+
+    asyncio.run(cache.get_or_call("k", "m", empty))
+    assert cache.get("k") is None
+
+
+def test_bypass_env_refetches_and_stores(cache, monkeypatch):
+    cache.put("k", "m", "old")
+
+    async def fetch():
+        return "new"
+
+    monkeypatch.setenv(BYPASS_ENV, "1")
+    assert asyncio.run(cache.get_or_call("k", "m", fetch)) == "new"
+    monkeypatch.setenv(BYPASS_ENV, "0")
+    assert cache.get("k") == "new"
+
+
+def test_cache_file_is_anchored_to_the_project_root(tmp_path):
+    code = "from src.utils.response_cache import CACHE_FILE; print(CACHE_FILE)"
+    root = Path(response_cache.__file__).resolve().parents[2]
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    env.pop(CACHE_FILE_ENV, None)
+    run = lambda: subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    assert run() == str(root / ".llm_cache.sqlite")
+    env[CACHE_FILE_ENV] = str(tmp_path / "other.sqlite")
+    assert run() == str(tmp_path / "other.sqlite")
+
+
+def test_client_answers_repeats_from_the_cache(fake_llm):
+    from src.utils.llm_client import LLMClient
+
+    fake_llm.reply = lambda params: "pong"
+    client = LLMClient(ModelConfig(model="test-model"))
+
+    async def main():
+        return await asyncio.gather(*(client.call("ping") for _ in range(3)))
+
+    assert asyncio.run(main()) == ["pong"] * 3
+    assert asyncio.run(client.call("ping")) == "pong"
+    assert len(fake_llm.calls) == 1
+    assert asyncio.run(client.call("ping", bypass_cache=True)) == "pong"
+    assert len(fake_llm.calls) == 2
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from simulator import (CALL, RAISE, HandSimulator, cbet_strategy, check_call_strategy,
+                       random_strategy)
+from utils import Player
+
+
+def make_simulator(stacks, tables=256, seed=0):
+    players = [Player(f"Seat {i + 1}", chips) for i, chips in enumerate(stacks)]
+    strategies = [random_strategy(seed + i, fold=0.2, raise_=0.4) for i in range(len(stacks))]
+    return HandSimulator(players, strategies, tables=tables, seed=seed)
+
+
+@pytest.mark.parametrize("stacks", [[200, 200], [200, 50, 120, 8, 200, 31], [3, 400, 17]])
+def test_chips_are_conserved(stacks):
+    result = make_simulator(stacks).run(2_000)
+    assert result.net_chips.sum() == 0
+    assert result.hands == 2_000
+
+
+def test_stacks_never_go_negative():
+    stacks = [200, 50, 120, 8, 200, 31]
+    simulator = make_simulator(stacks)
+    state = simulator._deal(512, 0)
+    simulator._play(state)
+    assert (state.stacks >= 0).all()
+    np.testing.assert_array_equal(state.stacks + state.committed, np.broadcast_to(stacks, state.stacks.shape))
+    assert (state.committed.sum(axis=1) >= 3).all()
+
+
+def test_runs_exact_hand_count_and_is_reproducible():
+    first = make_simulator([100, 100, 100], tables=300, seed=4).run(1_000)
+    second = make_simulator([100, 100, 100], tables=300, seed=4).run(1_000)
+    assert first.hands == 1_000
+    np.testing.assert_array_equal(first.net_chips, second.net_chips)
+
+
+def test_check_call_tables_always_reach_showdown():
+    players = [Player("A", 100), Player("B", 100)]
+    result = HandSimulator(players, [check_call_strategy, cbet_strategy(0.5)], tables=64, seed=1).run(200)
+    assert result.showdowns == 200
+    assert result.net_chips.sum() == 0
+
+
+def _preflop_to_short_all_in(short_stack):
+    """Button raises to 6, small blind calls, big blind shoves ``short_stack``"""
+    players = [Player("BTN", 200), Player("SB", 200), Player("BB", short_stack)]
+    simulator = HandSimulator(players, [check_call_strategy] * 3, tables=1, seed=0)
+    state = simulator._deal(1, 0)
+    rows = np.array([0])
+    apply = simulator._apply
+    apply(state, rows, 0, np.array([RAISE]), np.array([6]))
+    apply(state, rows, 1, np.array([CALL]), np.array([0]))
+    apply(state, rows, 2, np.array([RAISE]), np.array([short_stack]))
+    apply(state, rows, 0, np.array([RAISE]), np.array([60]))
+    return state
+
+
+def test_short_all_in_does_not_reopen_betting():
+    state = _preflop_to_short_all_in(9)
+    assert state.current_bet[0] == 9
+    assert state.bets[0].tolist() == [9, 6, 9]
+
+
+def test_full_raise_reopens_betting():
+    state = _preflop_to_short_all_in(20)
+    assert state.current_bet[0] == 60
+    assert state.bets[0].tolist() == [60, 6, 20]
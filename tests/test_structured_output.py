@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+
+from src.models.config import ModelConfig
+from src.schemas import QUESTIONS_SCHEMA, SCHEMAS, output_mode_params
+from src.utils.json_utils import EXPECTED_KEYS
+
+QUESTIONS = {"questions": [{"question": "Bet?", "street": "flop", "correct_answer": "Small",
+                            "difficulty": "beginner", "question_type": "sizing"}]}
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+def test_schemas_require_the_collections_the_parser_expects():
+    for context, keys in EXPECTED_KEYS.items():
+        schema = SCHEMAS[context]
+        assert schema["type"] == "object"
+        assert set(keys) <= set(schema["required"])
+        assert all(schema["properties"][key]["type"] == "array" for key in keys)
+
+
+def test_scenario_fields_accept_null():
+    # The question prompt asks for null when a scenario detail is unknown
+    scenario = QUESTIONS_SCHEMA["properties"]["questions"]["items"]["properties"]["scenario"]
+    assert scenario["properties"]
+    for field in scenario["properties"].values():
+        assert field["type"] == ["string", "null"]
+
+
+def test_output_mode_params():
+    schema = SCHEMAS["questions"]
+    params = output_mode_params("json_schema", "questions", schema)
+    assert params["response_format"]["json_schema"] == {"name": "questions_response", "schema": schema}
+    params = output_mode_params("tools", "questions", schema)
+    assert params["tools"][0]["function"]["parameters"] is schema
+    assert params["tool_choice"]["function"]["name"] == params["tools"][0]["function"]["name"]
+    assert output_mode_params("json_object", "questions", schema) == {"response_format": {"type": "json_object"}}
+    assert output_mode_params("prompt", "questions", schema) == {}
+
+
+@pytest.fixture
+def llm_client(fake_llm):
+    from src.utils import llm_client
+
+    return llm_client
+
+
+def make_client(llm_client, monkeypatch, modes, **config):
+    monkeypatch.setattr(llm_client, "supported_output_modes", lambda model: list(modes))
+    return llm_client.LLMClient(ModelConfig(model="test-model", max_retries=1, **config))
+
+
+def test_supported_output_modes(llm_client, monkeypatch):
+    litellm = llm_client.litellm
+    monkeypatch.setattr(litellm, "supports_response_schema", lambda model: True, raising=False)
+    monkeypatch.setattr(litellm, "supports_function_calling", lambda model: 1 / 0, raising=False)
+    monkeypatch.setattr(litellm, "get_supported_openai_params", lambda model: ["response_format"],
+                        raising=False)
+    assert llm_client.supported_output_modes("m") == ["json_schema", "json_object", "prompt"]
+
+
+def test_is_unsupported_output_error(llm_client):
+    assert llm_client.is_unsupported_output_error(BadRequestError("response_format is not supported"))
+    assert llm_client.is_unsupported_output_error(BadRequestError("tools are not supported"))
+    assert not llm_client.is_unsupported_output_error(BadRequestError("prompt is too long"))
+    assert not llm_client.is_unsupported_output_error(RuntimeError("response_format timed out"))
+
+
+def test_rejected_mode_falls_back_and_is_dropped_for_the_run(fake_llm, llm_client, monkeypatch):
+    def reply(params):
+        if params.get("response_format", {}).get("type") == "json_schema":
+            raise BadRequestError("json_schema response_format not supported")
+        return json.dumps(QUESTIONS)
+
+    fake_llm.reply = reply
+    client = make_client(llm_client, monkeypatch, ["json_schema", "json_object", "prompt"], use_cache=False)
+    assert asyncio.run(client.call_json("q1", "questions")) == QUESTIONS
+    assert asyncio.run(client.call_json("q2", "questions")) == QUESTIONS
+    assert [call.get("response_format", {}).get("type") for call in fake_llm.calls] == [
+        "json_schema", "json_object", "json_object"]
+    assert client.output_modes() == ["json_object", "prompt"]
+    assert client.parse_stats.data["questions/json_object"]["clean"] == 2
+
+
+def test_other_errors_are_not_treated_as_rejections(fake_llm, llm_client, monkeypatch):
+    def reply(params):
+        raise BadRequestError("prompt is too long")
+
+    fake_llm.reply = reply
+    client = make_client(llm_client, monkeypatch, ["json_schema", "prompt"], use_cache=False)
+    with pytest.raises(Exception, match="prompt is too long"):
+        asyncio.run(client.call_json("q", "questions"))
+    assert client.output_modes() == ["json_schema", "prompt"]
+
+
+def test_structured_output_off_sends_no_format(fake_llm, llm_client, monkeypatch):
+    fake_llm.reply = lambda params: json.dumps(QUESTIONS)
+    client = make_client(llm_client, monkeypatch, ["json_schema", "prompt"],
+                         use_cache=False, structured_output=False)
+    asyncio.run(client.call_json("q", "questions"))
+    assert "response_format" not in fake_llm.calls[0] and "tools" not in fake_llm.calls[0]
+
+
+def test_tool_call_arguments_are_the_answer(llm_client):
+    from types import SimpleNamespace
+
+    call = SimpleNamespace(function=SimpleNamespace(arguments='{"questions": []}'))
+    response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=None,
+                                                                                tool_calls=[call]))])
+    assert llm_client.LLMClient._response_text(response) == '{"questions": []}'
+
+
+def test_unparseable_answers_are_not_cached(fake_llm, llm_client, monkeypatch):
+    answers = iter(["Sorry, I cannot help with that.", json.dumps(QUESTIONS)])
+    fake_llm.reply = lambda params: next(answers)
+    client = make_client(llm_client, monkeypatch, ["prompt"])
+    assert asyncio.run(client.call_json("q", "questions")) == {"questions": []}
+    assert asyncio.run(client.call_json("q", "questions")) == QUESTIONS
+    assert asyncio.run(client.call_json("q", "questions")) == QUESTIONS
+    assert len(fake_llm.calls) == 2
+    stats = client.parse_stats.data["questions/prompt"]
+    assert (stats["clean"], stats["failed"]) == (2, 1)
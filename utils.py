@@ -1,6 +1,10 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from enum import Enum
 
+import numpy as np
+
+import hand_evaluator
+
 class Suit(Enum):
     HEARTS = "♥"
     DIAMONDS = "♦"
@@ -8,21 +12,147 @@ class Suit(Enum):
     SPADES = "♠"
 
 class Card:
-    def __init__(self, rank: str, suit: Suit):
-        self.rank = rank
-        self.suit = suit
+    """
+    One of the 52 interned playing cards.
+
+    Card("A", Suit.HEARTS) always returns the same instance, so cards compare by
+    identity and carry no per-use allocation. ``id`` is ``rank * 4 + suit`` as used
+    by hand_evaluator and ``mask`` is ``1 << id`` for set operations on hands.
+    ``rank`` uses the evaluator's "T" for tens, but str() still shows "10♥".
+    """
+    __slots__ = ("rank", "suit", "id", "mask")
+
+    _ALL: List["Card"] = []
+    _BY_STRING: Dict[str, "Card"] = {}
+
+    def __new__(cls, rank: str, suit: Suit):
+        rank = "T" if rank == "10" else rank.upper()
+        return cls._ALL[hand_evaluator.RANKS.index(rank) * 4 + _SUIT_INDEX[suit]]
+
+    @classmethod
+    def _create(cls, card_id: int) -> "Card":
+        card = object.__new__(cls)
+        card.rank = hand_evaluator.RANKS[card_id // 4]
+        card.suit = _SUITS[card_id % 4]
+        card.id = card_id
+        card.mask = 1 << card_id
+        return card
+
+    @classmethod
+    def from_id(cls, card_id: int) -> "Card":
+        """Return the card with integer id 0-51"""
+        return cls._ALL[card_id]
+
+    @classmethod
+    def parse(cls, text: str) -> "Card":
+        """Return the card for a string like "Ah", "Td" or "10c" """
+        try:
+            return cls._BY_STRING[text]
+        except KeyError:
+            raise ValueError(f"Invalid card string: {text!r}") from None
+
+    def __reduce__(self):
+        return (Card.from_id, (self.id,))
+
+    def __repr__(self):
+        return f"Card.parse({hand_evaluator.card_to_string(self.id)!r})"
 
     def __str__(self):
-        return f"{self.rank}{self.suit.value}"
+        rank = "10" if self.rank == "T" else self.rank
+        return f"{rank}{self.suit.value}"
+
+_SUITS = list(Suit)
+_SUIT_INDEX = {suit: i for i, suit in enumerate(Suit)}
+
+def _intern_cards():
+    """Create the 52 Card instances and the string lookup used by Card.parse"""
+    for card_id in range(52):
+        card = Card._create(card_id)
+        Card._ALL.append(card)
+        letter = hand_evaluator.SUITS[card_id % 4]
+        ranks = [card.rank, card.rank.lower()] + (["10"] if card.rank == "T" else [])
+        for rank in ranks:
+            for suit in (letter, letter.upper(), card.suit.value):
+                Card._BY_STRING[rank + suit] = card
+
+_intern_cards()
+
+def parse_cards(text: str) -> List[Card]:
+    """Parse a card list such as "AhKd" or "Ah Kd Qc" """
+    text = text.replace(" ", "").replace(",", "")
+    cards = []
+    i = 0
+    while i < len(text):
+        size = 3 if text.startswith("10", i) else 2
+        cards.append(Card.parse(text[i:i + size]))
+        i += size
+    return cards
+
+def cards_to_array(cards: List[Card]) -> np.ndarray:
+    """Card ids as an int8 array for the batch evaluator"""
+    return np.fromiter((card.id for card in cards), dtype=np.int8, count=len(cards))
+
+class Deck:
+    """
+    52-card deck stored as a flat array of card ids.
+
+    Shuffling permutes the array in place and dealing hands out views of it,
+    so a shuffle/deal cycle does not allocate any Card objects.
+    """
+
+    def __init__(self, seed: Optional[int] = None, dead: Iterable[Card] = ()):
+        self.rng = np.random.default_rng(seed)
+        self.cards = np.arange(52, dtype=np.int8)
+        self.size = 52
+        self.position = 0
+        self.remove(dead)
+
+    def remove(self, cards: Iterable[Card]):
+        """Take known cards (hero's hand, the board) out of the deck"""
+        for card in cards:
+            index = int(np.flatnonzero(self.cards[:self.size] == card.id)[0])
+            self.size -= 1
+            self.cards[index], self.cards[self.size] = self.cards[self.size], self.cards[index]
+
+    def shuffle(self):
+        """Shuffle the live cards in place and start dealing from the top"""
+        self.rng.shuffle(self.cards[:self.size])
+        self.position = 0
+
+    def deal_ids(self, count: int) -> np.ndarray:
+        """Deal ``count`` card ids as a view into the deck"""
+        if self.position + count > self.size:
+            raise ValueError(f"Cannot deal {count} cards, only {self.remaining} left")
+        start = self.position
+        self.position += count
+        return self.cards[start:self.position]
+
+    def deal(self, count: int = 1) -> List[Card]:
+        """Deal ``count`` interned Card objects"""
+        return [Card._ALL[card_id] for card_id in self.deal_ids(count).tolist()]
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.position
+
+    def __len__(self):
+        return self.remaining
+
+def card_to_int(card: Card) -> int:
+    """Convert a Card into the integer id used by hand_evaluator"""
+    return card.id
 
 def evaluate_hand(hand: List[Card]) -> int:
-    # Implement hand evaluation logic
-    # This is a placeholder implementation
-    return sum(int(card.rank) if card.rank.isdigit() else 10 for card in hand)
+    """Value of a 5, 6 or 7 card hand, from 1 (seven high) to 7462 (royal flush)"""
+    return hand_evaluator.evaluate([card.id for card in hand])
 
 def compare_hands(hand1: List[Card], hand2: List[Card]) -> int:
-    score1 = evaluate_hand(hand1)
-    score2 = evaluate_hand(hand2)
+    if len(hand1) == len(hand2):
+        ids = np.array([[card.id for card in hand] for hand in (hand1, hand2)])
+        score1, score2 = hand_evaluator.evaluate_batch(ids)
+    else:
+        score1 = evaluate_hand(hand1)
+        score2 = evaluate_hand(hand2)
     if score1 > score2:
         return 1
     elif score1 < score2: